@@ -5,6 +5,8 @@ from typing import Any
 from pydantic import BaseModel
 from pydantic_ai import Agent, RunContext
 
+from cassette import CassetteModel
+from repomap import DEFAULT_MAX_CHARS, get_repo_map
 from tools import FileTools
 
 
@@ -32,7 +34,7 @@ Available tools:
 - bash: Execute shell commands
 
 Guidelines:
-1. Start by exploring the directory structure with ls or find
+1. Start from the repository map below when there is one; explore with ls or find only what it does not cover
 2. Use grep to find relevant code patterns
 3. Read specific files to understand implementation details
 4. Be concise and focus on the user's specific questions
@@ -52,6 +54,11 @@ class AgentService:
     model: str = "anthropic:claude-sonnet-4-20250514"
     base_url: str | None = None
     system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    repo_map: bool = True
+    repo_map_chars: int = DEFAULT_MAX_CHARS
+    cassette: str | None = None
+    cassette_mode: str = "record"
+    replay_latency: str = "zero"
     
     _agent: Agent[AgentDeps] | None = field(default=None, init=False)
     _deps: AgentDeps = field(init=False)
@@ -98,12 +105,31 @@ class AgentService:
                 return "\n".join(lines)
             return f"Error: {result.error}"
 
+        model = self.model
+        if self.cassette:
+            model = CassetteModel(
+                path=self.cassette,
+                mode=self.cassette_mode,
+                model=self.model,
+                latency=self.replay_latency,
+                repo_path=self.repo_path,
+            )
+
         self._agent = Agent(
-            model=self.model,
+            model=model,
             system_prompt=self.system_prompt,
             tools=[read, bash, grep, find, ls],
         )
 
+        if self.repo_map:
+            # Evaluated per run; the map is cached by repo content hash
+            @self._agent.system_prompt
+            def repo_map_prompt() -> str:
+                repo_map = get_repo_map(self.repo_path, self.repo_map_chars)
+                if not repo_map:
+                    return ""
+                return f"Repository map (top-level symbols of the most imported modules):\n\n{repo_map}"
+
     async def analyze(self, prompt: str) -> AnalysisResult:
         if self._agent is None:
             self._init_agent()
@@ -112,17 +138,25 @@ class AgentService:
         
         result = await self._agent.run(prompt, deps=self._deps)
         
-        tool_calls = []
+        # Pair each tool call with its return, which arrives in a later message
+        calls = {}
+        returns = {}
         for msg in result.all_messages():
-            if hasattr(msg, 'parts'):
-                for part in msg.parts:
-                    if hasattr(part, 'tool_call_id'):
-                        tool_calls.append(ToolCallRecord(
-                            name=part.tool_name,
-                            args=part.args,
-                            result=str(part.content)[:500],
-                            is_error=part.content and 'Error' in str(part.content)
-                        ))
+            for part in getattr(msg, 'parts', []):
+                if part.part_kind == 'tool-call':
+                    calls[part.tool_call_id] = part
+                elif part.part_kind in ('tool-return', 'retry-prompt'):
+                    returns[part.tool_call_id] = part
+
+        tool_calls = []
+        for call_id, call in calls.items():
+            content = str(returns[call_id].content) if call_id in returns else ""
+            tool_calls.append(ToolCallRecord(
+                name=call.tool_name,
+                args=call.args_as_dict(),
+                result=content[:500],
+                is_error=content.startswith('Error') or getattr(returns.get(call_id), 'part_kind', '') == 'retry-prompt',
+            ))
 
         return AnalysisResult(
             success=True,
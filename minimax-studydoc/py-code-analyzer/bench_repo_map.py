@@ -0,0 +1,87 @@
+"""Measure the repo map: build cost, and tool calls per analysis with and without it.
+
+    python bench_repo_map.py [repo_path] [--runs N] [--offline]
+
+The tool-call comparison runs real analyses, so it needs a model API key
+(see .env.example); with --offline only the map itself is measured.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+import repomap
+
+PROMPTS = [
+    "Describe the overall architecture of this project.",
+    "What are the main entry points and what do they do?",
+    "Which module handles configuration, and how is it loaded?",
+    "List the most important classes and how they depend on each other.",
+]
+
+
+def measure_map(repo_path: str) -> None:
+    repomap._memory_cache.clear()
+    repomap._file_hashes.clear()
+    files = repomap.scan_repo(Path(repo_path).resolve())
+
+    start = time.perf_counter()
+    repo_map = repomap.build_repo_map(Path(repo_path).resolve(), files)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    repomap.get_repo_map(repo_path)  # Populate caches
+    repomap._memory_cache.clear()
+    start = time.perf_counter()
+    repomap.get_repo_map(repo_path)
+    cached_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Repo map: {len(files)} files, {len(repo_map)} chars")
+    print(f"  build: {build_ms:.1f} ms, cached lookup: {cached_ms:.1f} ms")
+
+
+async def count_tool_calls(repo_path: str, use_map: bool, runs: int) -> list[int]:
+    from agent import AgentService
+
+    counts = []
+    for prompt in PROMPTS:
+        for _ in range(runs):
+            service = AgentService(
+                repo_path=repo_path,
+                model=os.getenv("MODEL", "anthropic:claude-sonnet-4-20250514"),
+                repo_map=use_map,
+            )
+            result = await service.analyze(prompt)
+            counts.append(len(result.tool_calls))
+    return counts
+
+
+async def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("repo_path", nargs="?", default=os.getenv("REPO_PATH", "./repo"))
+    parser.add_argument("--runs", type=int, default=1, help="Runs per prompt and setting")
+    parser.add_argument("--offline", action="store_true", help="Only measure building the map")
+    args = parser.parse_args()
+
+    measure_map(args.repo_path)
+    if args.offline:
+        return
+
+    without = await count_tool_calls(args.repo_path, False, args.runs)
+    with_map = await count_tool_calls(args.repo_path, True, args.runs)
+    mean_without = statistics.mean(without)
+    mean_with = statistics.mean(with_map)
+    print(f"Tool calls per analysis over {len(without)} analyses:")
+    print(f"  without map: {mean_without:.2f}")
+    print(f"  with map:    {mean_with:.2f}")
+    if mean_without:
+        print(f"  reduction:   {(1 - mean_with / mean_without) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import AgentModel, Model, infer_model
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import ToolDefinition
+from pydantic_ai.usage import Usage
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Cassette line: {"key": sha256, "latency": seconds, "request": summary, "response": ..., "usage": ...}
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class Cassette:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: dict[str, deque[dict]] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+        if self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+                    self._last[entry["key"]] = entry
+
+    def next(self, key: str) -> dict | None:
+        # Repeated requests replay in recorded order, then keep the last answer
+        entries = self._entries.get(key)
+        if entries:
+            return entries.popleft()
+        return self._last.get(key)
+
+    def append(self, entry: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+_cassettes: dict[Path, Cassette] = {}
+
+
+def get_cassette(path: str) -> Cassette:
+    key = Path(path).resolve()
+    if key not in _cassettes:
+        _cassettes[key] = Cassette(str(key))
+    return _cassettes[key]
+
+
+def _strip_volatile(value):
+    # Timestamps differ between runs and must not change the request key
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k != "timestamp"}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def request_key(
+    model_name: str,
+    tools: list[ToolDefinition],
+    messages: list[ModelMessage],
+    repo_path: str | None = None,
+) -> str:
+    payload = {
+        "model": model_name,
+        "tools": [dataclasses.asdict(tool) for tool in tools],
+        "messages": _strip_volatile(ModelMessagesTypeAdapter.dump_python(messages, mode="json")),
+    }
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    if repo_path:
+        data = data.replace(repo_path, "<repo>")
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+@dataclasses.dataclass
+class CassetteModel(Model):
+    path: str
+    mode: str = REPLAY
+    model: Model | str | None = None
+    latency: str = "zero"
+    repo_path: str | None = None
+
+    def __post_init__(self):
+        if self.mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+        # Keys use the configured name, so recording and replay agree
+        self.key_name = self.model.name() if isinstance(self.model, Model) else str(self.model or "")
+        # Replay never calls the provider, so the wrapped model is not built
+        if self.mode == RECORD:
+            self.model = infer_model(self.model)
+        if self.repo_path:
+            self.repo_path = str(Path(self.repo_path).resolve())
+
+    async def agent_model(
+        self,
+        *,
+        function_tools: list[ToolDefinition],
+        allow_text_result: bool,
+        result_tools: list[ToolDefinition],
+    ) -> AgentModel:
+        inner = None
+        if self.mode == RECORD:
+            inner = await self.model.agent_model(
+                function_tools=function_tools,
+                allow_text_result=allow_text_result,
+                result_tools=result_tools,
+            )
+        return CassetteAgentModel(self, inner, function_tools + result_tools)
+
+    def name(self) -> str:
+        if isinstance(self.model, Model):
+            return self.model.name()
+        return str(self.model or "cassette")
+
+
+@dataclasses.dataclass
+class CassetteAgentModel(AgentModel):
+    owner: CassetteModel
+    inner: AgentModel | None
+    tools: list[ToolDefinition]
+
+    async def request(
+        self, messages: list[ModelMessage], model_settings: ModelSettings | None
+    ) -> tuple[ModelResponse, Usage]:
+        owner = self.owner
+        key = request_key(owner.key_name, self.tools, messages, owner.repo_path)
+        cassette = get_cassette(owner.path)
+
+        if owner.mode == REPLAY:
+            entry = cassette.next(key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded response in {owner.path} for this request; record it again")
+            if owner.latency == "original":
+                await asyncio.sleep(entry.get("latency", 0))
+            response = ModelMessagesTypeAdapter.validate_python([entry["response"]])[0]
+            return response, Usage(**entry.get("usage", {}))
+
+        start = time.perf_counter()
+        response, usage = await self.inner.request(messages, model_settings)
+        cassette.append({
+            "key": key,
+            "latency": round(time.perf_counter() - start, 4),
+            "request": {"model": owner.name(), "messages": len(messages)},
+            "response": ModelMessagesTypeAdapter.dump_python([response], mode="json")[0],
+            "usage": dataclasses.asdict(usage),
+        })
+        return response, usage
@@ -0,0 +1,246 @@
+import ast
+import hashlib
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("REPO_MAP_CACHE_DIR", Path.home() / ".cache" / "py-code-analyzer" / "repomap"))
+# Bump when the map format changes, so cached maps are rebuilt
+REPO_MAP_VERSION = 1
+DEFAULT_MAX_CHARS = 6000
+TREE_SHARE = 0.4
+MAX_TREE_DEPTH = 3
+MAX_DIR_ENTRIES = 12
+
+SKIP_DIRS = {
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "env", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", "build", "dist",
+    ".mini-claw", ".idea", ".vscode",
+}
+
+
+@dataclass
+class ModuleInfo:
+    path: str
+    size: int
+    symbols: list[str] = field(default_factory=list)
+    imports: set[str] = field(default_factory=set)
+    importers: set[str] = field(default_factory=set)
+
+
+def scan_repo(repo_path: Path) -> list[str]:
+    files = []
+    for root, dirs, names in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        rel_root = Path(root).relative_to(repo_path)
+        for name in sorted(names):
+            if not name.startswith("."):
+                files.append((rel_root / name).as_posix())
+    return files
+
+
+# Absolute path -> (mtime_ns, size, sha256), so unchanged files are not re-read
+_file_hashes: dict[Path, tuple[int, int, bytes]] = {}
+
+
+def _file_hash(path: Path) -> bytes:
+    st = path.stat()
+    cached = _file_hashes.get(path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    digest = hashlib.sha256(path.read_bytes()).digest()
+    _file_hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def content_hash(repo_path: Path, files: list[str]) -> str:
+    # Python sources are hashed by content; other files only by path, since
+    # the map shows nothing else about them
+    digest = hashlib.sha256()
+    for rel in files:
+        digest.update(rel.encode() + b"\0")
+        if rel.endswith(".py"):
+            try:
+                digest.update(_file_hash(repo_path / rel))
+            except OSError:
+                pass
+    return digest.hexdigest()[:16]
+
+
+def module_names(rel: str) -> list[str]:
+    parts = rel[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    names = [".".join(parts)] if parts else []
+    # src/ layouts import without the src prefix
+    if len(parts) > 1 and parts[0] == "src":
+        names.append(".".join(parts[1:]))
+    return names
+
+
+def _signature(node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
+    args = [a.arg for a in node.args.posonlyargs + node.args.args if a.arg not in ("self", "cls")]
+    if node.args.vararg:
+        args.append("*" + node.args.vararg.arg)
+    args += [a.arg for a in node.args.kwonlyargs]
+    if node.args.kwarg:
+        args.append("**" + node.args.kwarg.arg)
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({', '.join(args)})"
+
+
+def parse_module(repo_path: Path, rel: str) -> ModuleInfo | None:
+    try:
+        source = (repo_path / rel).read_bytes()
+        tree = ast.parse(source)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    info = ModuleInfo(path=rel, size=len(source))
+    package = rel.split("/")[:-1]
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            methods = [
+                n.name for n in node.body
+                if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and not n.name.startswith("_")
+            ]
+            line = f"class {node.name}"
+            if methods:
+                line += ": " + ", ".join(methods)
+            info.symbols.append(line)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if not node.name.startswith("_"):
+                info.symbols.append(_signature(node))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id.isupper() and not target.id.startswith("_"):
+                    info.symbols.append(target.id)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            info.imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:len(package) - node.level + 1] if node.level > 1 else list(package)
+                module = ".".join(base + ([node.module] if node.module else []))
+            else:
+                module = node.module or ""
+            if module:
+                info.imports.add(module)
+            # `from pkg import mod` may import a submodule
+            info.imports.update(f"{module}.{alias.name}" if module else alias.name for alias in node.names)
+    return info
+
+
+def rank_modules(modules: list[ModuleInfo]) -> list[ModuleInfo]:
+    by_name = {}
+    for info in modules:
+        for name in module_names(info.path):
+            by_name[name] = info
+    for info in modules:
+        for name in info.imports:
+            # Resolve the longest prefix that is a repo module
+            parts = name.split(".")
+            while parts:
+                target = by_name.get(".".join(parts))
+                if target is not None:
+                    if target is not info:
+                        target.importers.add(info.path)
+                    break
+                parts.pop()
+    return sorted(modules, key=lambda m: (-len(m.importers), -m.size, m.path))
+
+
+def render_tree(files: list[str], max_chars: int) -> str:
+    children: dict[str, set[str]] = {}
+    file_counts: dict[str, int] = {}
+    for rel in files:
+        parts = rel.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth])
+            children.setdefault(parent, set()).add("/".join(parts[:depth + 1]))
+            file_counts[parent] = file_counts.get(parent, 0) + 1
+
+    lines: list[str] = []
+
+    def walk(directory: str, depth: int) -> None:
+        entries = sorted(children.get(directory, ()), key=lambda p: (p not in children, p))
+        for i, entry in enumerate(entries):
+            if i == MAX_DIR_ENTRIES:
+                lines.append("  " * depth + f"... ({len(entries) - i} more)")
+                break
+            name = entry.rsplit("/", 1)[-1]
+            if entry in children:
+                count = file_counts[entry]
+                lines.append("  " * depth + f"{name}/ ({count} file{'s' if count != 1 else ''})")
+                if depth + 1 < MAX_TREE_DEPTH:
+                    walk(entry, depth + 1)
+            else:
+                lines.append("  " * depth + name)
+
+    walk("", 0)
+    out = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 > max_chars:
+            out.append("...")
+            break
+        out.append(line)
+        used += len(line) + 1
+    return "\n".join(out)
+
+
+def build_repo_map(repo_path: Path, files: list[str], max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    tree = render_tree(files, int(max_chars * TREE_SHARE))
+    modules = [m for m in (parse_module(repo_path, rel) for rel in files if rel.endswith(".py")) if m]
+
+    sections = [f"Directory tree ({len(files)} files):\n{tree}"]
+    modules_title = "Key modules, most imported first:"
+    used = len(sections[0]) + 2 + len(modules_title)
+    blocks = []
+    for info in rank_modules(modules):
+        if not info.symbols:
+            continue
+        header = f"{info.path} (imported by {len(info.importers)})"
+        block = "\n".join([header] + [f"  {s}" for s in info.symbols])
+        if used + len(block) + 1 > max_chars:
+            # Keep at least the header of a module whose symbols do not fit
+            block = header + f"\n  ... {len(info.symbols)} symbols"
+            if used + len(block) + 1 > max_chars:
+                break
+        blocks.append(block)
+        used += len(block) + 1
+    if blocks:
+        sections.append(modules_title + "\n" + "\n".join(blocks))
+    return "\n\n".join(sections)
+
+
+_memory_cache: dict[str, str] = {}
+
+
+def get_repo_map(repo_path: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    root = Path(repo_path).resolve()
+    if not root.is_dir():
+        return ""
+    files = scan_repo(root)
+    key = f"{content_hash(root, files)}-{max_chars}-v{REPO_MAP_VERSION}"
+    if key in _memory_cache:
+        return _memory_cache[key]
+
+    cache_file = CACHE_DIR / f"{key}.txt"
+    try:
+        repo_map = cache_file.read_text(encoding="utf-8")
+    except OSError:
+        repo_map = build_repo_map(root, files, max_chars)
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(repo_map, encoding="utf-8")
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass
+    _memory_cache[key] = repo_map
+    return repo_map
@@ -23,6 +23,11 @@ MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "5"))
 SESSION_IDLE_TIMEOUT_MS = int(os.getenv("SESSION_IDLE_TIMEOUT_MS", "1800000"))
 SESSION_MAX_LIFETIME_MS = int(os.getenv("SESSION_MAX_LIFETIME_MS", "7200000"))
 
+# Record model calls to a JSONL cassette, or replay them offline
+CASSETTE = os.getenv("CASSETTE", "")
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "record")
+REPLAY_LATENCY = os.getenv("REPLAY_LATENCY", "zero")
+
 session_manager = SessionManager(
     max_sessions=MAX_SESSIONS,
     idle_timeout_ms=SESSION_IDLE_TIMEOUT_MS,
@@ -57,6 +62,9 @@ async def get_session_from_request(x_session_id: Annotated[str | None, Header()]
         api_key=API_KEY or None,
         model=MODEL,
         base_url=BASE_URL or None,
+        cassette=CASSETTE or None,
+        cassette_mode=CASSETTE_MODE,
+        replay_latency=REPLAY_LATENCY,
     )
     
     return session_id, agent
@@ -46,6 +46,7 @@ class SessionManager:
         api_key: str | None = None,
         model: str = "anthropic:claude-sonnet-4-20250514",
         base_url: str | None = None,
+        **options: Any,
     ) -> AgentService:
         existing = self.sessions.get(session_id)
 
@@ -62,6 +63,7 @@ class SessionManager:
             api_key=api_key,
             model=model,
             base_url=base_url,
+            **options,
         )
 
         session_info = SessionInfo(
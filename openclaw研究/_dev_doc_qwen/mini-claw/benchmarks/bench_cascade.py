@@ -0,0 +1,101 @@
+"""Model cascade: latency and cost of a run with and without a small model.
+
+A scripted task reads a handful of files one by one and then answers. Two
+stand-in models play it: a "large" one that is slow and always right, and
+a "small" one that is fast but gets every fourth tool call's arguments
+wrong and cannot write the final answer. The same task runs once on the
+large model alone and once through ``CascadeLLM``; the cascade must give
+the same answer, with the split of calls, latency and cost reported.
+
+    uv run python benchmarks/bench_cascade.py
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.cascade import CascadeLLM, cost_musd
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+
+FILES = [f"module_{i}.py" for i in range(8)]
+
+
+class StandInModel(BaseLLM):
+    """Plays the task from the history: read the next file, or answer."""
+
+    def __init__(self, model: str, latency: float, small: bool):
+        super().__init__(api_key="", model=model)
+        self.latency = latency
+        self.small = small
+        self.calls = 0
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        read = sum(1 for m in messages if m.content.startswith("Tool 'read' result: "))
+        usage = {"input_tokens": 1_500 + 400 * read, "output_tokens": 60}
+        if read < len(FILES):
+            arguments: dict[str, Any] = {"path": FILES[read]}
+            if self.small and self.calls % 4 == 0:
+                arguments = {"file": FILES[read]}  # Invalid: no such parameter
+            return LLMResponse(
+                tool_calls=[ToolCall(name="read", arguments=arguments)],
+                usage=usage,
+                stop_reason="tool_use",
+            )
+        usage["output_tokens"] = 400
+        content = "draft" if self.small else f"All {read} modules define a `VALUE`."
+        return LLMResponse(content=content, usage=usage, stop_reason="end_turn")
+
+
+async def run(llm: BaseLLM, workspace: str) -> tuple[str, float, dict[str, int]]:
+    agent = Agent(llm=llm, workspace=workspace, max_turns=20)
+    start = time.perf_counter()
+    result = await agent.run("Read the modules and summarize them")
+    await agent.close()
+    return result.response, time.perf_counter() - start, result.usage or {}
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as workspace:
+        for name in FILES:
+            (Path(workspace) / name).write_text(f"VALUE = {name!r}\n")
+
+        large = StandInModel("claude-sonnet-4-5", latency=0.4, small=False)
+        baseline, baseline_seconds, baseline_usage = await run(large, workspace)
+        baseline_cost = cost_musd(large.model, baseline_usage) or 0
+
+        small = StandInModel("claude-haiku-4-5", latency=0.08, small=True)
+        cascade = CascadeLLM(small, StandInModel("claude-sonnet-4-5", latency=0.4, small=False))
+        response, seconds, usage = await run(cascade, workspace)
+
+    cost = usage.get("small_cost_musd", 0) + usage.get("large_cost_musd", 0)
+    print(f"large only   {baseline_seconds:5.2f}s  ${baseline_cost / 1e6:.4f}  {baseline_usage.get('large_calls', large.calls)} call(s)")
+    print(
+        f"cascade      {seconds:5.2f}s  ${cost / 1e6:.4f}  "
+        f"small {usage.get('small_calls', 0)} call(s) {usage.get('small_ms', 0) / 1000:.2f}s "
+        f"${usage.get('small_cost_musd', 0) / 1e6:.4f}, "
+        f"large {usage.get('large_calls', 0)} call(s) {usage.get('large_ms', 0) / 1000:.2f}s "
+        f"${usage.get('large_cost_musd', 0) / 1e6:.4f}, "
+        f"{usage.get('escalations', 0)} escalation(s)"
+    )
+    if response != baseline:
+        print(f"FAIL: cascade answered {response!r}, expected {baseline!r}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
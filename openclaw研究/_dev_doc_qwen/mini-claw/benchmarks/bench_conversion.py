@@ -0,0 +1,140 @@
+"""Microbenchmark: per-turn request preparation for long histories.
+
+Grows a history to 500 messages one turn at a time and measures the work
+done before each provider call: converting messages to provider format and
+building tool definitions. Compares a full conversion on every turn (the
+previous behaviour, O(n^2) over a run, with the literal tool schemas it
+used) with the append-only message cache and the cached tool definitions.
+
+Usage:
+    uv run python benchmarks/bench_conversion.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.llm import Message, MessageCache
+from miniclaw.registry import anthropic_tool_definitions, tool_key
+from miniclaw.tools import TOOLS
+
+HISTORY_LENGTH = 500
+REPEATS = 5
+
+
+def _history() -> list[Message]:
+    messages = []
+    for i in range(HISTORY_LENGTH):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append(Message(role=role, content=f"message {i} " + "x" * 400))
+    return messages
+
+
+def _tool_description(tool_name: str) -> str:
+    """Tool description as the previous provider code looked it up."""
+    descriptions = {
+        "bash": "Execute a shell command in the workspace directory",
+        "read": "Read the contents of a file",
+        "write": "Write content to a new file or overwrite an existing file",
+        "edit": "Edit a file by replacing old text with new text",
+        "glob": "Find files matching a glob pattern",
+    }
+    return descriptions.get(tool_name, "Execute a tool")
+
+
+def _tool_schema(tool_name: str) -> dict:
+    """Tool schema as the previous provider code built it, on every call."""
+    schemas = {
+        "bash": {
+            "type": "object",
+            "properties": {
+                "command": {"type": "string", "description": "The shell command to execute"}
+            },
+            "required": ["command"],
+        },
+        "read": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "Path to the file to read"}
+            },
+            "required": ["path"],
+        },
+        "write": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "Path to the file to write"},
+                "content": {"type": "string", "description": "Content to write to the file"}
+            },
+            "required": ["path", "content"],
+        },
+        "edit": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string", "description": "Path to the file to edit"},
+                "old_text": {"type": "string", "description": "Text to find and replace"},
+                "new_text": {"type": "string", "description": "Text to replace with"}
+            },
+            "required": ["path", "old_text", "new_text"],
+        },
+        "glob": {
+            "type": "object",
+            "properties": {
+                "pattern": {"type": "string", "description": "Glob pattern to match files"}
+            },
+            "required": ["pattern"],
+        },
+    }
+    return schemas.get(tool_name, {
+        "type": "object",
+        "properties": {},
+        "required": [],
+    })
+
+
+def full_conversion(source: list[Message]) -> float:
+    """Convert the whole history and rebuild tool definitions on every turn."""
+    history: list[Message] = []
+    start = time.perf_counter()
+    for msg in source:
+        history.append(msg)
+        converted = [
+            {"role": m.role, "content": m.content}
+            for m in history
+            if m.role in ("user", "assistant")
+        ]
+        tools = [
+            {"name": name, "description": _tool_description(name), "input_schema": _tool_schema(name)}
+            for name in TOOLS
+        ]
+        assert len(converted) == len(history) and tools
+    return time.perf_counter() - start
+
+
+def incremental_conversion(source: list[Message]) -> float:
+    """Convert only appended messages and reuse cached tool definitions."""
+    history: list[Message] = []
+    cache = MessageCache()
+    start = time.perf_counter()
+    for msg in source:
+        history.append(msg)
+        converted = cache.convert(history).messages
+        tools = anthropic_tool_definitions(tool_key(TOOLS))
+        assert len(converted) == len(history) and tools
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    source = _history()
+    full = min(full_conversion(source) for _ in range(REPEATS))
+    incremental = min(incremental_conversion(source) for _ in range(REPEATS))
+    
+    print(f"{HISTORY_LENGTH} turns, best of {REPEATS}")
+    print(f"  full conversion:        {full * 1000:8.2f} ms total, {full / HISTORY_LENGTH * 1e6:7.1f} us/turn")
+    print(f"  incremental conversion: {incremental * 1000:8.2f} ms total, {incremental / HISTORY_LENGTH * 1e6:7.1f} us/turn")
+    print(f"  speedup: {full / incremental:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Per-invocation overhead of scripted CLI runs, with and without the daemon.
+
+A two-turn run is recorded to a cassette with a scripted LLM, then
+``mini-claw --replay`` is invoked in a loop as a script would, once
+in-process (``--no-daemon``) and once through a daemon started for the
+benchmark. Replay has no LLM latency, so the times are pure overhead:
+interpreter start, imports, config, client and agent setup.
+
+    uv run python benchmarks/bench_daemon.py
+    uv run python benchmarks/bench_daemon.py -n 20
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from miniclaw.agent import Agent
+from miniclaw.cassette import RECORD, CassetteLLM
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+MESSAGE = "check the greeting"
+
+
+class ScriptedLLM(BaseLLM):
+    """Fixed responses, recorded under the CLI's default model name."""
+
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__(api_key="", model="claude-sonnet-4-5-20250929")
+        self.responses = responses
+        self.calls = 0
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return response
+
+
+async def record(cassette: str, workspace: str) -> None:
+    llm = ScriptedLLM([
+        LLMResponse(tool_calls=[ToolCall(name="bash", arguments={"command": "echo hello"})]),
+        LLMResponse(content="The greeting is hello.", stop_reason="end_turn"),
+    ])
+    agent = Agent(llm=CassetteLLM(cassette, RECORD, llm=llm, workspace=workspace), workspace=workspace)
+    await agent.run(MESSAGE)
+    await agent.close()
+
+
+def invoke(env: dict[str, str], *args: str) -> float:
+    """Run the CLI once; return its wall time in seconds."""
+    code = "import sys; from miniclaw.cli import main; sys.exit(main())"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code, *args], env=env, capture_output=True, text=True, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(f"mini-claw {' '.join(args)} failed:\n{proc.stdout}{proc.stderr}")
+    return elapsed
+
+
+def report(label: str, times: list[float]) -> None:
+    times = sorted(times)
+    print(f"{label:12} min {times[0] * 1000:7.1f} ms   median {times[len(times) // 2] * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Invocations per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "workspace"
+        workspace.mkdir()
+        cassette = str(Path(tmp) / "run.jsonl")
+        asyncio.run(record(cassette, str(workspace)))
+
+        env = dict(
+            os.environ,
+            HOME=tmp,
+            MINI_CLAW_SOCKET=str(Path(tmp) / "daemon.sock"),
+            PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+        )
+        run_args = ("--replay", cassette, "-w", str(workspace), MESSAGE)
+
+        report("in-process", [invoke(env, "--no-daemon", *run_args) for _ in range(args.runs)])
+        invoke(env, "--daemon", "start")
+        try:
+            invoke(env, *run_args)  # First run warms the daemon's caches
+            report("daemon", [invoke(env, *run_args) for _ in range(args.runs)])
+        finally:
+            invoke(env, "--daemon", "stop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Project memory: tool calls of a task repeated in the same repository.
+
+"Run the project's checks" is played through ``Agent.run`` by a scripted
+model, several times in one workspace, each run with a fresh agent as in
+separate CLI invocations. Without a remembered fact the model explores
+(lists the files, reads the README and the Makefile), runs the check
+target, and remembers the command keyed to the Makefile; when the
+system prompt already holds the fact, it runs the command directly.
+Reports tool calls per run with memory off and on. The Makefile's target
+is then renamed: the fact must expire, and the next run must explore
+again and find the new target.
+
+    uv run python benchmarks/bench_memory.py
+"""
+
+import asyncio
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+
+RUNS = 4
+TASK = "Run the project's checks and report the result."
+
+
+class Explorer(BaseLLM):
+    """Explores until it knows the check command, unless the system prompt remembers it."""
+
+    def __init__(self):
+        super().__init__(api_key="", model="scripted")
+
+    async def chat(self, messages: list[Message], system_prompt: Optional[str] = None, tools: Optional[dict[str, Any]] = None) -> LLMResponse:
+        results = [m.content for m in messages if m.content.startswith("Tool '")]
+        remembered = re.search(r"Checks: `([^`]+)`", system_prompt or "")
+        explore = [
+            ToolCall(name="glob", arguments={"pattern": "*"}),
+            ToolCall(name="read", arguments={"path": "README.md"}),
+            ToolCall(name="read", arguments={"path": "Makefile"}),
+        ]
+        if remembered:
+            explore = []
+        if len(results) < len(explore):
+            return LLMResponse(tool_calls=[explore[len(results)]], stop_reason="tool_use")
+        if remembered:
+            command = remembered.group(1)
+        else:
+            command = "make " + re.search(r"^(\w+):", results[2].split(" result: ", 1)[1], re.MULTILINE).group(1)
+        if len(results) == len(explore):
+            return LLMResponse(tool_calls=[ToolCall(name="bash", arguments={"command": command})], stop_reason="tool_use")
+        if not remembered and len(results) == len(explore) + 1:
+            fact = ToolCall(name="remember", arguments={"fact": f"Checks: `{command}` (prints the pass count)", "files": ["Makefile"]})
+            return LLMResponse(tool_calls=[fact], stop_reason="tool_use")
+        return LLMResponse(content=results[len(explore)].split(" result: ", 1)[1].strip(), stop_reason="end_turn")
+
+
+async def run_once(workspace: str, memory: bool) -> tuple[int, str]:
+    agent = Agent(llm=Explorer(), workspace=workspace, memory=memory)
+    result = await agent.run(TASK)
+    await agent.close()
+    return len(result.tool_executions), result.response
+
+
+async def main() -> int:
+    failed = False
+    for memory in (False, True):
+        with tempfile.TemporaryDirectory() as workspace:
+            root = Path(workspace)
+            (root / "README.md").write_text("# demo\n\nSee the Makefile for development tasks.\n")
+            (root / "Makefile").write_text("check:\n\t@echo 12 passed\n")
+            calls = []
+            for _ in range(RUNS):
+                count, response = await run_once(workspace, memory)
+                calls.append(count)
+                failed |= response != "12 passed"
+            label = "memory on " if memory else "memory off"
+            print(f"{label}  tool calls per run: {' '.join(f'{c:2}' for c in calls)}   total {sum(calls):3}")
+
+            if memory:
+                (root / "Makefile").write_text("verify:\n\t@echo 13 passed\n")
+                count, response = await run_once(workspace, memory)
+                again, _ = await run_once(workspace, memory)
+                print(f"Makefile changed: the fact expired, {count} tool calls to rediscover, then {again}")
+                failed |= response != "13 passed" or again >= count
+    if failed:
+        print("FAIL: a run did not report the checks' result")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
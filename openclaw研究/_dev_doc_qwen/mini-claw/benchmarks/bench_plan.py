@@ -0,0 +1,104 @@
+"""Programmatic tool calling: one run_plan call versus a turn per step.
+
+The task "find the TODOs in the package" is played twice through
+``Agent.run`` by scripted models. The stepwise one globs, then reads each
+file in its own turn, then answers; the planning one submits a single
+``run_plan`` (glob, read each match, filter) and then answers. Reports
+turns, the input tokens each approach would send (history characters / 4,
+summed over calls), and wall time. Both must find the same TODOs.
+
+    uv run python benchmarks/bench_plan.py
+"""
+
+import asyncio
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+
+FILES = 12
+PLAN = [
+    {"name": "files", "tool": "glob", "args": {"pattern": "pkg/*.py"}, "show": False},
+    {"tool": "read", "for_each": "files", "args": {"path": "{item}"}, "filter": "TODO"},
+]
+
+
+def _estimate_tokens(messages: list[Message], system_prompt: Optional[str]) -> int:
+    return (len(system_prompt or "") + sum(len(m.content) for m in messages)) // 4
+
+
+def _todos(messages: list[Message]) -> list[str]:
+    return sorted(set(re.findall(r"TODO\(\d+\)", "\n".join(m.content for m in messages if m.role == "user"))))
+
+
+class Stepwise(BaseLLM):
+    """Globs, then reads one file per turn, then answers."""
+
+    def __init__(self):
+        super().__init__(api_key="", model="scripted")
+        self.input_tokens = 0
+
+    async def chat(self, messages: list[Message], system_prompt: Optional[str] = None, tools: Optional[dict[str, Any]] = None) -> LLMResponse:
+        self.input_tokens += _estimate_tokens(messages, system_prompt)
+        results = [m.content for m in messages if m.content.startswith("Tool '")]
+        if not results:
+            return LLMResponse(tool_calls=[ToolCall(name="glob", arguments={"pattern": "pkg/*.py"})], stop_reason="tool_use")
+        paths = results[0].split(" result: ", 1)[1].splitlines()
+        if len(results) - 1 < len(paths):
+            return LLMResponse(tool_calls=[ToolCall(name="read", arguments={"path": paths[len(results) - 1]})], stop_reason="tool_use")
+        return LLMResponse(content=" ".join(_todos(messages)), stop_reason="end_turn")
+
+
+class Planning(BaseLLM):
+    """Submits the whole chain as one plan, then answers."""
+
+    def __init__(self):
+        super().__init__(api_key="", model="scripted")
+        self.input_tokens = 0
+
+    async def chat(self, messages: list[Message], system_prompt: Optional[str] = None, tools: Optional[dict[str, Any]] = None) -> LLMResponse:
+        self.input_tokens += _estimate_tokens(messages, system_prompt)
+        if not any(m.content.startswith("Tool '") for m in messages):
+            return LLMResponse(tool_calls=[ToolCall(name="run_plan", arguments={"steps": PLAN})], stop_reason="tool_use")
+        return LLMResponse(content=" ".join(_todos(messages)), stop_reason="end_turn")
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as workspace:
+        package = Path(workspace) / "pkg"
+        package.mkdir()
+        for i in range(FILES):
+            lines = [f"def f{j}():\n    return {j}" for j in range(60)]
+            lines.insert(30, f"# TODO({i}) handle the empty case")
+            (package / f"mod{i}.py").write_text("\n".join(lines) + "\n")
+
+        answers = {}
+        for label, llm in (("one turn per step", Stepwise()), ("run_plan", Planning())):
+            agent = Agent(llm=llm, workspace=workspace, max_turns=FILES + 5)
+            start = time.perf_counter()
+            result = await agent.run("List the TODOs in pkg/")
+            elapsed = time.perf_counter() - start
+            await agent.close()
+            answers[label] = result.response
+            print(
+                f"{label:18} turns={result.turns:3}  tool calls={len(result.tool_executions):3}  "
+                f"input tokens~{llm.input_tokens:7,}  {elapsed * 1000:6.1f} ms"
+            )
+
+    expected = " ".join(sorted(f"TODO({i})" for i in range(FILES)))
+    if any(sorted(answer.split()) != sorted(expected.split()) for answer in answers.values()):
+        print(f"FAIL: answers differ: {answers}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
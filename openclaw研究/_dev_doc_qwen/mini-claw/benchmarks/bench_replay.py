@@ -0,0 +1,140 @@
+"""Offline benchmark of a full agent run replayed from a cassette.
+
+Record a run once against the real provider:
+
+    uv run mini-claw --record run.jsonl -w /path/to/fixture "fix the failing test"
+
+then replay it any number of times without network access:
+
+    uv run python benchmarks/bench_replay.py run.jsonl "fix the failing test" -w /path/to/fixture
+
+Tool results are part of each request, so the workspace must start in the
+same state as when recording: it is copied to a scratch directory for
+every run. The report splits wall time into LLM time (the recorded
+latency, or zero) and the agent's own time (tools plus overhead).
+
+Without arguments, a scripted run is recorded and replayed as a demo.
+"""
+
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.cassette import RECORD, REPLAY, CassetteLLM
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+
+class TimedLLM(BaseLLM):
+    """Wraps an LLM and adds up the time spent waiting for it."""
+
+    def __init__(self, llm: BaseLLM):
+        super().__init__(api_key="", model=llm.model)
+        self.llm = llm
+        self.seconds = 0.0
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            return await self.llm.chat(messages, system_prompt=system_prompt, tools=tools)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class SlowScriptedLLM(BaseLLM):
+    """Demo provider: fixed responses after a fixed delay."""
+
+    def __init__(self, responses: list[LLMResponse], delay: float):
+        super().__init__(api_key="", model="scripted")
+        self.responses = responses
+        self.delay = delay
+        self.calls = 0
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        await asyncio.sleep(self.delay)
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return response
+
+
+async def run_once(llm: BaseLLM, message: str, fixture: Optional[Path]) -> tuple[float, float, int]:
+    """Run the agent in a scratch copy of the fixture; return (wall, llm, tool calls)."""
+    with tempfile.TemporaryDirectory() as scratch:
+        workspace = Path(scratch) / "workspace"
+        if fixture:
+            shutil.copytree(fixture, workspace, ignore=shutil.ignore_patterns(".mini-claw"))
+        else:
+            workspace.mkdir()
+        timed = TimedLLM(llm)
+        if isinstance(llm, CassetteLLM):
+            llm.workspace = str(workspace.resolve())
+        agent = Agent(llm=timed, workspace=str(workspace))
+        start = time.perf_counter()
+        result = await agent.run(message)
+        wall = time.perf_counter() - start
+        await agent.close()
+        return wall, timed.seconds, len(result.tool_executions)
+
+
+async def demo(runs: int) -> None:
+    responses = [
+        LLMResponse(tool_calls=[ToolCall(name="write", arguments={"path": "a.txt", "content": "hello\n"})]),
+        LLMResponse(tool_calls=[ToolCall(name="bash", arguments={"command": "cat a.txt"})]),
+        LLMResponse(content="Done.", stop_reason="end_turn"),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = str(Path(tmp) / "demo.jsonl")
+        recorder = CassetteLLM(cassette, RECORD, llm=SlowScriptedLLM(responses, delay=0.2))
+        wall, llm_time, tools = await run_once(recorder, "write and check a file", None)
+        print(f"record:          {wall * 1000:8.1f} ms wall, {llm_time * 1000:8.1f} ms LLM, {tools} tool calls")
+        await replay(cassette, "write and check a file", None, runs, model="scripted")
+
+
+async def replay(cassette: str, message: str, fixture: Optional[Path], runs: int, model: str) -> None:
+    for latency in ("original", "zero"):
+        for i in range(runs):
+            llm = CassetteLLM(cassette, REPLAY, model=model, latency=latency)
+            wall, llm_time, tools = await run_once(llm, message, fixture)
+            print(
+                f"replay {latency:8} {wall * 1000:8.1f} ms wall, {llm_time * 1000:8.1f} ms LLM, "
+                f"{(wall - llm_time) * 1000:8.1f} ms agent, {tools} tool calls"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassette", nargs="?", help="Cassette recorded with --record")
+    parser.add_argument("message", nargs="?", help="The message the run was recorded with")
+    parser.add_argument("-w", "--workspace", help="Fixture workspace (copied for each run)")
+    parser.add_argument("-m", "--model", default="claude-sonnet-4-5-20250929", help="Model the run was recorded with")
+    parser.add_argument("-n", "--runs", type=int, default=3, help="Replays per latency mode")
+    args = parser.parse_args()
+
+    if not args.cassette:
+        asyncio.run(demo(args.runs))
+        return
+    if not args.message:
+        parser.error("message is required with a cassette")
+    fixture = Path(args.workspace) if args.workspace else None
+    asyncio.run(replay(args.cassette, args.message, fixture, args.runs, args.model))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Routing and failover between LLM backends, against local stand-in servers.
+
+Two stand-in servers speak just enough of each provider's API (Anthropic
+``/v1/messages`` and OpenAI ``/v1/chat/completions``) for the real SDK
+clients. A ``RouterLLM`` prefers the Anthropic one; the script then
+degrades it and reports where each phase's calls went:
+
+1. both healthy: all calls stay on the preferred backend;
+2. preferred backend overloaded (HTTP 529): calls fail over, its breaker
+   opens, and traffic moves to the OpenAI backend without further errors;
+3. recovered: after the breaker cooldown a probe succeeds and traffic
+   returns;
+4. preferred backend slow: once its median latency is clearly worse,
+   traffic moves to the faster backend.
+
+    uv run python benchmarks/bench_router.py
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.llm import Message, create_llm
+from miniclaw.retry import RetryPolicy
+from miniclaw.router import Backend, CircuitBreaker, RouterLLM
+
+
+class StandIn:
+    """A local HTTP server answering like one provider, with adjustable health."""
+
+    def __init__(self, api: str):
+        self.api = api  # "anthropic" or "openai"
+        self.latency = 0.02
+        self.status = 200
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                stand_in.requests += 1
+                time.sleep(stand_in.latency)
+                if stand_in.status != 200:
+                    body = {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+                    self._reply(stand_in.status, body)
+                else:
+                    self._reply(200, stand_in.answer(request))
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}" + ("/v1" if self.api == "openai" else "")
+
+    def answer(self, request: dict) -> dict:
+        text = f"{self.api} saw {len(request.get('messages', []))} message(s)"
+        if self.api == "anthropic":
+            return {
+                "id": "msg_1", "type": "message", "role": "assistant", "model": request.get("model"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+            }
+        return {
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+
+
+async def phase(router: RouterLLM, label: str, calls: int) -> None:
+    history: list[Message] = []
+    routed: Counter[str] = Counter()
+    failovers = 0
+    start = time.perf_counter()
+    for i in range(calls):
+        history.append(Message(role="user", content=f"turn {i}"))
+        before = {b.name: b.calls for b in router.backends}
+        response = await router.chat(history)
+        history.append(Message(role="assistant", content=response.content or ""))
+        failovers += (response.usage or {}).get("failovers", 0)
+        for backend in router.backends:
+            if backend.calls > before[backend.name] and backend.outcomes[-1]:
+                routed[backend.name] += 1
+    elapsed = time.perf_counter() - start
+    breakers = ", ".join(f"{b.name} {b.breaker.state}" for b in router.backends)
+    print(f"{label:30} {dict(routed)!s:40} failovers {failovers:2}  {elapsed * 1000:7.0f} ms  [{breakers}]")
+
+
+async def main() -> None:
+    anthropic, openai = StandIn("anthropic"), StandIn("openai")
+    openai.latency = 0.05
+    retry = RetryPolicy(max_attempts=1, attempt_timeout=10)
+    router = RouterLLM([
+        Backend(
+            "anthropic",
+            create_llm("anthropic", "test-key", "claude-stand-in", retry=retry, base_url=anthropic.base_url),
+            breaker=CircuitBreaker(cooldown=1.0),
+        ),
+        Backend(
+            "openai",
+            create_llm("openai", "test-key", "gpt-stand-in", retry=retry, base_url=openai.base_url),
+            breaker=CircuitBreaker(cooldown=1.0),
+        ),
+    ])
+
+    await phase(router, "1. healthy", 10)
+    anthropic.status = 529
+    await phase(router, "2. anthropic overloaded", 10)
+    anthropic.status = 200
+    await asyncio.sleep(1.1)
+    await phase(router, "3. recovered (after cooldown)", 10)
+    anthropic.latency = 0.25
+    await phase(router, "4. anthropic slow", 40)
+
+    print()
+    for name, stats in router.stats().items():
+        print(f"{name:10} {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
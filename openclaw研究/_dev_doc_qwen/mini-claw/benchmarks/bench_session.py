@@ -0,0 +1,71 @@
+"""Session resume: snapshot plus tail versus replaying the whole journal.
+
+Journals a long-lived session (several 1,000-message conversations
+separated by ``/clear``, synced every few messages like agent turns do),
+then resumes it twice: from the snapshot and the journal tail after it,
+and, with the snapshot removed, by replaying every journal entry. Both
+must rebuild the same history.
+
+    uv run python benchmarks/bench_session.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.llm import Message
+from miniclaw.session import SessionJournal
+
+
+CONVERSATIONS = 5
+MESSAGES = 1_000
+
+
+def resume(workspace: Path, session_id: str) -> tuple[float, list[Message]]:
+    start = time.perf_counter()
+    journal = SessionJournal.open(workspace, session_id)
+    elapsed = time.perf_counter() - start
+    messages = journal.messages
+    journal._file.close()
+    return elapsed, messages
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = Path(directory)
+        journal = SessionJournal.create(workspace)
+        start = time.perf_counter()
+        for conversation in range(CONVERSATIONS):
+            history: list[Message] = []
+            for i in range(MESSAGES):
+                role = "user" if i % 2 == 0 else "assistant"
+                history.append(Message(role=role, content=f"{conversation}/{i} " + "lorem ipsum " * 150))
+                if i % 4 == 3:
+                    journal.sync(history)
+            journal.sync(history)
+            if conversation < CONVERSATIONS - 1:
+                journal.sync([])  # /clear
+        # Left open, as after a crash: the tail since the last snapshot is replayed
+        journal._file.close()
+        journaling = time.perf_counter() - start
+        size = journal.path.stat().st_size
+
+        snapshot_seconds, from_snapshot = resume(workspace, journal.id)
+        journal.snapshot_path.unlink()
+        replay_seconds, from_journal = resume(workspace, journal.id)
+
+    print(f"journal: {CONVERSATIONS * MESSAGES} messages, {size / 1e6:.1f} MB, written in {journaling * 1000:.0f} ms")
+    print(f"resume from snapshot + tail   {snapshot_seconds * 1000:7.1f} ms  ({len(from_snapshot)} messages)")
+    print(f"resume by full replay         {replay_seconds * 1000:7.1f} ms  ({len(from_journal)} messages)")
+    same = [(m.role, m.content) for m in from_snapshot] == [(m.role, m.content) for m in from_journal]
+    if not same or len(from_snapshot) != MESSAGES:
+        print("FAIL: the two resumes rebuilt different histories")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Cold-start import budget for the CLI.
+
+Imports ``miniclaw.cli`` in fresh interpreters under ``python -X importtime``
+and fails (exit status 1) if
+
+- the best cumulative import time of ``miniclaw.cli`` exceeds the budget, or
+- a module that only some commands need was imported eagerly (provider
+  SDKs, prompt_toolkit, the agent and its tools, rich's Markdown/Live).
+
+    uv run python benchmarks/bench_startup.py
+    uv run python benchmarks/bench_startup.py --budget-ms 150 --runs 10
+
+The slowest modules are listed so a regression points at its cause.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Imported by the functions that need them, never at CLI import time
+LAZY_MODULES = (
+    "anthropic",
+    "openai",
+    "prompt_toolkit",
+    "rich.markdown",
+    "rich.live",
+    "miniclaw.agent",
+    "miniclaw.tools",
+    "miniclaw.llm",
+    "miniclaw.config",
+)
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Import a module in a fresh interpreter; return {name: (self µs, cumulative µs)}."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{proc.stderr}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def help_wall_time() -> float:
+    """Wall time of ``mini-claw --help`` in a fresh interpreter, in seconds."""
+    code = "import sys; sys.argv = ['mini-claw', '--help']; from miniclaw.cli import main; main()"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], capture_output=True, cwd=ROOT)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="Max cumulative import time of miniclaw.cli")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to try (the best run counts)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    runs = [import_times("miniclaw.cli") for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["miniclaw.cli"][1])
+    total_ms = best["miniclaw.cli"][1] / 1000
+
+    print(f"import miniclaw.cli: {total_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print(f"mini-claw --help:    {help_wall_time() * 1000:.1f} ms wall, including interpreter start")
+    print(f"\nSlowest modules (self time):")
+    for name, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    eager = [name for name in LAZY_MODULES if name in best]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if not failures:
+        print("\nOK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Parallel sub-agents: wall-clock time of a decomposable task against K.
+
+A task with independent parts ("add a docstring to each of the 8
+modules") is played through ``Agent.run`` by scripted models whose calls
+take a fixed latency. One agent working alone reads and edits each module
+in turn; with ``delegate``, the parent hands one module to each child
+agent, the children run K at a time in their own git worktrees, and
+their diffs are merged back. Reports wall time for each K (worktree
+setup, diffs and merging included); every variant must leave the
+workspace with the same content.
+
+    uv run python benchmarks/bench_subagents.py
+"""
+
+import asyncio
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+from miniclaw.subagents import SubAgentPool
+
+
+MODULES = 8
+LATENCY = 0.25  # Seconds per LLM call
+
+
+def _edit(path: str) -> ToolCall:
+    return ToolCall(name="edit", arguments={
+        "path": path,
+        "old_text": "def run():",
+        "new_text": f'"""{path}: entry point."""\n\n\ndef run():',
+    })
+
+
+class Scripted(BaseLLM):
+    """Reads, then edits, each module named in the task, then answers; delegates if told to."""
+
+    def __init__(self, delegate: bool = False):
+        super().__init__(api_key="", model="scripted")
+        self.delegate = delegate
+
+    async def chat(self, messages: list[Message], system_prompt: Optional[str] = None, tools: Optional[dict[str, Any]] = None) -> LLMResponse:
+        await asyncio.sleep(LATENCY)
+        task = messages[0].content
+        done = [m.content for m in messages if m.content.startswith("Tool '")]
+        if self.delegate and "Delegate" in task:
+            if done:
+                return LLMResponse(content="All modules documented.", stop_reason="end_turn")
+            tasks = [{"task": f"Add a module docstring to pkg/mod{i}.py"} for i in range(MODULES)]
+            return LLMResponse(tool_calls=[ToolCall(name="delegate", arguments={"tasks": tasks})], stop_reason="tool_use")
+        paths = sorted(set(re.findall(r"pkg/mod\d+\.py", task)), key=lambda p: int(re.search(r"\d+", p).group(0)))
+        if len(done) < 2 * len(paths):
+            path = paths[len(done) // 2]
+            if len(done) % 2 == 0:
+                return LLMResponse(tool_calls=[ToolCall(name="read", arguments={"path": path})], stop_reason="tool_use")
+            return LLMResponse(tool_calls=[_edit(path)], stop_reason="tool_use")
+        return LLMResponse(content="Done.", stop_reason="end_turn")
+
+
+def make_repo(directory: Path) -> None:
+    package = directory / "pkg"
+    package.mkdir()
+    for i in range(MODULES):
+        body = "\n".join(f"CONSTANT_{j} = {j}" for j in range(200))
+        (package / f"mod{i}.py").write_text(f"{body}\n\n\ndef run():\n    return {i}\n")
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+    subprocess.run(["git", "init", "-q"], cwd=directory, check=True)
+    subprocess.run(git + ["add", "-A"], cwd=directory, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "init"], cwd=directory, check=True)
+
+
+def contents(directory: Path) -> dict[str, str]:
+    return {p.name: p.read_text() for p in sorted((directory / "pkg").glob("*.py"))}
+
+
+async def run(jobs: Optional[int]) -> tuple[float, dict[str, str], str]:
+    with tempfile.TemporaryDirectory() as workspace:
+        make_repo(Path(workspace))
+        if jobs is None:
+            agent = Agent(llm=Scripted(), workspace=workspace, max_turns=2 * MODULES + 2)
+            message = "Add a module docstring to " + ", ".join(f"pkg/mod{i}.py" for i in range(MODULES))
+        else:
+            llm = Scripted(delegate=True)
+            agent = Agent(llm=llm, workspace=workspace)
+            agent.context.subagents = SubAgentPool(lambda path: Agent(llm=llm, workspace=path), jobs=jobs)
+            message = "Delegate: add a module docstring to each module in pkg/"
+        start = time.perf_counter()
+        result = await agent.run(message)
+        elapsed = time.perf_counter() - start
+        await agent.close()
+        report = result.tool_executions[0].result.output if jobs is not None else ""
+        return elapsed, contents(Path(workspace)), report
+
+
+async def main() -> int:
+    single, expected, _ = await run(None)
+    print(f"one agent, {MODULES} modules in turn      {single:6.2f} s")
+    failed = False
+    for jobs in (1, 2, 4, 8):
+        elapsed, result, report = await run(jobs)
+        print(f"delegate to {MODULES} children, K={jobs}     {elapsed:6.2f} s  ({single / elapsed:.1f}x)")
+        if result != expected or report.count("Changes: merged") != MODULES:
+            print(f"FAIL: K={jobs} left the workspace different from the single agent\n{report}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
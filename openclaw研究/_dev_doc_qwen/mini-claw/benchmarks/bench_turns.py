@@ -0,0 +1,153 @@
+"""Regression benchmark: LLM turns per task.
+
+Replays scripted provider responses through ``Agent.run`` and reports how
+many turns each task took. A task that needs N model responses must finish
+in exactly N turns: extra turns are paid for at full price, and stopping
+early truncates the answer.
+
+Usage:
+    uv run python benchmarks/bench_turns.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from miniclaw.agent import Agent
+from miniclaw.llm import BaseLLM, LLMResponse, Message, ToolCall
+
+
+class ScriptedLLM(BaseLLM):
+    """LLM stand-in that returns a fixed sequence of responses."""
+    
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__(api_key="", model="scripted")
+        self.responses = responses
+        self.calls = 0
+    
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return response
+
+
+def _usage() -> dict[str, int]:
+    return {"input_tokens": 100, "output_tokens": 20}
+
+
+def _tool(name: str, **arguments: Any) -> LLMResponse:
+    return LLMResponse(
+        tool_calls=[ToolCall(name=name, arguments=arguments)],
+        usage=_usage(),
+        stop_reason="tool_use",
+    )
+
+
+def _text(content: str, stop_reason: str = "end_turn") -> LLMResponse:
+    return LLMResponse(content=content, usage=_usage(), stop_reason=stop_reason)
+
+
+# (name, scripted responses, expected turns)
+TASKS: list[tuple[str, list[LLMResponse], int]] = [
+    (
+        "short answer",
+        [_text("Done.")],
+        1,
+    ),
+    (
+        "answer ending in a question",
+        [_tool("glob", pattern="*.py"), _text("Found 3 files. Do you want me to open one of them?")],
+        2,
+    ),
+    (
+        "answer phrased as 'Let me ...'",
+        [_tool("glob", pattern="*.md"), _text("Let me summarize: the README describes installation and usage.")],
+        2,
+    ),
+    (
+        "narration alongside tool calls",
+        [
+            LLMResponse(
+                content="I'll look at the files first.",
+                tool_calls=[ToolCall(name="glob", arguments={"pattern": "*"})],
+                usage=_usage(),
+                stop_reason="tool_use",
+            ),
+            _tool("glob", pattern="*.toml"),
+            _text("The project is configured with pyproject.toml."),
+        ],
+        3,
+    ),
+    (
+        "truncated output is continued",
+        [_text("The first half of a long answer ", stop_reason="max_tokens"), _text(" and the rest.")],
+        2,
+    ),
+    (
+        "truncated tool call is not run",
+        [
+            LLMResponse(
+                tool_calls=[ToolCall(name="glob", arguments={})],
+                usage=_usage(),
+                stop_reason="max_tokens",
+            ),
+            _text("Done."),
+        ],
+        2,
+    ),
+]
+
+# Final responses some tasks must produce, by task name
+RESPONSES = {
+    "truncated output is continued": "The first half of a long answer and the rest.",
+}
+
+# Tool calls some tasks must run, by task name
+TOOL_CALLS = {
+    "truncated tool call is not run": 0,
+}
+
+
+async def main() -> int:
+    failures = 0
+    total_turns = 0
+    
+    for name, responses, expected in TASKS:
+        llm = ScriptedLLM(responses)
+        agent = Agent(llm=llm, workspace=str(Path(__file__).resolve().parent), max_turns=10)
+        
+        start = time.perf_counter()
+        result = await agent.run(name)
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        total_turns += result.turns
+        ok = (
+            result.turns == expected
+            and RESPONSES.get(name, result.response) == result.response
+            and TOOL_CALLS.get(name, len(result.tool_executions)) == len(result.tool_executions)
+        )
+        status = "ok" if ok else "FAIL"
+        if not ok:
+            failures += 1
+        tokens = result.usage or {}
+        print(
+            f"{status:4} {name:34} turns={result.turns} (expected {expected}) "
+            f"stop={result.stop_reason} tokens={tokens.get('input_tokens', 0)}/{tokens.get('output_tokens', 0)} "
+            f"{elapsed:.1f}ms"
+        )
+    
+    print(f"\n{len(TASKS)} tasks, {total_turns} turns, {failures} regression(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,11 +1,39 @@
 """Mini-Claw AI Agent - Core agent loop implementation."""
 
 import asyncio
+import time
 from pathlib import Path
 from typing import Optional, Any
 
-from .llm import BaseLLM, Message, ToolCall, LLMResponse, create_llm
-from .tools import TOOLS, ToolResult, get_tool_descriptions
+from .budget import INTERRUPTED, Budget, BudgetExhausted, BudgetMeter
+from .events import (
+    EventBus,
+    LLMRequested,
+    LLMResponded,
+    RunFinished,
+    RunStarted,
+    ToolFinished,
+    ToolStarted,
+    TurnFinished,
+    TurnStarted,
+)
+from .llm import BaseLLM, Message, ToolCall, LLMResponse, STOP_MAX_TOKENS, add_usage, create_llm
+from .memory import ProjectMemory
+from .tools import (
+    DEFAULT_OUTPUT_MAX_LINES,
+    ToolContext,
+    ToolResult,
+    accepts_context,
+    available_tools,
+    get_tool_descriptions,
+)
+
+
+# Sent back when a response hit max_tokens while calling tools
+TRUNCATED_TOOL_CALLS = (
+    "Your last message was cut off by the output limit before its tool calls were complete, "
+    "so none of them were run. Call them again, splitting large content over several calls."
+)
 
 
 class Agent:
@@ -21,6 +49,12 @@ class Agent:
         workspace: Optional[str] = None,
         system_prompt: Optional[str] = None,
         max_turns: int = 10,
+        output_limits: Optional[dict[str, int]] = None,
+        output_max_lines: int = DEFAULT_OUTPUT_MAX_LINES,
+        persistent_shell: bool = False,
+        memory: bool = True,
+        env: Optional[dict[str, str]] = None,
+        umask: Optional[int] = None,
     ):
         """Initialize the agent.
         
@@ -29,26 +63,84 @@ class Agent:
             workspace: Workspace directory for file operations
             system_prompt: Optional custom system prompt
             max_turns: Maximum conversation turns per run
+            output_limits: Per-tool character budgets for outputs kept in history
+            output_max_lines: Line budget for any single tool output
+            persistent_shell: Run bash commands in one long-lived shell session
+            memory: Show facts remembered in earlier runs, and save new ones
+            env: Environment of commands run by tools (default: this process's)
+            umask: File mode creation mask of those commands (default: this process's)
         """
         self.llm = llm
         self.workspace = Path(workspace).resolve() if workspace else Path.cwd()
         self.max_turns = max_turns
         
-        # Default system prompt
-        self.system_prompt = system_prompt or self._build_system_prompt()
+        # State shared with tools (output budgets, paging store)
+        self.context = ToolContext(
+            str(self.workspace),
+            output_limits=output_limits,
+            output_max_lines=output_max_lines,
+        )
+        self.context.env = env
+        self.context.umask = umask
+        if persistent_shell:
+            # POSIX-only, so imported only when asked for
+            from .shell import ShellSession
+            
+            self.context.shell = ShellSession(str(self.workspace), env=env, umask=umask)
+        
+        # Facts from earlier runs in this workspace, for the system prompt
+        self.memory = ProjectMemory.load(self.workspace) if memory else None
+        self.context.memory = self.memory
+        # Shown as loaded, so the system prompt stays the same for the agent's life
+        self._memory_section = self.memory.prompt_section() if self.memory else ""
+        
+        # Custom system prompt; the default one lists the tools this agent has
+        self._system_prompt = system_prompt
+        self._default_prompt: Optional[tuple[tuple[str, ...], str]] = None
         
         # Conversation history
         self.history: list[Message] = []
         
         # Current turn counter
         self._turn_count = 0
+        
+        # Progress events for the CLI, tracing and other subscribers
+        self.events = EventBus()
+        
+        # Limits of each run, unless run() is given others
+        self.budget = Budget()
+        self._meter = BudgetMeter()
+        self._step: Optional[asyncio.Future] = None
+        self._stop_requested = False
+    
+    @property
+    def tools(self) -> dict[str, Any]:
+        """Tools this agent offers the model, given its context (see ``available_tools``)."""
+        return available_tools(self.context)
+    
+    @property
+    def system_prompt(self) -> str:
+        """The custom system prompt, or the default one for the agent's current tools."""
+        if self._system_prompt:
+            return self._system_prompt
+        names = tuple(self.tools)
+        if self._default_prompt is None or self._default_prompt[0] != names:
+            self._default_prompt = (names, self._build_system_prompt(names))
+        return self._default_prompt[1]
     
-    def _build_system_prompt(self) -> str:
+    @system_prompt.setter
+    def system_prompt(self, value: Optional[str]) -> None:
+        self._system_prompt = value
+    
+    def _build_system_prompt(self, tool_names: tuple[str, ...]) -> str:
         """Build the default system prompt."""
+        memory = self._memory_section
+        if memory:
+            memory = f"\n\n{memory}"
         return f"""You are Mini-Claw, a helpful AI coding assistant.
 You work in the directory: {self.workspace}
 
-{get_tool_descriptions()}
+{get_tool_descriptions(tool_names)}
 
 Guidelines:
 - Always read files before editing them
@@ -57,72 +149,210 @@ Guidelines:
 - Explain what you're doing before doing it
 - Use tools one at a time, waiting for results before proceeding
 
-When you've completed the task, provide a summary of what was done."""
+When you've completed the task, provide a summary of what was done.{memory}"""
     
-    async def run(self, user_message: str) -> AgentResult:
+    async def run(self, user_message: str, budget: Optional[Budget] = None) -> AgentResult:
         """Run the agent with a user message.
         
         Args:
             user_message: The user's request
+            budget: Limits of this run (default: ``self.budget``)
         
         Returns:
-            AgentResult with final response and tool execution history
+            AgentResult with final response and tool execution history;
+            a partial one, with ``exhausted`` set, if a budget ran out or
+            the run was stopped
+        """
+        await self.events.emit(RunStarted(user_message))
+        result: Optional[AgentResult] = None
+        error: Optional[str] = None
+        try:
+            result = await self._run(user_message, budget if budget is not None else self.budget)
+            return result
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if self.memory is not None:
+                # Only a run the model brought to an end vouches for what it remembered
+                self.memory.end_run(commit=bool(result and not result.exhausted and result.stop_reason != "max_turns"))
+            await self.events.emit(RunFinished(
+                turns=self._turn_count,
+                stop_reason=result.stop_reason if result else None,
+                usage=result.usage if result else None,
+                error=error,
+            ))
+    
+    def stop(self) -> None:
+        """Stop the current run: its LLM or tool call in flight is cancelled.
+        
+        The run returns a partial result with ``exhausted`` set to
+        "interrupted". Safe to call from a signal handler.
         """
+        self._stop_requested = True
+        if self._step and not self._step.done():
+            self._step.cancel()
+    
+    async def _bounded(self, coro: Any, tool: bool = False) -> Any:
+        """Await an LLM or tool call as a task bounded by the run's budget.
+        
+        Raises:
+            BudgetExhausted: If a budget ran out (before or during the call)
+                or the run was stopped; the call is cancelled
+        """
+        reason = INTERRUPTED if self._stop_requested else self._meter.exhausted()
+        if reason:
+            coro.close()
+            raise BudgetExhausted(reason)
+        timeout, reason = self._meter.time_left(tool)
+        task = asyncio.ensure_future(coro)
+        self._step = task
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            self._step = None
+            if not task.done():
+                # Out of time, or this run itself was cancelled
+                task.cancel()
+                await asyncio.wait({task})
+        if task.cancelled():
+            raise BudgetExhausted(INTERRUPTED if self._stop_requested else reason)
+        return task.result()
+    
+    async def _run(self, user_message: str, budget: Budget) -> AgentResult:
+        """The agent loop behind ``run``."""
         self._turn_count = 0
+        self._meter = BudgetMeter(budget)
+        self._stop_requested = False
         tool_executions: list[ToolExecution] = []
+        usage: dict[str, int] = {}
+        stop_reason: Optional[str] = None
+        # Fragments of an answer cut off by max_tokens, continued turn by turn
+        continued: list[str] = []
+        
+        # Files changed during this run can be restored with undo
+        self.context.checkpoints.begin(label=user_message.strip().split("\n", 1)[0][:60])
+        # Turn numbers restart, so earlier "unchanged since turn N" references would be ambiguous
+        self.context.files.forget_seen()
         
         # Add user message to history
+        run_start = len(self.history)
         self.history.append(Message(role="user", content=user_message))
         
-        while self._turn_count < self.max_turns:
-            self._turn_count += 1
-            
-            # Get LLM response
-            response = await self.llm.chat(
-                messages=self.history,
-                system_prompt=self.system_prompt,
-                tools=TOOLS,
-            )
-            
-            # Process response
-            if response.tool_calls:
-                # Execute tools
-                for tool_call in response.tool_calls:
-                    execution = await self._execute_tool(tool_call)
-                    tool_executions.append(execution)
-                    
-                    # Add tool result to history
-                    self.history.append(Message(
-                        role="user",
-                        content=f"Tool '{tool_call.name}' result: {execution.result}",
+        try:
+            while self._turn_count < self.max_turns:
+                self._turn_count += 1
+                self.context.turn = self._turn_count
+                await self.events.emit(TurnStarted(self._turn_count))
+                
+                # Get LLM response
+                await self.events.emit(LLMRequested(self._turn_count, len(self.history)))
+                try:
+                    response = await self._bounded(self.llm.chat(
+                        messages=self.history,
+                        system_prompt=self.system_prompt,
+                        tools=self.tools,
                     ))
-            elif response.content:
-                # Assistant provided a text response
-                self.history.append(Message(role="assistant", content=response.content))
+                except BaseException as e:
+                    await self.events.emit(LLMResponded(self._turn_count, error=f"{type(e).__name__}: {e}"))
+                    await self.events.emit(TurnFinished(self._turn_count, None))
+                    raise
+                await self.events.emit(LLMResponded(
+                    self._turn_count,
+                    stop_reason=response.stop_reason,
+                    usage=response.usage,
+                    tool_calls=len(response.tool_calls),
+                ))
+                add_usage(usage, response.usage)
+                self._meter.add_usage(response.usage)
+                stop_reason = response.stop_reason
+                
+                content = response.content or ""
+                if stop_reason == STOP_MAX_TOKENS and not response.tool_calls:
+                    # Anthropic continues it as a prefill, which may not end in
+                    # whitespace; the continuation starts with whatever was cut
+                    content = content.rstrip()
+                if content:
+                    self.history.append(Message(role="assistant", content=content))
                 
-                # Check if this looks like a final response
-                if self._is_final_response(response.content):
+                # Process response
+                if response.tool_calls and stop_reason == STOP_MAX_TOKENS:
+                    # The last call's arguments are incomplete: run none of them
+                    continued = []
+                    self.history.append(Message(role="user", content=TRUNCATED_TOOL_CALLS))
+                    await self.events.emit(TurnFinished(self._turn_count, stop_reason))
+                elif response.tool_calls:
+                    continued = []
+                    # Execute tools
+                    for tool_call in response.tool_calls:
+                        try:
+                            execution = await self._execute_tool(tool_call)
+                        except BudgetExhausted as e:
+                            # Record the cancelled call so the history stays coherent
+                            execution = ToolExecution(
+                                name=tool_call.name,
+                                arguments=tool_call.arguments,
+                                result=ToolResult(success=False, output="", error=f"Cancelled: {e}"),
+                            )
+                            tool_executions.append(execution)
+                            self.history.append(Message(
+                                role="user",
+                                content=f"Tool '{tool_call.name}' result: {execution.result}",
+                            ))
+                            await self.events.emit(TurnFinished(self._turn_count, stop_reason))
+                            raise
+                        tool_executions.append(execution)
+                        
+                        # Add tool result to history
+                        self.history.append(Message(
+                            role="user",
+                            content=f"Tool '{tool_call.name}' result: {execution.result}",
+                        ))
+                    await self.events.emit(TurnFinished(self._turn_count, stop_reason))
+                elif stop_reason == STOP_MAX_TOKENS and content:
+                    # Output was cut off; the trailing assistant message lets
+                    # the model continue where it stopped on the next turn
+                    # (see CONTINUE_PROMPT in llm.py)
+                    continued.append(content)
+                    await self.events.emit(TurnFinished(self._turn_count, stop_reason))
+                    continue
+                else:
+                    # The model ended its turn without requesting tools
+                    await self.events.emit(TurnFinished(self._turn_count, stop_reason))
                     return AgentResult(
-                        response=response.content,
+                        response="".join(continued) + content,
                         tool_executions=tool_executions,
-                        usage=response.usage,
+                        usage=usage or None,
                         turns=self._turn_count,
+                        stop_reason=stop_reason,
                     )
-            else:
-                # Empty response, break the loop
-                break
+        except BudgetExhausted as e:
+            # Partial result: whatever the model said last in this run
+            said = [m.content for m in self.history[run_start:] if m.role == "assistant"]
+            return AgentResult(
+                response="".join(continued) if continued else said[-1] if said else "",
+                tool_executions=tool_executions,
+                usage=usage or None,
+                turns=self._turn_count,
+                stop_reason=INTERRUPTED if e.reason == INTERRUPTED else "budget_exhausted",
+                exhausted=e.reason,
+            )
         
-        # Return final response
-        final_content = self.history[-1].content if self.history else "No response"
+        # Turn limit reached
+        if continued:
+            final_content = "".join(continued)
+        else:
+            final_content = self.history[-1].content if self.history else "No response"
         return AgentResult(
             response=final_content,
             tool_executions=tool_executions,
-            usage=None,
+            usage=usage or None,
             turns=self._turn_count,
+            stop_reason="max_turns",
         )
     
     async def _execute_tool(self, tool_call: ToolCall) -> ToolExecution:
-        """Execute a tool call.
+        """Execute a tool call, reporting it on the event bus.
         
         Args:
             tool_call: The tool call to execute
@@ -130,58 +360,79 @@ When you've completed the task, provide a summary of what was done."""
         Returns:
             ToolExecution with result
         """
+        await self.events.emit(ToolStarted(self._turn_count, tool_call.name, tool_call.arguments))
+        execution: Optional[ToolExecution] = None
+        start = time.perf_counter()
+        try:
+            execution = await self._bounded(self._call_tool(tool_call), tool=True)
+            return execution
+        finally:
+            self._meter.tool_seconds += time.perf_counter() - start
+            result = execution.result if execution else None
+            await self.events.emit(ToolFinished(
+                self._turn_count,
+                tool_call.name,
+                success=bool(result and result.success),
+                output_chars=len(result.output) if result and result.output else 0,
+            ))
+    
+    async def _call_tool(self, tool_call: ToolCall) -> ToolExecution:
+        """Look up and run the tool named by a tool call."""
         tool_name = tool_call.name
         tool_args = tool_call.arguments
+        tools = self.tools
         
-        if tool_name not in TOOLS:
+        if tool_name not in tools:
             return ToolExecution(
                 name=tool_name,
                 arguments=tool_args,
                 result=ToolResult(success=False, output="", error=f"Unknown tool: {tool_name}"),
             )
         
-        tool_func = TOOLS[tool_name]
+        tool_func = tools[tool_name]
+        kwargs = dict(tool_args, cwd=str(self.workspace))
+        if accepts_context(tool_func):
+            kwargs["context"] = self.context
         
         try:
             # Execute the tool
             if asyncio.iscoroutinefunction(tool_func):
-                result = await tool_func(**tool_args, cwd=str(self.workspace))
+                result = await tool_func(**kwargs)
             else:
                 # Run sync function in executor to avoid blocking
                 loop = asyncio.get_event_loop()
                 result = await loop.run_in_executor(
                     None,
-                    lambda: tool_func(**tool_args, cwd=str(self.workspace)),
+                    lambda: tool_func(**kwargs),
                 )
         except Exception as e:
             result = ToolResult(success=False, output="", error=str(e))
         
+        # Keep history bounded; the full output stays pageable by handle
+        if result.output:
+            result.output = self.context.bound_output(tool_name, result.output)
+        
         return ToolExecution(
             name=tool_name,
             arguments=tool_args,
             result=result,
         )
     
-    def _is_final_response(self, content: str) -> bool:
-        """Check if the response looks final (not requesting more tool calls).
-        
-        This is a simple heuristic. A more sophisticated implementation
-        would analyze the content more carefully.
-        """
-        # If it contains tool call patterns, it's not final
-        if "I'll use" in content or "Let me " in content or "I need to" in content:
-            return False
-        
-        # If it's a reasonable length and doesn't look like it's asking for more
-        if len(content) > 50 and "?" not in content:
-            return True
-        
-        return False
-    
     def reset(self) -> None:
         """Reset the agent's conversation history."""
         self.history = []
         self._turn_count = 0
+        self.context.files.forget_seen()
+        self.context.snapshots.clear()
+    
+    async def close(self) -> None:
+        """Release resources held for tools (the shell session, checkpoint pre-images).
+        
+        Changes can no longer be undone once the agent is closed.
+        """
+        self.context.checkpoints.discard()
+        if self.context.shell:
+            await self.context.shell.close()
 
 
 class ToolExecution:
@@ -206,11 +457,15 @@ class AgentResult:
         tool_executions: list[ToolExecution],
         usage: Optional[dict[str, int]],
         turns: int,
+        stop_reason: Optional[str] = None,
+        exhausted: Optional[str] = None,
     ):
         self.response = response
         self.tool_executions = tool_executions
         self.usage = usage
         self.turns = turns
+        self.stop_reason = stop_reason
+        self.exhausted = exhausted  # Budget that ran out, or "interrupted"
     
     def __str__(self) -> str:
         return f"AgentResult(turns={self.turns}, tools={len(self.tool_executions)})"
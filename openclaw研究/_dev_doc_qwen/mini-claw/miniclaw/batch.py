@@ -0,0 +1,182 @@
+"""Headless batch runs of many tasks with bounded concurrency.
+
+Tasks come from a JSONL file, one per line::
+
+    {"id": "pkg-a", "message": "Migrate to the new logging API", "workspace": "packages/a"}
+
+``id`` defaults to the line number and ``workspace`` to ``<root>/<id>``;
+relative workspaces are resolved against the batch root. A task may also
+set ``max_turns``. Tasks run concurrently on one event loop and share a
+single provider LLM, so they also share its HTTP connection pool. Each
+task gets its own agent, and therefore its own history, caches and
+checkpoints. One JSON result line is written per task as soon as it
+finishes (in completion order)::
+
+    {"id": "pkg-a", "status": "ok", "seconds": 41.2, "llm_seconds": 35.0,
+     "tool_seconds": 5.1, "turns": 6, "tool_calls": 9, "usage": {...}, ...}
+
+``status`` is "ok", "error" or "timeout".
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO
+
+from .config import Config
+
+
+class BatchTask:
+    """One task of a batch."""
+
+    def __init__(self, id: str, message: str, workspace: Path, max_turns: Optional[int] = None):
+        self.id = id
+        self.message = message
+        self.workspace = workspace
+        self.max_turns = max_turns
+
+    def __repr__(self) -> str:
+        return f"BatchTask({self.id!r}, workspace={str(self.workspace)!r})"
+
+
+def load_tasks(path: str, root: Optional[str] = None) -> list[BatchTask]:
+    """Read tasks from a JSONL file.
+
+    Args:
+        path: Task file ("-" for stdin)
+        root: Directory task workspaces are relative to (default: current directory)
+
+    Returns:
+        The tasks in file order
+
+    Raises:
+        ValueError: If a line is not a task or two tasks share an id
+    """
+    import sys
+
+    base = Path(root or ".").resolve()
+    lines = sys.stdin.read().splitlines() if path == "-" else Path(path).read_text(encoding="utf-8").splitlines()
+    tasks: list[BatchTask] = []
+    seen: set[str] = set()
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON: {e}") from None
+        if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+            raise ValueError(f"Line {number}: a task needs a \"message\" string")
+        task_id = str(data.get("id", number))
+        if task_id in seen:
+            raise ValueError(f"Line {number}: duplicate task id {task_id!r}")
+        seen.add(task_id)
+        tasks.append(BatchTask(
+            id=task_id,
+            message=data["message"],
+            workspace=base / data.get("workspace", task_id),
+            max_turns=data.get("max_turns"),
+        ))
+    return tasks
+
+
+class BatchRunner:
+    """Runs tasks concurrently with one shared provider LLM."""
+
+    def __init__(
+        self,
+        config: Config,
+        jobs: int = 4,
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[dict[str, Any]], None]] = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            config: Configuration for the LLM and agents
+            jobs: Maximum number of tasks running at once
+            timeout: Per-task time limit in seconds
+            on_result: Called with each task's result as it finishes
+        """
+        from .cassette import REPLAY
+        from .cli import create_provider_llm
+
+        self.config = config
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.on_result = on_result
+        # One client for all tasks: one connection pool, no per-task setup
+        replaying = config.cassette and config.cassette_mode == REPLAY
+        self.llm = None if replaying else create_provider_llm(config)
+
+    async def run(self, tasks: list[BatchTask]) -> list[dict[str, Any]]:
+        """Run all tasks; returns their results in task order."""
+        semaphore = asyncio.Semaphore(self.jobs)
+
+        async def run_bounded(task: BatchTask) -> dict[str, Any]:
+            async with semaphore:
+                result = await self.run_task(task)
+            if self.on_result:
+                self.on_result(result)
+            return result
+
+        return list(await asyncio.gather(*(run_bounded(task) for task in tasks)))
+
+    async def run_task(self, task: BatchTask) -> dict[str, Any]:
+        """Run one task in its workspace and describe the outcome."""
+        from .cli import build_llm, create_agent
+        from .events import LLMResponded
+        from .llm import add_usage
+        from .trace import TraceExporter
+
+        task.workspace.mkdir(parents=True, exist_ok=True)
+        workspace = str(task.workspace)
+        agent = create_agent(self.config, build_llm(self.config, workspace, llm=self.llm), workspace, on_output=None)
+        if task.max_turns:
+            agent.max_turns = task.max_turns
+        exporter = TraceExporter()
+        exporter.attach(agent.events)
+        # Counted from events so that failed and timed-out tasks report usage too
+        usage: dict[str, int] = {}
+        agent.events.subscribe(lambda event: add_usage(usage, event.usage), (LLMResponded,))
+
+        record: dict[str, Any] = {"id": task.id, "workspace": workspace, "status": "ok"}
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(agent.run(task.message), self.timeout)
+            record.update(
+                response=result.response,
+                turns=result.turns,
+                stop_reason=result.stop_reason,
+                exhausted=result.exhausted,
+                tool_calls=len(result.tool_executions),
+                failed_tool_calls=sum(1 for e in result.tool_executions if not e.result.success),
+            )
+        except asyncio.TimeoutError:
+            record.update(status="timeout", error=f"Timed out after {self.timeout:g}s")
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        finally:
+            await agent.close()
+
+        times = exporter.summary()
+        record.update(
+            started=started,
+            seconds=round(time.perf_counter() - start, 3),
+            llm_seconds=round(times["llm"], 3),
+            tool_seconds=round(times["tool"], 3),
+            usage=usage or None,
+        )
+        record.setdefault("turns", agent._turn_count)
+        return record
+
+
+def write_result(out: TextIO) -> Callable[[dict[str, Any]], None]:
+    """A result callback writing JSONL to a stream, flushed per line."""
+    def write(result: dict[str, Any]) -> None:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+    return write
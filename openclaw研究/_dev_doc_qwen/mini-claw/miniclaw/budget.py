@@ -0,0 +1,105 @@
+"""Per-run budgets: wall-clock deadline, tokens and tool time.
+
+A ``Budget`` sets limits for one ``Agent.run``; a ``BudgetMeter`` tracks
+what the run has used. The agent runs every LLM call and tool call as a
+task bounded by the time the budget has left, and cancels it when that
+time runs out (or when the run is stopped, e.g. on Ctrl-C). Cancellation
+goes through asyncio, so in-flight HTTP requests are abandoned and tool
+subprocesses are killed with their process group. Token budgets can only
+be checked once a response reports its usage; a run stops before its
+next call once they are exceeded.
+
+The run then returns a partial ``AgentResult`` whose ``exhausted`` names
+the budget that ran out: "deadline", "input_tokens", "output_tokens",
+"tool_seconds", or "interrupted" for a stopped run.
+"""
+
+import time
+from typing import Callable, Optional
+
+
+DEADLINE = "deadline"
+INPUT_TOKENS = "input_tokens"
+OUTPUT_TOKENS = "output_tokens"
+TOOL_SECONDS = "tool_seconds"
+INTERRUPTED = "interrupted"
+
+
+class Budget:
+    """Limits for one agent run (None: unlimited)."""
+
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        max_input_tokens: Optional[int] = None,
+        max_output_tokens: Optional[int] = None,
+        max_tool_seconds: Optional[float] = None,
+    ):
+        """Initialize the budget.
+
+        Args:
+            deadline: Wall-clock seconds for the whole run
+            max_input_tokens: Input tokens summed over the run's LLM calls
+            max_output_tokens: Output tokens summed over the run's LLM calls
+            max_tool_seconds: Seconds spent running tools
+        """
+        self.deadline = deadline
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.max_tool_seconds = max_tool_seconds
+
+    def __bool__(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.deadline, self.max_input_tokens, self.max_output_tokens, self.max_tool_seconds)
+        )
+
+
+class BudgetExhausted(Exception):
+    """A run's budget ran out; ``reason`` names which one."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"{reason} budget exhausted" if reason != INTERRUPTED else "interrupted")
+        self.reason = reason
+
+
+class BudgetMeter:
+    """What one run has used of its budget."""
+
+    def __init__(self, budget: Optional[Budget] = None, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget or Budget()
+        self.clock = clock
+        self.started = clock()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_seconds = 0.0
+
+    def add_usage(self, usage: Optional[dict[str, int]]) -> None:
+        if usage:
+            self.input_tokens += usage.get("input_tokens") or 0
+            self.output_tokens += usage.get("output_tokens") or 0
+
+    def exhausted(self) -> Optional[str]:
+        """The first budget that has run out, if any."""
+        budget = self.budget
+        if budget.deadline is not None and self.clock() - self.started >= budget.deadline:
+            return DEADLINE
+        if budget.max_input_tokens is not None and self.input_tokens >= budget.max_input_tokens:
+            return INPUT_TOKENS
+        if budget.max_output_tokens is not None and self.output_tokens >= budget.max_output_tokens:
+            return OUTPUT_TOKENS
+        if budget.max_tool_seconds is not None and self.tool_seconds >= budget.max_tool_seconds:
+            return TOOL_SECONDS
+        return None
+
+    def time_left(self, tool: bool = False) -> tuple[Optional[float], Optional[str]]:
+        """Seconds the next LLM call (or tool call) may take, and the budget that bounds it."""
+        limits: list[tuple[float, str]] = []
+        if self.budget.deadline is not None:
+            limits.append((self.budget.deadline - (self.clock() - self.started), DEADLINE))
+        if tool and self.budget.max_tool_seconds is not None:
+            limits.append((self.budget.max_tool_seconds - self.tool_seconds, TOOL_SECONDS))
+        if not limits:
+            return None, None
+        seconds, reason = min(limits)
+        return max(seconds, 0.0), reason
@@ -0,0 +1,158 @@
+"""Cascading LLM calls between a small, fast model and a large one.
+
+Most agent turns are mechanical: after a file was read or a search came
+back, the next step is usually one more tool call. ``CascadeLLM`` sends
+those turns to a small model and keeps the large one for the turns that
+need it:
+
+- a turn that follows simple tool results (all succeeded, short enough)
+  goes to the small model first;
+- a turn that follows a user message (planning), a failed tool or a long
+  result, or that continues a cut-off answer goes to the large model;
+- the small model's response is only kept if it issues tool calls, and
+  every call names a known tool with valid arguments. A final answer, a
+  truncated response, an invalid call or a failed call (rate limit,
+  unknown model, timeout) escalates the turn to the large model, which
+  sees the same history.
+
+Each response's usage gains the per-tier split (``small_calls``,
+``large_calls``, ``escalations``, ``small_ms``, ``large_ms``, and
+``small_cost_musd``/``large_cost_musd`` in millionths of a dollar when
+the models' prices are known); the agent sums them per run like token
+counts. Tokens of escalated small-model calls are counted too: they were
+paid for.
+"""
+
+import time
+from typing import Any, Optional
+
+from .llm import STOP_MAX_TOKENS, BaseLLM, LLMResponse, Message, add_usage
+from .registry import check_arguments
+
+
+# USD per million input and output tokens, matched by model name prefix
+PRICES: dict[str, tuple[float, float]] = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-haiku-4": (1.0, 5.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1": (2.0, 8.0),
+}
+
+
+def price(model: str) -> Optional[tuple[float, float]]:
+    """Input and output price of a model, by longest matching prefix."""
+    matches = [prefix for prefix in PRICES if model.startswith(prefix)]
+    return PRICES[max(matches, key=len)] if matches else None
+
+
+def cost_musd(model: str, usage: Optional[dict[str, int]]) -> Optional[int]:
+    """Cost of a call in millionths of a dollar, if the model's price is known."""
+    prices = price(model)
+    if prices is None or not usage:
+        return None
+    return round(usage.get("input_tokens", 0) * prices[0] + usage.get("output_tokens", 0) * prices[1])
+
+
+def _is_tool_result(message: Message) -> bool:
+    return message.role == "user" and message.content.startswith("Tool '") and "' result: " in message.content
+
+
+def _failed(message: Message) -> bool:
+    result = message.content.split("' result: ", 1)[1]
+    return result.startswith("Error: ") or "\nError: " in result
+
+
+class CascadeLLM(BaseLLM):
+    """Routes simple turns to a small model, escalating to a large one."""
+
+    def __init__(self, small: BaseLLM, large: BaseLLM, simple_result_chars: int = 8_000):
+        """Initialize the cascade.
+
+        Args:
+            small: Fast, cheap model for tool-calling turns
+            large: Model for planning, final answers and escalations
+            simple_result_chars: Total size of the trailing tool results above
+                which a turn is not considered simple
+        """
+        super().__init__(large.api_key, large.model)
+        self.small = small
+        self.large = large
+        self.simple_result_chars = simple_result_chars
+        self.stats = {"small_calls": 0, "large_calls": 0, "escalations": 0}
+
+    def simple_turn(self, messages: list[Message]) -> bool:
+        """Whether the next turn only reacts to short, successful tool results."""
+        results: list[Message] = []
+        for message in reversed(messages):
+            if not _is_tool_result(message):
+                break
+            results.append(message)
+        if not results:
+            return False
+        if any(_failed(message) for message in results):
+            return False
+        return sum(len(message.content) for message in results) <= self.simple_result_chars
+
+    def acceptable(self, response: LLMResponse, tools: Optional[dict[str, Any]]) -> bool:
+        """Whether a small-model response can stand: complete, valid tool calls only."""
+        if not response.tool_calls or response.stop_reason == STOP_MAX_TOKENS:
+            return False
+        for call in response.tool_calls:
+            if tools is None or call.name not in tools:
+                return False
+            if check_arguments(call.name, tools[call.name], call.arguments) is not None:
+                return False
+        return True
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        """Send a chat request to the small model when the turn is simple, else to the large one."""
+        split: dict[str, int] = {}
+        if self.simple_turn(messages):
+            try:
+                response = await self._call("small", messages, system_prompt, tools, split)
+            except Exception:
+                # A small model that fails (rate limit, unknown model, timeout) escalates too
+                response = None
+            if response is not None and self.acceptable(response, tools):
+                return self._with_split(response, split)
+            self.stats["escalations"] += 1
+            split["escalations"] = 1
+        response = await self._call("large", messages, system_prompt, tools, split)
+        return self._with_split(response, split)
+
+    async def _call(
+        self,
+        tier: str,
+        messages: list[Message],
+        system_prompt: Optional[str],
+        tools: Optional[dict[str, Any]],
+        split: dict[str, int],
+    ) -> LLMResponse:
+        """One call to a tier, recording its latency, tokens and cost in ``split``."""
+        llm = self.small if tier == "small" else self.large
+        self.stats[f"{tier}_calls"] += 1
+        start = time.perf_counter()
+        try:
+            response = await llm.chat(messages, system_prompt=system_prompt, tools=tools)
+        finally:
+            # A failed call took time too
+            add_usage(split, {f"{tier}_calls": 1, f"{tier}_ms": round((time.perf_counter() - start) * 1000)})
+        cost = cost_musd(llm.model, response.usage)
+        if cost is not None:
+            add_usage(split, {f"{tier}_cost_musd": cost})
+        add_usage(split, response.usage)
+        return response
+
+    @staticmethod
+    def _with_split(response: LLMResponse, split: dict[str, int]) -> LLMResponse:
+        return response.model_copy(update={"usage": split})
@@ -0,0 +1,163 @@
+"""Record and replay LLM calls with JSONL cassettes.
+
+``CassetteLLM`` wraps another ``BaseLLM``. In record mode it forwards each
+``chat`` call and appends the response, with its latency, to a cassette
+file. In replay mode it answers from the cassette without touching the
+network, optionally sleeping for the recorded latency, so full agent runs
+can be benchmarked and profiled offline and deterministically.
+
+Each line of a cassette is one call::
+
+    {"key": "<sha256>", "latency": 1.92, "request": {...}, "response": {...}}
+
+The key hashes everything that determines the provider's answer: model,
+system prompt, messages and tool names. The workspace path is replaced by
+a placeholder first, so a run recorded in one checkout replays in a copy.
+Only a short summary of the request is stored, since histories repeat
+almost entirely from call to call. A request recorded several times (e.g.
+the same task run twice) is replayed in recorded order.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Optional
+
+from .llm import BaseLLM, LLMResponse, Message
+
+
+RECORD = "record"
+REPLAY = "replay"
+
+LATENCY_ORIGINAL = "original"
+LATENCY_ZERO = "zero"
+
+
+class CassetteMiss(Exception):
+    """A replayed request has no recorded response."""
+
+
+def request_key(
+    model: str,
+    messages: list[Message],
+    system_prompt: Optional[str],
+    tools: Optional[dict[str, Any]],
+    workspace: Optional[str] = None,
+) -> str:
+    """Stable hash of a chat request, independent of the workspace location."""
+    def normalize(text: str) -> str:
+        return text.replace(workspace, "<workspace>") if workspace else text
+    
+    payload = {
+        "model": model,
+        "system": normalize(system_prompt or ""),
+        "messages": [[m.role, normalize(m.content)] for m in messages],
+        "tools": sorted(tools or {}),
+    }
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded calls of one cassette file, indexed by request key."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: dict[str, deque[dict]] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def _add(self, entry: dict) -> None:
+        self._entries[entry["key"]].append(entry)
+        self._last[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def next(self, key: str) -> Optional[dict]:
+        """Next recorded entry for a key; the last one once all were used."""
+        entries = self._entries.get(key)
+        if entries:
+            return entries.popleft()
+        return self._last.get(key)
+
+    def append(self, entry: dict) -> None:
+        """Write an entry to the cassette file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+class CassetteLLM(BaseLLM):
+    """An LLM that records calls to, or replays them from, a cassette."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        llm: Optional[BaseLLM] = None,
+        model: Optional[str] = None,
+        latency: str = LATENCY_ZERO,
+        workspace: Optional[str] = None,
+    ):
+        """Initialize the cassette LLM.
+
+        Args:
+            path: Cassette file (JSONL)
+            mode: "record" to call the wrapped LLM and save, "replay" to serve saved calls
+            llm: The LLM to record (required for record mode)
+            model: Model name used in request keys (defaults to the wrapped LLM's)
+            latency: On replay, "original" sleeps for the recorded latency, "zero" does not
+            workspace: Workspace path to abstract from request keys
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == RECORD and llm is None:
+            raise ValueError("Record mode needs an LLM to record")
+        super().__init__(llm.api_key if llm else "", model or (llm.model if llm else ""))
+        self.llm = llm
+        self.mode = mode
+        self.latency = latency
+        self.workspace = str(Path(workspace).resolve()) if workspace else None
+        self.cassette = Cassette(path)
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        key = request_key(self.model, messages, system_prompt, tools, self.workspace)
+
+        if self.mode == REPLAY:
+            entry = self.cassette.next(key)
+            if entry is None:
+                raise CassetteMiss(
+                    f"No recorded response in {self.cassette.path} for this request "
+                    f"({len(messages)} messages); record it again"
+                )
+            if self.latency == LATENCY_ORIGINAL:
+                await asyncio.sleep(entry.get("latency", 0))
+            return LLMResponse.model_validate(entry["response"])
+
+        start = time.perf_counter()
+        response = await self.llm.chat(messages, system_prompt=system_prompt, tools=tools)
+        latency = time.perf_counter() - start
+        self.cassette.append({
+            "key": key,
+            "latency": round(latency, 4),
+            "request": {
+                "model": self.model,
+                "messages": len(messages),
+                "last": messages[-1].content[:200] if messages else "",
+            },
+            "response": response.model_dump(exclude_defaults=True),
+        })
+        return response
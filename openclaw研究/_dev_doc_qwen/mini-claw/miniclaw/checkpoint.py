@@ -0,0 +1,190 @@
+"""Workspace checkpoints that snapshot only the files the agent touches.
+
+Instead of copying the workspace, a checkpoint keeps the files'
+pre-images: the first time a file is written after a checkpoint begins,
+its current content is saved. Undoing a checkpoint puts those pre-images
+back (and removes files that did not exist), so both snapshot and restore
+cost scale with the number of changed files, not the size of the repo.
+
+Pre-images are reflinked (copy-on-write clones) where the filesystem
+supports it. Otherwise, when the writer is known to replace files
+atomically (as all mini-claw file tools do), the pre-image is a hardlink
+to the old inode, which the replace leaves untouched; in any other case
+the file is copied.
+
+Pre-images live only as long as the agent that recorded them: they are
+deleted when it closes, and those of a process that died without closing
+are pruned by the next store in the workspace.
+"""
+
+import itertools
+import os
+import secrets
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+
+# Directory (inside the workspace) holding mini-claw's per-project state
+STATE_DIR = ".mini-claw"
+
+_FICLONE = 0x40049409  # Linux ioctl: clone file extents (btrfs, xfs, ...)
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Clone src to dst copy-on-write; False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def ensure_state_dir(workspace: Path) -> Path:
+    """Create the workspace state directory, hidden from git."""
+    state = workspace / STATE_DIR
+    if not state.exists():
+        state.mkdir(parents=True, exist_ok=True)
+        (state / ".gitignore").write_text("*\n")
+    return state
+
+
+class Checkpoint:
+    """Pre-images recorded since one checkpoint began."""
+
+    def __init__(self, id: int, label: str, created_at: float):
+        self.id = id
+        self.label = label
+        self.created_at = created_at
+        # Relative path -> blob name holding the pre-image (None: file did not exist)
+        self.entries: dict[str, Optional[str]] = {}
+
+
+class CheckpointStore:
+    """Journal of file pre-images, grouped into checkpoints.
+
+    Storage is created lazily under ``<workspace>/.mini-claw/checkpoints``
+    the first time a file is recorded.
+    """
+
+    def __init__(self, workspace: str, session_id: Optional[str] = None):
+        self.workspace = Path(workspace).resolve()
+        # Unique per store: a daemon or batch process runs several agents at once
+        self.session_id = session_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{secrets.token_hex(2)}"
+        self.checkpoints: list[Checkpoint] = []
+        self._blob_ids = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._dir: Optional[Path] = None
+
+    @property
+    def directory(self) -> Path:
+        if self._dir is None:
+            root = ensure_state_dir(self.workspace) / "checkpoints"
+            _prune_orphans(root)
+            self._dir = root / self.session_id
+            (self._dir / "blobs").mkdir(parents=True, exist_ok=True)
+        return self._dir
+
+    def begin(self, label: str = "") -> Checkpoint:
+        """Start a new checkpoint; later writes are recorded against it.
+
+        An empty current checkpoint is relabelled instead of stacking a new one.
+        """
+        if self.checkpoints and not self.checkpoints[-1].entries:
+            checkpoint = self.checkpoints[-1]
+            checkpoint.label = label
+            checkpoint.created_at = time.time()
+            return checkpoint
+        checkpoint = Checkpoint(next(self._ids), label, time.time())
+        self.checkpoints.append(checkpoint)
+        return checkpoint
+
+    def record(self, path: Path, atomic_writer: bool = True) -> None:
+        """Save a file's pre-image before it is first modified in this checkpoint.
+
+        Args:
+            path: File about to be written or deleted
+            atomic_writer: The writer replaces the file rather than writing
+                in place, so a hardlink is a safe pre-image
+        """
+        if not self.checkpoints:
+            self.begin()
+        checkpoint = self.checkpoints[-1]
+        path = path.resolve()
+        try:
+            rel = path.relative_to(self.workspace).as_posix()
+        except ValueError:
+            return  # Outside the workspace, not ours to track
+        if rel in checkpoint.entries or rel.split("/", 1)[0] == STATE_DIR:
+            return
+
+        blob: Optional[str] = None
+        if path.is_file():
+            blob = f"{checkpoint.id}-{next(self._blob_ids)}"
+            blob_path = self.directory / "blobs" / blob
+            if not _reflink(path, blob_path):
+                try:
+                    if not atomic_writer:
+                        raise OSError("in-place writer")
+                    os.link(path, blob_path)
+                except OSError:
+                    shutil.copy2(path, blob_path)
+        checkpoint.entries[rel] = blob
+
+    def undo(self) -> Optional[Checkpoint]:
+        """Restore the files changed since the latest non-empty checkpoint.
+
+        Returns the checkpoint that was undone, or None if nothing to undo.
+        """
+        while self.checkpoints and not self.checkpoints[-1].entries:
+            self.checkpoints.pop()
+        if not self.checkpoints:
+            return None
+        checkpoint = self.checkpoints.pop()
+        for rel, blob in checkpoint.entries.items():
+            target = self.workspace / rel
+            if blob is None:
+                target.unlink(missing_ok=True)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            blob_path = self.directory / "blobs" / blob
+            try:
+                os.replace(blob_path, target)
+            except OSError:
+                # e.g. the target is on another filesystem
+                tmp = target.with_name(f".{target.name}.restore")
+                shutil.copy2(blob_path, tmp)
+                os.replace(tmp, target)
+                blob_path.unlink(missing_ok=True)
+        return checkpoint
+
+    def discard(self) -> None:
+        """Forget all checkpoints and delete their stored pre-images."""
+        self.checkpoints.clear()
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+def _prune_orphans(root: Path) -> None:
+    """Delete the pre-images of stores whose process is gone (it crashed or was killed)."""
+    if os.name != "posix" or not root.is_dir():
+        return  # Liveness is checked with kill(pid, 0)
+    for directory in root.iterdir():
+        parts = directory.name.split("-")
+        if len(parts) < 3 or not parts[2].isdigit():
+            continue
+        try:
+            os.kill(int(parts[2]), 0)
+        except ProcessLookupError:
+            shutil.rmtree(directory, ignore_errors=True)
+        except OSError:
+            pass  # Alive, but not ours to signal
@@ -1,23 +1,32 @@
-"""Command-line interface for Mini-Claw."""
+"""Command-line interface for Mini-Claw.
+
+Startup time matters for one-shot and scripted use, so only what every
+invocation needs is imported here. The agent, the provider SDKs, rich's
+Markdown/Live widgets and prompt_toolkit (interactive mode only) are
+imported by the functions that use them; ``benchmarks/bench_startup.py``
+keeps it that way. When a daemon is running (``--daemon start``), one-shot
+runs are sent to it and this module only renders the replies.
+"""
+
+from __future__ import annotations
 
-import asyncio
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.spinner import Spinner
-from rich.live import Live
 
-from .config import Config, ConfigManager
-from .llm import create_llm
-from .agent import Agent, AgentResult
-from .tools import ToolExecution
+if TYPE_CHECKING:
+    import argparse
+    import socket
+    from typing import Any, Callable
+    
+    from .agent import Agent, AgentResult, ToolExecution
+    from .config import Config
+    from .llm import BaseLLM
+    from .retry import RetryPolicy
+    from .session import SessionJournal
 
 
 console = Console()
@@ -25,6 +34,8 @@ console = Console()
 
 def print_welcome() -> None:
     """Print welcome message."""
+    from rich.panel import Panel
+    
     console.print(Panel.fit(
         "[bold blue]Mini-Claw[/bold blue] - Minimal AI Coding Assistant\n"
         f"[dim]Version 0.1.0 | Type /help for commands[/dim]",
@@ -39,7 +50,8 @@ def print_tool_execution(execution: ToolExecution) -> None:
     
     if execution.result.success:
         console.print(f"[dim]→ {execution.name}({args_str})[/dim]")
-        if execution.result.output and len(execution.result.output) < 500:
+        # bash output was already streamed while the command ran
+        if execution.name != "bash" and execution.result.output and len(execution.result.output) < 500:
             for line in execution.result.output.split("\n"):
                 console.print(f"  [dim]{line}[/dim]")
     else:
@@ -50,6 +62,8 @@ def print_tool_execution(execution: ToolExecution) -> None:
 
 def print_result(result: AgentResult) -> None:
     """Print agent result."""
+    from rich.markdown import Markdown
+    
     # Show tool executions
     if result.tool_executions:
         console.print(f"\n[dim]Executed {len(result.tool_executions)} tool(s):[/dim]")
@@ -60,31 +74,297 @@ def print_result(result: AgentResult) -> None:
     console.print()
     console.print(Markdown(result.response))
     
+    if getattr(result, "exhausted", None):
+        reason = "Interrupted" if result.exhausted == "interrupted" else f"Stopped: {result.exhausted} budget exhausted"
+        console.print(f"\n[yellow]{reason} after {result.turns} turn(s); the response above is partial.[/yellow]")
+    
     # Show usage if available
     if result.usage:
         console.print()
         console.print(f"[dim]Tokens: {result.usage.get('input_tokens', 0)} input, {result.usage.get('output_tokens', 0)} output[/dim]")
+        if result.usage.get("hedges") or result.usage.get("attempts", 0) > result.turns:
+            console.print(
+                f"[dim]LLM requests: {result.usage.get('attempts', 0)} for {result.turns} turn(s), "
+                f"hedges won {result.usage.get('hedge_wins', 0)}/{result.usage.get('hedges', 0)}[/dim]"
+            )
+        if "small_calls" in result.usage or "large_calls" in result.usage:
+            console.print(f"[dim]{cascade_split(result.usage)}[/dim]")
+
+
+def cascade_split(usage: dict[str, int]) -> str:
+    """Describe how a run's LLM calls, latency and cost split between cascade tiers."""
+    parts = []
+    for tier in ("small", "large"):
+        part = f"{tier} {usage.get(f'{tier}_calls', 0)} call(s), {usage.get(f'{tier}_ms', 0) / 1000:.1f}s"
+        if f"{tier}_cost_musd" in usage:
+            part += f", ${usage[f'{tier}_cost_musd'] / 1e6:.4f}"
+        parts.append(part)
+    return f"Cascade: {'; '.join(parts)}; {usage.get('escalations', 0)} escalation(s)"
+
+
+def print_command_output(line: str) -> None:
+    """Print a line of command output as it is streamed."""
+    console.print(f"  │ {line}", style="dim", markup=False, highlight=False)
+
+
+def create_agent(
+    config: Config,
+    llm: BaseLLM,
+    workspace: str,
+    on_output: Callable[[str], None] = print_command_output,
+    delegate: bool = True,
+    env: Optional[dict[str, str]] = None,
+    umask: Optional[int] = None,
+) -> Agent:
+    """Create an agent with the configured tool output budgets and run budget.
+    
+    Unless ``delegate`` is False (as for the child agents themselves), or
+    the workspace is not in a git repository, the agent can hand sub-tasks
+    to child agents sharing its LLM. ``env`` and ``umask`` are those its
+    tools run commands with (default: this process's).
+    """
+    from .agent import Agent
+    from .budget import Budget
+    
+    agent = Agent(
+        llm=llm,
+        workspace=workspace,
+        output_limits=config.tool_output_limits,
+        output_max_lines=config.tool_output_max_lines,
+        persistent_shell=config.persistent_shell,
+        memory=config.memory,
+        env=env,
+        umask=umask,
+    )
+    agent.context.on_output = on_output
+    agent.budget = Budget(
+        deadline=config.run_deadline,
+        max_input_tokens=config.max_input_tokens,
+        max_output_tokens=config.max_output_tokens,
+        max_tool_seconds=config.max_tool_seconds,
+    )
+    if delegate and config.subagents > 0:
+        from .subagents import SubAgentPool, in_git_repository
+        
+        if in_git_repository(Path(workspace)):
+            agent.context.subagents = SubAgentPool(
+                lambda path: create_agent(config, llm, path, on_output=None, delegate=False, env=env, umask=umask),
+                jobs=config.subagents,
+                budget=agent.budget,
+                max_turns=agent.max_turns,
+            )
+    return agent
 
 
-async def run_agent_loop(config: Config, message: str, workspace: Optional[str] = None) -> AgentResult:
-    """Run the agent with a message."""
+def open_session(config: Config, agent: Agent, workspace: str, resume: Optional[str] = None) -> Optional[SessionJournal]:
+    """Journal an agent's conversation, continuing a previous session if asked to.
+    
+    Args:
+        config: Configuration (``sessions`` turns journaling off)
+        agent: Agent whose history to journal
+        workspace: Workspace the sessions are kept in
+        resume: Session id to continue ("" for the most recent), or None for a new session
+    
+    Raises:
+        FileNotFoundError: If the session to resume does not exist
+    """
+    if resume is None and not config.sessions:
+        return None
+    
+    from .session import SessionJournal
+    
+    if resume is not None:
+        journal = SessionJournal.open(Path(workspace), resume or None)
+        agent.history = list(journal.messages)
+    else:
+        journal = SessionJournal.create(Path(workspace), model=config.model)
+    journal.attach(agent)
+    return journal
+
+
+def progress_text(event: dict[str, Any]) -> Optional[str]:
+    """Spinner text for an agent event (as ``Event.to_dict()``), if it changes it."""
+    if event["type"] == "llm_requested":
+        return f"Thinking... (turn {event['turn']})"
+    if event["type"] == "tool_started":
+        return f"Running {event['name']}..."
+    return None
+
+
+def print_trace_summary(path: str, times: dict[str, float]) -> None:
+    """Print where the time of a traced run went."""
+    console.print(
+        f"[dim]Trace written to {path}: {times['run']:.2f}s total, "
+        f"{times['llm']:.2f}s LLM, {times['tool']:.2f}s tools, {times['overhead']:.2f}s overhead[/dim]"
+    )
+
+
+async def run_with_progress(config: Config, agent: Agent, message: str) -> AgentResult:
+    """Run the agent behind a spinner that follows its events.
+    
+    Ctrl-C stops the run (cancelling its LLM call or tool in flight) and
+    the partial result is returned. With ``config.trace`` set, the run is
+    also written as a Chrome trace.
+    """
+    import asyncio
+    import signal
+    
+    from rich.live import Live
+    from rich.spinner import Spinner
+    
+    from .events import Event, LLMRequested, ToolStarted
+    
+    spinner = Spinner("dots", text="Thinking...", style="blue")
+    
+    def show_progress(event: Event) -> None:
+        spinner.text = progress_text(event.to_dict()) or spinner.text
+    
+    unsubscribe = [agent.events.subscribe(show_progress, (LLMRequested, ToolStarted))]
+    exporter = None
+    if config.trace:
+        from .trace import TraceExporter
+        
+        exporter = TraceExporter()
+        unsubscribe.append(exporter.attach(agent.events))
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGINT)
+    try:
+        loop.add_signal_handler(signal.SIGINT, agent.stop)
+    except (NotImplementedError, RuntimeError):
+        previous = None  # No loop signal handlers here (e.g. Windows): Ctrl-C raises as before
+    try:
+        with Live(spinner, console=console, transient=True):
+            return await agent.run(message)
+    finally:
+        if previous is not None:
+            loop.remove_signal_handler(signal.SIGINT)
+            signal.signal(signal.SIGINT, previous)
+        for cancel in unsubscribe:
+            cancel()
+        if exporter:
+            exporter.write(config.trace)
+            print_trace_summary(config.trace, exporter.summary())
+
+
+def create_provider_llm(config: Config) -> BaseLLM:
+    """Create the configured provider LLM with its retry and hedging policy.
+    
+    With ``config.backends`` set, a router over those backends is returned;
+    it fails over between backends instead of retrying one of them. With
+    ``config.cascade_model`` set, simple turns go to that model first.
+    """
+    from .llm import create_llm
+    from .retry import RetryPolicy
+    
+    retry = RetryPolicy(
+        max_attempts=config.llm_max_attempts,
+        attempt_timeout=config.llm_attempt_timeout,
+        hedge=config.llm_hedge,
+    )
+    if not config.backends:
+        return cascade(config, create_llm(config.provider, config.api_key, config.model, retry=retry), retry)
+    
+    from .router import Backend, RouterLLM
+    
+    backend_retry = RetryPolicy(max_attempts=1, attempt_timeout=config.llm_attempt_timeout, hedge=config.llm_hedge)
+    backends = []
+    for spec in config.backends:
+        provider = spec.get("provider", config.provider)
+        llm = create_llm(provider, config.backend_api_key(spec), spec.get("model"), retry=backend_retry, base_url=spec.get("base_url"))
+        backends.append(Backend(spec.get("name") or f"{provider}/{llm.model}", llm))
+    return cascade(config, RouterLLM(backends, max_attempts=max(config.llm_max_attempts, len(backends))), retry)
+
+
+def cascade(config: Config, llm: BaseLLM, retry: RetryPolicy) -> BaseLLM:
+    """Put the configured cascade model in front of an LLM, if there is one."""
+    if not config.cascade_model:
+        return llm
+    
+    from .cascade import CascadeLLM
+    from .llm import create_llm
+    
+    spec = config.cascade_backend()
+    small = create_llm(
+        spec["provider"],
+        config.backend_api_key(spec),
+        config.cascade_model,
+        retry=retry,
+        max_tokens=config.cascade_max_tokens,
+    )
+    return CascadeLLM(small, llm)
+
+
+def cascade_error(config: Config) -> Optional[str]:
+    """Why the configured cascade model cannot be called, if it cannot."""
+    if not config.cascade_model:
+        return None
+    spec = config.cascade_backend()
+    if not config.backend_api_key(spec):
+        return f"No API key for the cascade model: set cascade_api_key or {spec['provider'].upper()}_API_KEY"
+    return None
+
+
+def build_llm(config: Config, workspace: str, llm: Optional[BaseLLM] = None) -> BaseLLM:
+    """Create the configured LLM, wrapped in a cassette if one is set.
+    
+    Provider clients are created lazily, on the first request.
+    
+    Args:
+        config: Configuration to build from
+        workspace: Workspace path, abstracted from cassette keys
+        llm: Provider LLM to reuse instead of creating one
+    """
+    from .cassette import REPLAY, CassetteLLM
+    
+    if config.cassette and config.cassette_mode == REPLAY:
+        # Replay never calls the provider, so no API key is needed
+        return CassetteLLM(
+            config.cassette,
+            REPLAY,
+            model=config.model,
+            latency=config.replay_latency,
+            workspace=workspace,
+        )
+    llm = llm or create_provider_llm(config)
+    if config.cassette:
+        return CassetteLLM(config.cassette, config.cassette_mode, llm=llm, workspace=workspace)
+    return llm
+
+
+async def run_agent_loop(
+    config: Config,
+    message: str,
+    workspace: Optional[str] = None,
+    resume: Optional[str] = None,
+) -> AgentResult:
+    """Run the agent with a message, optionally continuing a session."""
     workspace = workspace or config.workspace or str(Path.cwd())
     
     # Create LLM
-    llm = create_llm(config.provider, config.api_key, config.model)
+    llm = build_llm(config, workspace)
     
     # Create agent
-    agent = Agent(llm=llm, workspace=workspace)
+    agent = create_agent(config, llm, workspace)
+    journal = open_session(config, agent, workspace, resume)
     
     # Run with spinner
-    with Live(Spinner("dots", text="Thinking...", style="blue"), console=console, transient=True):
-        result = await agent.run(message)
+    try:
+        result = await run_with_progress(config, agent, message)
+    finally:
+        await agent.close()
+        if journal:
+            journal.close()
+            console.print(f"[dim]Session {journal.id} (continue with --resume {journal.id})[/dim]")
     
     return result
 
 
-async def interactive_mode(config: Config) -> None:
-    """Run interactive REPL mode."""
+async def interactive_mode(config: Config, resume: Optional[str] = None) -> None:
+    """Run interactive REPL mode, optionally continuing a session."""
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+    from prompt_toolkit.history import FileHistory
+    
     print_welcome()
     
     # Setup prompt session with history
@@ -98,8 +378,11 @@ async def interactive_mode(config: Config) -> None:
     
     # Create agent once for conversation continuity
     workspace = config.workspace or str(Path.cwd())
-    llm = create_llm(config.provider, config.api_key, config.model)
-    agent = Agent(llm=llm, workspace=workspace)
+    llm = build_llm(config, workspace)
+    agent = create_agent(config, llm, workspace)
+    journal = open_session(config, agent, workspace, resume)
+    if journal and resume is not None:
+        console.print(f"[green]Resumed session {journal.id}[/green] [dim]({len(agent.history)} messages)[/dim]\n")
     
     while True:
         try:
@@ -112,7 +395,8 @@ async def interactive_mode(config: Config) -> None:
             
             # Handle commands
             if user_input.startswith("/"):
-                command = user_input[1:].lower()
+                command, _, argument = user_input[1:].partition(" ")
+                command = command.lower()
                 
                 if command in ("quit", "exit", "q"):
                     console.print("[yellow]Goodbye![/yellow]")
@@ -121,17 +405,25 @@ async def interactive_mode(config: Config) -> None:
                     print_help()
                 elif command == "clear":
                     agent.reset()
+                    if journal:
+                        journal.sync(agent.history)
                     console.print("[green]Conversation cleared[/green]")
                 elif command == "status":
-                    print_status(config, workspace, agent)
+                    print_status(config, workspace, agent, journal)
+                elif command == "checkpoint":
+                    checkpoint = agent.context.checkpoints.begin(label=argument.strip() or "manual")
+                    console.print(f"[green]Checkpoint {checkpoint.id} created[/green]")
+                elif command == "checkpoints":
+                    print_checkpoints(agent)
+                elif command == "undo":
+                    undo_checkpoint(agent)
                 else:
                     console.print(f"[red]Unknown command: /{command}[/red]")
                     console.print("Type [cyan]/help[/cyan] for available commands")
                 continue
             
             # Run agent
-            with Live(Spinner("dots", text="Thinking...", style="blue"), console=console, transient=True):
-                result = await agent.run(user_input)
+            result = await run_with_progress(config, agent, user_input)
             
             print_result(result)
             
@@ -141,16 +433,51 @@ async def interactive_mode(config: Config) -> None:
         except EOFError:
             console.print("\n[yellow]Goodbye![/yellow]")
             break
+    
+    await agent.close()
+    if journal:
+        journal.close()
+        console.print(f"[dim]Session {journal.id} saved (continue with --resume {journal.id})[/dim]")
+
+
+def print_checkpoints(agent: Agent) -> None:
+    """Print the checkpoints that can be undone."""
+    checkpoints = [c for c in agent.context.checkpoints.checkpoints if c.entries]
+    if not checkpoints:
+        console.print("[dim]No file changes to undo[/dim]")
+        return
+    for checkpoint in reversed(checkpoints):
+        console.print(
+            f"  [cyan]{checkpoint.id}[/cyan] {checkpoint.label or '(no label)'} "
+            f"[dim]({len(checkpoint.entries)} file(s))[/dim]"
+        )
+
+
+def undo_checkpoint(agent: Agent) -> None:
+    """Restore the files changed since the latest checkpoint."""
+    checkpoint = agent.context.checkpoints.undo()
+    if checkpoint is None:
+        console.print("[dim]No file changes to undo[/dim]")
+        return
+    console.print(f"[green]Restored {len(checkpoint.entries)} file(s) from checkpoint {checkpoint.id}:[/green]")
+    for path in checkpoint.entries:
+        console.print(f"  [dim]{path}[/dim]")
+    console.print("[dim]Changes made by bash commands are not tracked.[/dim]")
 
 
 def print_help() -> None:
     """Print help message."""
+    from rich.markdown import Markdown
+    
     help_text = """
 **Available Commands:**
 
 - `/help` - Show this help message
 - `/clear` - Clear conversation history
 - `/status` - Show current configuration
+- `/checkpoint [label]` - Mark a point to undo back to (each request starts one)
+- `/checkpoints` - List checkpoints with file changes
+- `/undo` - Restore files changed since the latest checkpoint
 - `/quit` or `/exit` or `/q` - Exit the program
 
 **Usage:**
@@ -170,12 +497,15 @@ Just type your request and press Enter. The AI will:
     console.print(Markdown(help_text))
 
 
-def print_status(config: Config, workspace: str, agent: Agent) -> None:
+def print_status(config: Config, workspace: str, agent: Agent, journal: Optional[SessionJournal] = None) -> None:
     """Print current status."""
+    from rich.panel import Panel
+    
     console.print(Panel(
         f"[bold]Provider:[/bold] {config.provider}\n"
         f"[bold]Model:[/bold] {config.model}\n"
         f"[bold]Workspace:[/bold] {workspace}\n"
+        f"[bold]Session:[/bold] {journal.id if journal else '(not saved)'}\n"
         f"[bold]Conversation turns:[/bold] {agent._turn_count}\n"
         f"[bold]History length:[/bold] {len(agent.history)} messages",
         title="Status",
@@ -183,23 +513,247 @@ def print_status(config: Config, workspace: str, agent: Agent) -> None:
     ))
 
 
-async def run_command(config: Config, message: str, workspace: Optional[str] = None) -> None:
+async def run_command(
+    config: Config,
+    message: str,
+    workspace: Optional[str] = None,
+    resume: Optional[str] = None,
+) -> None:
     """Run a single command."""
     workspace = workspace or config.workspace or str(Path.cwd())
     
     console.print(f"[bold blue]Mini-Claw[/bold blue] - Processing request...\n")
     
-    result = await run_agent_loop(config, message, workspace)
+    result = await run_agent_loop(config, message, workspace, resume)
     print_result(result)
 
 
+def print_sessions(workspace: str) -> None:
+    """Print the saved sessions of a workspace, most recent first."""
+    import time
+    
+    from .session import list_sessions
+    
+    sessions = list_sessions(Path(workspace))
+    if not sessions:
+        console.print(f"[dim]No saved sessions in {workspace}[/dim]")
+        return
+    for session in sessions:
+        updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"]))
+        console.print(
+            f"  [cyan]{session['id']}[/cyan]  [dim]{updated}  {session['entries']:4} entries[/dim]  "
+            f"{session['title'] or '(empty)'}",
+            highlight=False,
+        )
+
+
+def cli_overrides(args: argparse.Namespace) -> dict[str, Any]:
+    """Config fields set by command-line options.
+    
+    Paths are made absolute so they also hold for the daemon.
+    """
+    overrides: dict[str, Any] = {}
+    if args.provider:
+        overrides["provider"] = args.provider
+    if args.model:
+        overrides["model"] = args.model
+    if args.record:
+        overrides.update(cassette=str(Path(args.record).resolve()), cassette_mode="record")
+    if args.replay:
+        overrides.update(cassette=str(Path(args.replay).resolve()), cassette_mode="replay")
+    if args.replay_latency:
+        overrides["replay_latency"] = args.replay_latency
+    if args.trace:
+        overrides["trace"] = str(Path(args.trace).resolve())
+    if getattr(args, "no_memory", False):
+        overrides["memory"] = False
+    for field in ("run_deadline", "max_input_tokens", "max_output_tokens", "max_tool_seconds", "subagents"):
+        if getattr(args, field, None) is not None:
+            overrides[field] = getattr(args, field)
+    return overrides
+
+
+def run_remote(sock: socket.socket, args: argparse.Namespace) -> int:
+    """Run a single command on the daemon and render its replies."""
+    from types import SimpleNamespace
+    
+    from rich.live import Live
+    from rich.spinner import Spinner
+    
+    from . import daemon
+    
+    console.print(f"[bold blue]Mini-Claw[/bold blue] - Processing request...\n")
+    
+    payload = {
+        "op": "run",
+        "message": args.message,
+        "cwd": str(Path.cwd()),
+        "workspace": str(Path(args.workspace).resolve()) if args.workspace else None,
+        "config_path": str(Path(args.config).expanduser().resolve()) if args.config else None,
+        "env": daemon.client_env(),
+        "umask": daemon.current_umask(),
+        "overrides": cli_overrides(args),
+    }
+    spinner = Spinner("dots", text="Thinking...", style="blue")
+    result, error, trace = None, None, None
+    with Live(spinner, console=console, transient=True):
+        for reply in daemon.request(sock, payload):
+            if reply["type"] == "output":
+                print_command_output(reply["line"])
+            elif reply["type"] == "event":
+                spinner.text = progress_text(reply["event"]) or spinner.text
+            elif reply["type"] == "trace":
+                trace = reply
+            elif reply["type"] == "result":
+                result = reply["result"]
+            elif reply["type"] == "error":
+                error = reply["error"]
+    
+    if trace:
+        print_trace_summary(trace["path"], trace["summary"])
+    if result is None:
+        console.print(f"[red]Error:[/red] {error or 'the daemon closed the connection'}")
+        return 1
+    if result.get("session"):
+        console.print(f"[dim]Session {result['session']} (continue with --resume {result['session']})[/dim]")
+    # Same shape as AgentResult, without importing the agent
+    print_result(SimpleNamespace(
+        response=result["response"],
+        usage=result["usage"],
+        turns=result["turns"],
+        exhausted=result.get("exhausted"),
+        tool_executions=[
+            SimpleNamespace(
+                name=execution["name"],
+                arguments=execution["arguments"],
+                result=SimpleNamespace(
+                    success=execution["success"],
+                    output=execution["output"],
+                    error=execution["error"],
+                ),
+            )
+            for execution in result["tool_executions"]
+        ],
+    ))
+    return 0
+
+
+def daemon_command(action: str) -> int:
+    """Start, stop or report on the background daemon."""
+    from . import daemon
+    
+    path = daemon.socket_path()
+    if action == "start":
+        try:
+            status = daemon.start(path)
+        except daemon.DaemonError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            return 1
+        console.print(f"[green]Daemon running[/green] [dim](pid {status['pid']}, {path})[/dim]")
+    elif action == "stop":
+        if daemon.shutdown(path):
+            console.print("[green]Daemon stopped[/green]")
+        else:
+            console.print("[dim]No daemon running[/dim]")
+    else:
+        status = daemon.ping(path)
+        if status:
+            console.print(
+                f"Daemon running [dim](pid {status['pid']}, up {status['uptime']:.0f}s, "
+                f"{status['runs']} run(s), {path})[/dim]"
+            )
+        else:
+            console.print("[dim]No daemon running[/dim]")
+    return 0
+
+
+def batch_main(argv: list[str]) -> int:
+    """Entry point of ``mini-claw batch``: run a JSONL task file headless."""
+    import argparse
+    import asyncio
+    
+    parser = argparse.ArgumentParser(
+        prog="mini-claw batch",
+        description="Run many tasks concurrently; one JSON result per task is written as it finishes",
+    )
+    parser.add_argument("tasks", help='JSONL task file ("-" for stdin), lines like {"id": ..., "message": ..., "workspace": ...}')
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Tasks run at once (default: 4)")
+    parser.add_argument("-o", "--output", help="Results file (default: stdout)")
+    parser.add_argument("--root", help="Directory task workspaces are relative to (default: current directory)")
+    parser.add_argument("--timeout", type=float, help="Per-task time limit in seconds")
+    parser.add_argument("-c", "--config", help="Path to config file (default: ~/.mini-claw/config.json)")
+    parser.add_argument("-p", "--provider", choices=["anthropic", "openai"], help="LLM provider")
+    parser.add_argument("-m", "--model", help="Model name")
+    parser.add_argument("--record", metavar="CASSETTE", help="Record LLM calls to a JSONL cassette")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Replay LLM calls from a cassette")
+    parser.add_argument("--replay-latency", choices=["original", "zero"], help="Sleep for the recorded latency on replay")
+    parser.set_defaults(trace=None)
+    args = parser.parse_args(argv)
+    
+    from .batch import BatchRunner, load_tasks, write_result
+    from .cassette import REPLAY
+    from .config import ConfigManager
+    
+    config = ConfigManager(args.config).load()
+    for key, value in cli_overrides(args).items():
+        setattr(config, key, value)
+    
+    # Results go to stdout, so everything else goes to stderr
+    err = Console(stderr=True)
+    replaying = config.cassette and config.cassette_mode == REPLAY
+    if not config.api_key and not config.backends and not replaying:
+        err.print("[red]Error:[/red] No API key configured.")
+        return 1
+    if not replaying and (error := cascade_error(config)):
+        err.print(f"[red]Error:[/red] {error}")
+        return 1
+    try:
+        tasks = load_tasks(args.tasks, args.root)
+    except (OSError, ValueError) as e:
+        err.print(f"[red]Error:[/red] {e}")
+        return 1
+    
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    write = write_result(out)
+    
+    def report(result: dict[str, Any]) -> None:
+        write(result)
+        style = "green" if result["status"] == "ok" else "red"
+        err.print(f"[{style}]{result['status']:7}[/{style}] {result['id']} [dim]({result['seconds']:.1f}s)[/dim]")
+    
+    err.print(f"[bold blue]Mini-Claw[/bold blue] - Running {len(tasks)} task(s), {args.jobs} at a time\n")
+    start = time.perf_counter()
+    try:
+        runner = BatchRunner(config, jobs=args.jobs, timeout=args.timeout, on_result=report)
+        results = asyncio.run(runner.run(tasks))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    failed = sum(1 for result in results if result["status"] != "ok")
+    tokens = {"input_tokens": 0, "output_tokens": 0}
+    for result in results:
+        for key in tokens:
+            tokens[key] += (result.get("usage") or {}).get(key, 0)
+    err.print(
+        f"\n{len(results) - failed} ok, {failed} failed in {time.perf_counter() - start:.1f}s "
+        f"[dim]({tokens['input_tokens']} input, {tokens['output_tokens']} output tokens)[/dim]"
+    )
+    return 1 if failed else 0
+
+
 def main() -> int:
     """Main entry point."""
     import argparse
     
+    # Subcommands come before the free-form message
+    if sys.argv[1:2] == ["batch"]:
+        return batch_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description="Mini-Claw - Minimal AI Coding Assistant",
         formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Run a JSONL file of tasks headless with: mini-claw batch TASKS.jsonl (see mini-claw batch --help)",
     )
     parser.add_argument(
         "message",
@@ -223,6 +777,84 @@ def main() -> int:
         "-m", "--model",
         help="Model name (default: from config or provider default)",
     )
+    parser.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Record LLM calls to a JSONL cassette",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="Replay LLM calls from a cassette instead of calling the provider",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        choices=["original", "zero"],
+        help="Sleep for the recorded latency on replay (default: zero)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write a Chrome trace of the run (open in ui.perfetto.dev)",
+    )
+    parser.add_argument(
+        "--deadline",
+        dest="run_deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Stop the run after this many seconds, returning what it has so far",
+    )
+    parser.add_argument(
+        "--max-input-tokens",
+        type=int,
+        metavar="N",
+        help="Stop the run once its LLM calls have used this many input tokens",
+    )
+    parser.add_argument(
+        "--max-output-tokens",
+        type=int,
+        metavar="N",
+        help="Stop the run once its LLM calls have used this many output tokens",
+    )
+    parser.add_argument(
+        "--max-tool-seconds",
+        type=float,
+        metavar="SECONDS",
+        help="Stop the run once its tools have run this long",
+    )
+    parser.add_argument(
+        "--subagents",
+        type=int,
+        metavar="N",
+        help="Child agents the delegate tool may run at once (0 disables delegate)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Neither show nor save project memory (.mini-claw/memory.json) in this run",
+    )
+    parser.add_argument(
+        "--daemon",
+        choices=["start", "stop", "status"],
+        help="Manage the background daemon that serves one-shot runs with warm clients",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process even if a daemon is running",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="",
+        metavar="SESSION",
+        help="Continue a saved session of the workspace (default: the most recent)",
+    )
+    parser.add_argument(
+        "--list-sessions",
+        action="store_true",
+        help="List the saved sessions of the workspace",
+    )
     parser.add_argument(
         "--init-config",
         action="store_true",
@@ -235,30 +867,59 @@ def main() -> int:
     if args.init_config:
         return init_config_interactive(args.config)
     
+    if args.daemon:
+        return daemon_command(args.daemon)
+    
+    # One-shot runs go to a running daemon, which has everything loaded
+    if args.message and not args.no_daemon and args.resume is None:
+        from .daemon import connect
+        
+        if sock := connect():
+            return run_remote(sock, args)
+    
     # Load configuration
+    import asyncio
+    
+    from .cassette import REPLAY
+    from .config import ConfigManager
+    
     config_manager = ConfigManager(args.config)
     config = config_manager.load()
     
     # Override config with CLI args
-    if args.provider:
-        config.provider = args.provider
-    if args.model:
-        config.model = args.model
+    for key, value in cli_overrides(args).items():
+        setattr(config, key, value)
+    
+    if args.list_sessions:
+        print_sessions(args.workspace or config.workspace or str(Path.cwd()))
+        return 0
     
     # Check for API key
-    if not config.api_key:
+    replaying = config.cassette and config.cassette_mode == REPLAY
+    if not config.api_key and not config.backends and not replaying:
         console.print("[red]Error:[/red] No API key configured.")
         console.print("Run [cyan]mini-claw --init-config[/cyan] to set up, or set environment variable:")
         console.print("  [dim]ANTHROPIC_API_KEY[/dim] or [dim]OPENAI_API_KEY[/dim]")
         return 1
+    if not replaying and (error := cascade_error(config)):
+        console.print(f"[red]Error:[/red] {error}")
+        return 1
     
     # Run interactive or command mode
-    if args.message:
-        # Single command mode
-        asyncio.run(run_command(config, args.message, args.workspace))
-    else:
-        # Interactive mode
-        asyncio.run(interactive_mode(config))
+    try:
+        if args.message:
+            # Single command mode
+            asyncio.run(run_command(config, args.message, args.workspace, args.resume))
+        else:
+            # Interactive mode
+            if args.workspace:
+                config.workspace = args.workspace
+            asyncio.run(interactive_mode(config, args.resume))
+    except FileNotFoundError as e:
+        if args.resume is None:
+            raise
+        console.print(f"[red]Error:[/red] {e}")
+        return 1
     
     return 0
 
@@ -267,6 +928,9 @@ def init_config_interactive(config_path: Optional[str]) -> int:
     """Initialize configuration interactively."""
     from prompt_toolkit import prompt
     from prompt_toolkit.validation import Validator, ValidationError
+    from rich.panel import Panel
+    
+    from .config import Config, ConfigManager
     
     console.print(Panel.fit(
         "[bold]Mini-Claw Configuration Setup[/bold]\n",
@@ -3,8 +3,10 @@
 import json
 import os
 from pathlib import Path
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, Mapping, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .tools import DEFAULT_OUTPUT_LIMITS, DEFAULT_OUTPUT_MAX_LINES
 
 
 class Config(BaseModel):
@@ -14,9 +16,84 @@ class Config(BaseModel):
     api_key: Optional[str] = Field(default=None, description="API key (can also use env vars)")
     model: str = Field(default="claude-sonnet-4-5-20250929", description="Model to use")
     workspace: Optional[str] = Field(default=None, description="Workspace directory")
+    tool_output_limits: dict[str, int] = Field(
+        default_factory=lambda: dict(DEFAULT_OUTPUT_LIMITS),
+        description="Max characters of each tool's output kept in history (head and tail are kept)",
+    )
+    tool_output_max_lines: int = Field(default=DEFAULT_OUTPUT_MAX_LINES, description="Max lines of any tool output kept in history")
+    persistent_shell: bool = Field(
+        default=False,
+        description="Run bash commands in one long-lived shell so cd/export/venv activation persist",
+    )
+    cassette: Optional[str] = Field(default=None, description="JSONL cassette to record LLM calls to or replay from")
+    cassette_mode: str = Field(default="record", description="Cassette mode: record or replay")
+    replay_latency: str = Field(default="zero", description="Replay latency: original or zero")
+    trace: Optional[str] = Field(default=None, description="Write a Chrome trace (Perfetto JSON) of each run to this path")
+    llm_max_attempts: int = Field(default=4, description="Attempts per LLM call on transient errors (1 disables retries)")
+    llm_attempt_timeout: Optional[float] = Field(default=300.0, description="Seconds before an LLM attempt is abandoned and retried")
+    llm_hedge: bool = Field(
+        default=False,
+        description="Send a second request when an LLM call is slower than the p95 of recent calls",
+    )
+    backends: list[dict[str, Any]] = Field(
+        default_factory=list,
+        description="LLM backends to route between, in order of preference: "
+        "[{\"provider\": ..., \"model\": ..., \"api_key\": ..., \"base_url\": ..., \"name\": ...}]",
+    )
+    cascade_model: Optional[str] = Field(
+        default=None,
+        description="Small, fast model for turns that follow simple tool results; "
+        "planning, final answers and invalid tool calls escalate to the main model",
+    )
+    cascade_provider: Optional[str] = Field(
+        default=None,
+        description="Provider of the cascade model (default: provider of the main model, or of the first backend)",
+    )
+    cascade_api_key: Optional[str] = Field(
+        default=None,
+        description="API key of the cascade model (default: <PROVIDER>_API_KEY, or api_key for the same provider)",
+    )
+    cascade_max_tokens: int = Field(default=1024, description="Output token limit of the cascade model")
+    run_deadline: Optional[float] = Field(default=None, description="Wall-clock seconds a run may take")
+    max_input_tokens: Optional[int] = Field(default=None, description="Input tokens a run may use over all its LLM calls")
+    max_output_tokens: Optional[int] = Field(default=None, description="Output tokens a run may use over all its LLM calls")
+    max_tool_seconds: Optional[float] = Field(default=None, description="Seconds a run may spend running tools")
+    sessions: bool = Field(default=True, description="Journal conversations to .mini-claw/sessions so they can be resumed")
+    subagents: int = Field(
+        default=4,
+        description="Child agents the delegate tool runs at once, each in its own git worktree (0 disables delegate)",
+    )
+    memory: bool = Field(
+        default=True,
+        description="Keep facts the agent verified in .mini-claw/memory.json and show them to later runs",
+    )
+    
+    # *_API_KEY variables of the environment the config was loaded from
+    _environ_keys: Optional[dict[str, str]] = PrivateAttr(default=None)
     
     class Config:
         extra = "ignore"
+    
+    def backend_api_key(self, spec: Mapping[str, Any]) -> Optional[str]:
+        """API key of one of ``backends``.
+        
+        The spec's own key, else ``<PROVIDER>_API_KEY`` from the environment
+        the config was loaded from (os.environ for a config not made by
+        ``ConfigManager``), else ``api_key`` for the configured provider.
+        """
+        provider = spec.get("provider", self.provider)
+        environ = os.environ if self._environ_keys is None else self._environ_keys
+        api_key = spec.get("api_key") or environ.get(f"{provider.upper()}_API_KEY")
+        if not api_key and provider == self.provider:
+            api_key = self.api_key
+        return api_key
+    
+    def cascade_backend(self) -> dict[str, Any]:
+        """The cascade model as a ``backends`` entry, so its key resolves like theirs."""
+        provider = self.cascade_provider
+        if not provider:
+            provider = self.backends[0].get("provider", self.provider) if self.backends else self.provider
+        return {"provider": provider, "model": self.cascade_model, "api_key": self.cascade_api_key}
 
 
 class ConfigManager:
@@ -29,8 +106,15 @@ class ConfigManager:
             # Default: ~/.mini-claw/config.json
             self.config_path = Path.home() / ".mini-claw" / "config.json"
     
-    def load(self) -> Config:
-        """Load configuration from file or environment."""
+    def load(self, environ: Optional[Mapping[str, str]] = None) -> Config:
+        """Load configuration from file or environment.
+        
+        Args:
+            environ: Environment to read overrides from (default: os.environ)
+        """
+        if environ is None:
+            environ = os.environ
+        
         # Try to load from file first
         if self.config_path.exists():
             with open(self.config_path, "r") as f:
@@ -41,20 +125,23 @@ class ConfigManager:
             config = Config()
         
         # Environment variables override file config
-        if env_key := os.environ.get("MINI_CLAW_API_KEY"):
+        if env_key := environ.get("MINI_CLAW_API_KEY"):
             config.api_key = env_key
-        if env_provider := os.environ.get("MINI_CLAW_PROVIDER"):
+        if env_provider := environ.get("MINI_CLAW_PROVIDER"):
             config.provider = env_provider
-        if env_model := os.environ.get("MINI_CLAW_MODEL"):
+        if env_model := environ.get("MINI_CLAW_MODEL"):
             config.model = env_model
-        if env_workspace := os.environ.get("MINI_CLAW_WORKSPACE"):
+        if env_workspace := environ.get("MINI_CLAW_WORKSPACE"):
             config.workspace = env_workspace
         
+        # Kept for the keys of backends (see Config.backend_api_key)
+        config._environ_keys = {name: value for name, value in environ.items() if name.endswith("_API_KEY")}
+        
         # Provider-specific env vars
         if config.provider == "anthropic" and not config.api_key:
-            config.api_key = os.environ.get("ANTHROPIC_API_KEY")
+            config.api_key = environ.get("ANTHROPIC_API_KEY")
         elif config.provider == "openai" and not config.api_key:
-            config.api_key = os.environ.get("OPENAI_API_KEY")
+            config.api_key = environ.get("OPENAI_API_KEY")
         
         return config
     
@@ -0,0 +1,358 @@
+"""Warm background daemon serving one-shot CLI runs over a Unix socket.
+
+Starting Python, importing the SDKs, opening provider connections and
+indexing the workspace cost more than a short scripted run itself. The
+daemon keeps all of that alive between invocations: provider clients
+(with their HTTP connection pools) are reused per provider, model and
+key, and the workspace and search indexes stay in memory. ``mini-claw``
+then only has to send the request and render what comes back.
+
+The protocol is newline-delimited JSON. A client sends one request::
+
+    {"op": "run", "message": "...", "cwd": "...", "workspace": null,
+     "config_path": null, "env": {...}, "umask": 18, "overrides": {...}}
+
+``env`` is the client's whole environment and ``umask`` its file mode
+creation mask: the configuration is read from them, and the agent's
+commands run with them, so a run behaves as it would without the daemon.
+
+and receives ``output`` lines (streamed bash output), agent ``event``s,
+an optional ``trace`` summary, then a final ``result`` or ``error``.
+Output lines a slow client cannot keep up with are dropped (and counted)
+rather than buffered; the run's result still has the captured output. The
+other operations are ``ping`` and ``shutdown``. Closing the connection
+cancels the run. The client side uses blocking sockets only, so it adds
+nothing to the CLI's import time.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+
+DEFAULT_IDLE_TIMEOUT = 3600.0  # Seconds without requests before the daemon exits
+
+# Streamed output waiting to be sent to a client, beyond which lines are dropped
+OUTPUT_BUFFER_BYTES = 1_000_000
+
+
+class DaemonError(Exception):
+    """The daemon could not be reached or reported a failure."""
+
+
+def socket_path() -> Path:
+    """Socket location: ``$MINI_CLAW_SOCKET`` or ``~/.mini-claw/daemon.sock``."""
+    if path := os.environ.get("MINI_CLAW_SOCKET"):
+        return Path(path).expanduser()
+    return Path.home() / ".mini-claw" / "daemon.sock"
+
+
+# Client side (blocking, stdlib only)
+
+def connect(path: Optional[Path] = None, timeout: float = 1.0) -> Optional[socket.socket]:
+    """Connect to a running daemon; None if none is listening."""
+    path = path or socket_path()
+    if not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(sock: socket.socket, payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Send a request and yield the daemon's replies until it closes the connection."""
+    with sock, sock.makefile("rb") as replies:
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        for line in replies:
+            if line.strip():
+                yield json.loads(line)
+
+
+def client_env() -> dict[str, str]:
+    """The client's environment, for the configuration and the commands of its run."""
+    return dict(os.environ)
+
+
+def current_umask() -> int:
+    """The process umask (only read by setting it, so call it before starting threads)."""
+    mask = os.umask(0o22)
+    os.umask(mask)
+    return mask
+
+
+def ping(path: Optional[Path] = None) -> Optional[dict[str, Any]]:
+    """Status of the running daemon, or None if it is not running."""
+    sock = connect(path)
+    if sock is None:
+        return None
+    try:
+        return next(request(sock, {"op": "ping"}), None)
+    except (OSError, ValueError):
+        return None
+
+
+def shutdown(path: Optional[Path] = None) -> bool:
+    """Ask the running daemon to exit; False if none was running."""
+    sock = connect(path)
+    if sock is None:
+        return False
+    for _ in request(sock, {"op": "shutdown"}):
+        pass
+    return True
+
+
+def start(path: Optional[Path] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, wait: float = 10.0) -> dict[str, Any]:
+    """Start a daemon in the background and wait until it answers.
+
+    Returns:
+        The daemon's ping reply
+
+    Raises:
+        DaemonError: If it did not come up within ``wait`` seconds
+    """
+    path = path or socket_path()
+    if status := ping(path):
+        return status
+    path.parent.mkdir(parents=True, exist_ok=True)
+    log_path = path.with_suffix(".log")
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "miniclaw.daemon", "--socket", str(path), "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if status := ping(path):
+            return status
+        time.sleep(0.05)
+    raise DaemonError(f"Daemon did not start within {wait:.0f}s; see {log_path}")
+
+
+# Server side
+
+class Daemon:
+    """Serves agent runs with warm LLM clients and workspace caches."""
+
+    def __init__(self, path: Optional[Path] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.runs = 0
+        self._active = 0
+        self._last_request = time.monotonic()
+        self._llms: dict[tuple, Any] = {}  # (provider, model, key, retry settings) -> BaseLLM
+        self._stopped = None
+
+    async def serve(self) -> None:
+        """Listen until shut down or idle for ``idle_timeout`` seconds."""
+        import asyncio
+
+        self._stopped = asyncio.Event()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            if ping(self.path):
+                raise DaemonError(f"A daemon is already listening on {self.path}")
+            self.path.unlink()  # Stale socket of a daemon that died
+        server = await asyncio.start_unix_server(self._handle, path=str(self.path), limit=2**24)
+        # Requests carry API keys; only this user may connect
+        os.chmod(self.path, 0o600)
+        print(f"mini-claw daemon {os.getpid()} listening on {self.path}", flush=True)
+        idle = asyncio.create_task(self._exit_when_idle())
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            idle.cancel()
+            self.path.unlink(missing_ok=True)
+
+    async def _exit_when_idle(self) -> None:
+        import asyncio
+
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60.0))
+            if not self._active and time.monotonic() - self._last_request >= self.idle_timeout:
+                print("Idle timeout, exiting", flush=True)
+                self._stopped.set()
+                return
+
+    async def _handle(self, reader, writer) -> None:
+        self._last_request = time.monotonic()
+
+        dropped = 0
+
+        def send(message: dict[str, Any]) -> None:
+            nonlocal dropped
+            if writer.is_closing():
+                return
+            if message["type"] == "output":
+                # Callbacks cannot wait for the client, so bound what queues up for it
+                if writer.transport.get_write_buffer_size() > OUTPUT_BUFFER_BYTES:
+                    dropped += 1
+                    return
+                if dropped:
+                    notice = f"[... {dropped} line(s) of output not shown: the client fell behind ...]"
+                    dropped = 0
+                    send({"type": "output", "line": notice})
+            writer.write(json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+
+        try:
+            line = await reader.readline()
+            request = json.loads(line or b"{}")
+            op = request.get("op")
+            if op == "ping":
+                send({"type": "pong", "pid": os.getpid(), "uptime": time.time() - self.started, "runs": self.runs})
+            elif op == "shutdown":
+                send({"type": "ok"})
+                self._stopped.set()
+            elif op == "run":
+                self._active += 1
+                try:
+                    await self._serve_run(request, reader, send)
+                finally:
+                    self._active -= 1
+                    self._last_request = time.monotonic()
+            else:
+                send({"type": "error", "error": f"Unknown operation: {op}"})
+            await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"Bad request: {e}", flush=True)
+        finally:
+            writer.close()
+
+    def _provider_llm(self, config):
+        """The warm provider LLM for a config, created on first use."""
+        from .cli import create_provider_llm
+
+        key = (
+            config.provider,
+            config.model,
+            config.api_key or "",
+            json.dumps(config.backends, sort_keys=True),
+            # Backend keys from the client's environment, which may differ per client or be rotated
+            tuple(config.backend_api_key(spec) or "" for spec in config.backends),
+            config.llm_max_attempts,
+            config.llm_attempt_timeout,
+            config.llm_hedge,
+            config.cascade_model,
+            config.cascade_max_tokens,
+            json.dumps(config.cascade_backend(), sort_keys=True),
+            config.backend_api_key(config.cascade_backend()) or "",
+        )
+        if key not in self._llms:
+            self._llms[key] = create_provider_llm(config)
+        return self._llms[key]
+
+    async def _serve_run(self, request: dict[str, Any], reader, send) -> None:
+        import asyncio
+
+        from .cassette import REPLAY
+        from .cli import build_llm, cascade_error, create_agent, open_session
+        from .config import ConfigManager
+
+        config = ConfigManager(request.get("config_path")).load(environ=request.get("env") or {})
+        for key, value in (request.get("overrides") or {}).items():
+            setattr(config, key, value)
+        workspace = request.get("workspace") or config.workspace or request["cwd"]
+        replaying = config.cassette and config.cassette_mode == REPLAY
+        if not config.api_key and not config.backends and not replaying:
+            send({"type": "error", "error": "No API key configured"})
+            return
+        if not replaying and (error := cascade_error(config)):
+            send({"type": "error", "error": error})
+            return
+
+        llm = build_llm(config, workspace, llm=None if replaying else self._provider_llm(config))
+        agent = create_agent(
+            config,
+            llm,
+            workspace,
+            on_output=lambda line: send({"type": "output", "line": line}),
+            env=request.get("env"),
+            umask=request.get("umask"),
+        )
+        agent.events.subscribe(lambda event: send({"type": "event", "event": event.to_dict()}))
+        journal = open_session(config, agent, workspace)
+        exporter = None
+        if config.trace:
+            from .trace import TraceExporter
+
+            exporter = TraceExporter()
+            exporter.attach(agent.events)
+
+        # A client that disconnects (e.g. Ctrl-C) cancels its run
+        run = asyncio.create_task(agent.run(request["message"]))
+        hangup = asyncio.create_task(reader.read())
+        try:
+            await asyncio.wait({run, hangup}, return_when=asyncio.FIRST_COMPLETED)
+            if not run.done():
+                run.cancel()
+            try:
+                result = await run
+            except asyncio.CancelledError:
+                print("Client disconnected, run cancelled", flush=True)
+                return
+            except Exception as e:
+                send({"type": "error", "error": f"{type(e).__name__}: {e}"})
+                return
+        finally:
+            hangup.cancel()
+            await agent.close()
+            if journal:
+                journal.close()
+            self.runs += 1
+
+        if exporter:
+            exporter.write(config.trace)
+            send({"type": "trace", "path": config.trace, "summary": exporter.summary()})
+        send({"type": "result", "result": {
+            "response": result.response,
+            "usage": result.usage,
+            "turns": result.turns,
+            "stop_reason": result.stop_reason,
+            "exhausted": result.exhausted,
+            "session": journal.id if journal else None,
+            "tool_executions": [
+                {
+                    "name": execution.name,
+                    "arguments": execution.arguments,
+                    "success": execution.result.success,
+                    "output": execution.result.output,
+                    "error": execution.result.error,
+                }
+                for execution in result.tool_executions
+            ],
+        }})
+
+
+def main() -> None:
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Mini-Claw daemon")
+    parser.add_argument("--socket", help="Socket path (default: $MINI_CLAW_SOCKET or ~/.mini-claw/daemon.sock)")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Exit after this many idle seconds")
+    args = parser.parse_args()
+
+    daemon = Daemon(Path(args.socket) if args.socket else None, idle_timeout=args.idle_timeout)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""Atomic file writes and validated multi-file edit transactions."""
+
+import bisect
+import difflib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, TypedDict
+
+
+# Umask assumed where the process's cannot be read without changing it
+DEFAULT_UMASK = 0o022
+
+
+class EditError(Exception):
+    """An edit could not be validated or applied."""
+
+
+class EditSpec(TypedDict):
+    """One text replacement in a batched edit."""
+    path: str
+    old_text: str
+    new_text: str
+
+
+def process_umask() -> int:
+    """The process umask, read from /proc where available.
+
+    ``os.umask`` can only read it by setting it, which races with other
+    threads creating files, so this never calls it.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return DEFAULT_UMASK
+
+
+def atomic_write(path: Path, content: str, fsync: bool = False, umask: Optional[int] = None) -> None:
+    """Write a file so readers see either the old or the new content.
+
+    The content goes to a temporary file in the same directory, which then
+    replaces the target with ``os.replace``. Existing permissions are kept.
+
+    Args:
+        path: File to write
+        content: New file content
+        fsync: Flush the file and its directory to disk before returning
+        umask: Mask for the permissions of a new file (default: the process's)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~(process_umask() if umask is None else umask)
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EditTransaction:
+    """Collects edits to several files and commits them together.
+
+    All edits are applied in memory first, so a hunk that does not match
+    aborts the whole transaction before any file is touched. ``commit``
+    then replaces each file atomically and, if a later replace fails,
+    restores the files already written.
+    """
+
+    def __init__(self, workspace: Optional[str] = None):
+        self.workspace = Path(workspace).resolve() if workspace else None
+        self._original: dict[Path, Optional[str]] = {}  # None: file did not exist
+        self._content: dict[Path, Optional[str]] = {}  # None: delete the file
+        self._counts: dict[Path, int] = {}
+        self._display: dict[Path, str] = {}
+
+    def resolve(self, path: str) -> Path:
+        """Resolve a path, refusing anything outside the workspace."""
+        file_path = (self.workspace / path if self.workspace else Path(path)).resolve()
+        if self.workspace and not file_path.is_relative_to(self.workspace):
+            raise EditError(f"Access denied: {path} is outside the workspace")
+        self._display.setdefault(file_path, path)
+        return file_path
+
+    def content(self, file_path: Path) -> Optional[str]:
+        """Current in-transaction content of a file (None if absent)."""
+        if file_path not in self._content:
+            try:
+                text = file_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                text = None
+            except IsADirectoryError:
+                raise EditError(f"Not a file: {self._display[file_path]}")
+            self._original[file_path] = text
+            self._content[file_path] = text
+        return self._content[file_path]
+
+    def set_content(self, file_path: Path, text: Optional[str]) -> None:
+        self.content(file_path)
+        self._content[file_path] = text
+        self._counts[file_path] = self._counts.get(file_path, 0) + 1
+
+    def replace(self, path: str, old_text: str, new_text: str) -> None:
+        """Replace the single occurrence of old_text in a file."""
+        file_path = self.resolve(path)
+        text = self.content(file_path)
+        if text is None:
+            raise EditError(f"File not found: {path}")
+        if not old_text:
+            raise EditError(f"{path}: old_text must not be empty")
+        count = text.count(old_text)
+        if count == 0:
+            raise EditError(f"{path}: text to replace not found: {_preview(old_text)}")
+        if count > 1:
+            raise EditError(
+                f"{path}: text to replace occurs {count} times, add surrounding context: {_preview(old_text)}"
+            )
+        self.set_content(file_path, text.replace(old_text, new_text, 1))
+
+    def apply_patch(self, patch: str) -> None:
+        """Apply a unified diff (as produced by ``diff -u`` or ``git diff``)."""
+        for old_path, new_path, hunks in parse_unified_diff(patch):
+            if new_path is None:
+                file_path = self.resolve(old_path)
+                if self.content(file_path) is None:
+                    raise EditError(f"File to delete not found: {old_path}")
+                self.set_content(file_path, None)
+                continue
+
+            file_path = self.resolve(new_path)
+            if old_path is None:
+                if self.content(file_path) is not None:
+                    raise EditError(f"File to create already exists: {new_path}")
+                text = ""
+            else:
+                source = self.resolve(old_path)
+                text = self.content(source)
+                if text is None:
+                    raise EditError(f"File not found: {old_path}")
+                if source != file_path:
+                    self.set_content(source, None)  # Rename
+            self.set_content(file_path, _apply_hunks(text, hunks, new_path))
+
+    def summary(self) -> str:
+        """Human-readable list of files changed."""
+        parts = []
+        for file_path, count in self._counts.items():
+            if self._content[file_path] is None:
+                action = "deleted"
+            elif self._original[file_path] is None:
+                action = "created"
+            else:
+                action = f"{count} edit{'s' if count != 1 else ''}"
+            parts.append(f"{self._display[file_path]} ({action})")
+        return ", ".join(parts)
+
+    def changed_paths(self) -> list[Path]:
+        return [p for p in self._counts if self._content[p] != self._original[p]]
+
+    def commit(self, fsync: bool = False) -> None:
+        """Write all changed files, rolling back on failure."""
+        done: list[Path] = []
+        try:
+            for file_path in self.changed_paths():
+                text = self._content[file_path]
+                if text is None:
+                    file_path.unlink()
+                else:
+                    atomic_write(file_path, text, fsync=fsync)
+                done.append(file_path)
+        except BaseException:
+            for file_path in reversed(done):
+                original = self._original[file_path]
+                try:
+                    if original is None:
+                        file_path.unlink(missing_ok=True)
+                    else:
+                        atomic_write(file_path, original, fsync=fsync)
+                except OSError:
+                    pass
+            raise
+
+
+def unified_diff(path: str, old: Optional[str], new: Optional[str], context_lines: int = 3) -> str:
+    """Unified diff between two versions of a file, in ``git diff`` form.
+    
+    None stands for a missing file. Lines lacking a final newline are
+    marked, so the diff can be applied back with ``apply_patch``.
+    """
+    old_lines = _split_lines(old or "")
+    new_lines = _split_lines(new or "")
+    out = []
+    for line in difflib.unified_diff(
+        old_lines,
+        new_lines,
+        fromfile=f"a/{path}" if old is not None else "/dev/null",
+        tofile=f"b/{path}" if new is not None else "/dev/null",
+        n=context_lines,
+    ):
+        if line.endswith("\n"):
+            out.append(line)
+        else:
+            out.append(line + "\n\\ No newline at end of file\n")
+    return "".join(out)
+
+
+def _split_lines(text: str) -> list[str]:
+    """Split on newlines only, keeping them (unlike ``str.splitlines``)."""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def _preview(text: str, limit: int = 60) -> str:
+    text = text.strip().splitlines()[0] if text.strip() else text
+    return repr(text if len(text) <= limit else text[:limit] + "...")
+
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class Hunk:
+    """One hunk of a unified diff."""
+
+    def __init__(self, old_start: int):
+        self.old_start = old_start
+        self.old_lines: list[str] = []
+        self.new_lines: list[str] = []
+        self.old_eof_newline = True
+        self.new_eof_newline = True
+
+
+def _diff_path(header: str) -> Optional[str]:
+    """Path from a ---/+++ header line, or None for /dev/null."""
+    path = header[4:].split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def parse_unified_diff(patch: str) -> list[tuple[Optional[str], Optional[str], list[Hunk]]]:
+    """Parse a unified diff into (old_path, new_path, hunks) per file."""
+    files: list[tuple[Optional[str], Optional[str], list[Hunk]]] = []
+    lines = patch.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not (line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")):
+            i += 1
+            continue
+        old_path, new_path = _diff_path(line), _diff_path(lines[i + 1])
+        if old_path is None and new_path is None:
+            raise EditError("Diff header has /dev/null on both sides")
+        hunks: list[Hunk] = []
+        i += 2
+        while i < len(lines) and (match := _HUNK_HEADER.match(lines[i])):
+            old_count = int(match.group(2) or 1)
+            new_count = int(match.group(4) or 1)
+            hunk = Hunk(int(match.group(1)))
+            i += 1
+            last = None
+            while i < len(lines) and (old_count > 0 or new_count > 0 or lines[i].startswith("\\")):
+                line = lines[i]
+                tag, body = line[:1], line[1:]
+                if tag == "\\":
+                    # "\ No newline at end of file" applies to the previous line
+                    if last in (" ", "-"):
+                        hunk.old_eof_newline = False
+                    if last in (" ", "+"):
+                        hunk.new_eof_newline = False
+                elif tag in (" ", ""):
+                    hunk.old_lines.append(body)
+                    hunk.new_lines.append(body)
+                    old_count -= 1
+                    new_count -= 1
+                elif tag == "-":
+                    hunk.old_lines.append(body)
+                    old_count -= 1
+                elif tag == "+":
+                    hunk.new_lines.append(body)
+                    new_count -= 1
+                else:
+                    raise EditError(f"Malformed hunk line: {line!r}")
+                last = tag or " "
+                i += 1
+            if old_count > 0 or new_count > 0:
+                raise EditError(f"Truncated hunk at line {i} of the diff")
+            hunks.append(hunk)
+        if not hunks and old_path is not None and new_path is not None:
+            raise EditError(f"No hunks for {new_path}")
+        files.append((old_path, new_path, hunks))
+    if not files:
+        raise EditError("No file changes found in the diff")
+    return files
+
+
+def _join(lines: list[str], eof_newline: bool) -> str:
+    if not lines:
+        return ""
+    return "\n".join(lines) + ("\n" if eof_newline else "")
+
+
+def _apply_hunks(text: str, hunks: list[Hunk], path: str) -> str:
+    """Apply hunks in order, each matched after the previous one.
+
+    A hunk whose context occurs more than once goes to the occurrence
+    closest to its header's line number, shifted by how far the previous
+    hunk was found from its own; a tie is an error.
+    """
+    line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+    out: list[str] = []
+    pos = 0
+    shift = 0  # Lines between where the previous hunk was expected and found
+    for n, hunk in enumerate(hunks, 1):
+        old = _join(hunk.old_lines, hunk.old_eof_newline)
+        new = _join(hunk.new_lines, hunk.new_eof_newline)
+        if not old:
+            if text[pos:]:
+                raise EditError(f"{path}: hunk {n} has no context lines to anchor it")
+            out.append(new)
+            continue
+        expected = max(hunk.old_start - 1, 0) + shift
+        # Prefer a match at a line start; fall back to the file's last line
+        # lacking a newline that the diff did not mark
+        idx = _closest_line_block(text, old, pos, expected, line_starts, path, n)
+        if idx < 0 and old.endswith("\n"):
+            idx = _find_line_block(text, old[:-1], pos)
+            if idx >= 0 and idx + len(old) - 1 == len(text):
+                old, new = old[:-1], new[:-1] if new.endswith("\n") else new
+            else:
+                idx = -1
+        if idx < 0:
+            raise EditError(f"{path}: hunk {n} (line {hunk.old_start}) does not match the file")
+        shift = bisect.bisect_right(line_starts, idx) - 1 - max(hunk.old_start - 1, 0)
+        out.append(text[pos:idx])
+        out.append(new)
+        pos = idx + len(old)
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def _closest_line_block(
+    text: str, block: str, start: int, line: int, line_starts: list[int], path: str, n: int
+) -> int:
+    """Find block at a line boundary at or after start, nearest to a 0-based line.
+
+    Returns -1 if there is no match; raises EditError if two matches are
+    equally near.
+    """
+    best, best_distance, tied = -1, 0, False
+    idx = _find_line_block(text, block, start)
+    while idx >= 0:
+        distance = abs(bisect.bisect_right(line_starts, idx) - 1 - line)
+        if best < 0 or distance < best_distance:
+            best, best_distance, tied = idx, distance, False
+        elif distance == best_distance:
+            tied = True
+        else:
+            break  # Matches only get farther from here on
+        idx = _find_line_block(text, block, idx + 1)
+    if tied:
+        raise EditError(
+            f"{path}: hunk {n} matches equally well {best_distance} lines before and after "
+            f"line {line + 1}; fix its line numbers or add context"
+        )
+    return best
+
+
+def _find_line_block(text: str, block: str, start: int) -> int:
+    """Find block in text at or after start, beginning at a line boundary."""
+    idx = text.find(block, start)
+    while idx > 0 and text[idx - 1] != "\n":
+        idx = text.find(block, idx + 1)
+    return idx
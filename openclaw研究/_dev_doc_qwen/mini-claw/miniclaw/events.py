@@ -0,0 +1,183 @@
+"""Typed events emitted while an agent runs, and the bus delivering them.
+
+Every event carries a wall-clock ``timestamp`` (for logs) and a
+``monotonic`` time from ``time.perf_counter`` (for measuring durations).
+Subscribers are plain or async callables; the agent awaits each one in
+turn, so an async subscriber can apply backpressure but should be quick.
+A failing subscriber is reported as a warning and never breaks the run.
+"""
+
+import inspect
+import time
+import warnings
+from typing import Any, Awaitable, Callable, Optional, Union
+
+
+class Event:
+    """Base class of agent events."""
+
+    type = "event"
+
+    def __init__(self):
+        self.timestamp = time.time()
+        self.monotonic = time.perf_counter()
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable form of the event."""
+        return {"type": self.type, **vars(self)}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if k not in ("timestamp", "monotonic"))
+        return f"{type(self).__name__}({fields})"
+
+
+class RunStarted(Event):
+    """A user message was handed to the agent."""
+
+    type = "run_started"
+
+    def __init__(self, message: str):
+        super().__init__()
+        self.message = message
+
+
+class RunFinished(Event):
+    """The agent finished (or failed) handling a user message."""
+
+    type = "run_finished"
+
+    def __init__(
+        self,
+        turns: int,
+        stop_reason: Optional[str],
+        usage: Optional[dict[str, int]],
+        error: Optional[str] = None,
+    ):
+        super().__init__()
+        self.turns = turns
+        self.stop_reason = stop_reason
+        self.usage = usage
+        self.error = error
+
+
+class TurnStarted(Event):
+    """A new turn (one LLM call and the tools it requests) begins."""
+
+    type = "turn_started"
+
+    def __init__(self, turn: int):
+        super().__init__()
+        self.turn = turn
+
+
+class TurnFinished(Event):
+    """A turn's LLM call and tool executions are done."""
+
+    type = "turn_finished"
+
+    def __init__(self, turn: int, stop_reason: Optional[str]):
+        super().__init__()
+        self.turn = turn
+        self.stop_reason = stop_reason
+
+
+class LLMRequested(Event):
+    """A request is about to be sent to the LLM."""
+
+    type = "llm_requested"
+
+    def __init__(self, turn: int, messages: int):
+        super().__init__()
+        self.turn = turn
+        self.messages = messages
+
+
+class LLMResponded(Event):
+    """The LLM answered (or the request failed)."""
+
+    type = "llm_responded"
+
+    def __init__(
+        self,
+        turn: int,
+        stop_reason: Optional[str] = None,
+        usage: Optional[dict[str, int]] = None,
+        tool_calls: int = 0,
+        error: Optional[str] = None,
+    ):
+        super().__init__()
+        self.turn = turn
+        self.stop_reason = stop_reason
+        self.usage = usage
+        self.tool_calls = tool_calls
+        self.error = error
+
+
+class ToolStarted(Event):
+    """A tool call is about to run."""
+
+    type = "tool_started"
+
+    def __init__(self, turn: int, name: str, arguments: dict[str, Any]):
+        super().__init__()
+        self.turn = turn
+        self.name = name
+        self.arguments = arguments
+
+
+class ToolFinished(Event):
+    """A tool call returned."""
+
+    type = "tool_finished"
+
+    def __init__(self, turn: int, name: str, success: bool, output_chars: int):
+        super().__init__()
+        self.turn = turn
+        self.name = name
+        self.success = success
+        self.output_chars = output_chars
+
+
+Subscriber = Callable[[Event], Union[None, Awaitable[None]]]
+
+
+class EventBus:
+    """Delivers events to subscribers in the order they subscribed."""
+
+    def __init__(self):
+        self._subscribers: list[tuple[Subscriber, Optional[tuple[type, ...]]]] = []
+
+    def subscribe(
+        self,
+        callback: Subscriber,
+        types: Optional[tuple[type, ...]] = None,
+    ) -> Callable[[], None]:
+        """Register a subscriber.
+
+        Args:
+            callback: Called with each event; may be a coroutine function
+            types: Only deliver events of these classes (default: all)
+
+        Returns:
+            A function that unsubscribes the callback
+        """
+        entry = (callback, types)
+        self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    async def emit(self, event: Event) -> None:
+        """Deliver an event to every interested subscriber."""
+        for callback, types in list(self._subscribers):
+            if types is not None and not isinstance(event, types):
+                continue
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                warnings.warn(f"Event subscriber {callback!r} failed on {event.type}: {e}", RuntimeWarning)
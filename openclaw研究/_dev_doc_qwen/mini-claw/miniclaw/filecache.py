@@ -0,0 +1,148 @@
+"""Per-agent cache of workspace file contents.
+
+The file tools read through one shared cache, so a file that has not
+changed on disk is read once per run instead of on every ``read`` or
+``edit``. An entry stays valid while the file's stamp (mtime, size and
+inode) is unchanged; the tools write through the cache, so their own
+writes never leave a stale entry behind, and changes made by anything
+else (e.g. bash) show up as a different stamp.
+
+A stamp alone cannot tell apart two writes within one tick of the
+filesystem clock that leave the size and inode alone (an in-place
+rewrite by bash right after a read). As in git's racy-index check, an
+entry whose mtime is within ``RACY_NS`` of when it was recorded is only
+trusted after its content has been read again and compared.
+
+Each entry also remembers in which turn the model was last shown its
+content, so a repeated read of an unchanged file can be answered with a
+short reference instead of the full text.
+"""
+
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+# Timestamp granularity assumed for any filesystem (FAT has 2 s; most are far finer)
+RACY_NS = 2_000_000_000
+
+
+def file_stamp(path: Path) -> tuple[int, int, int]:
+    """(mtime_ns, size, inode) of a file; atomic replaces change the inode."""
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class CachedFile:
+    """Content of one file as of a given stamp."""
+
+    __slots__ = ("stamp", "text", "seen", "verified_ns")
+
+    def __init__(self, stamp: tuple[int, int, int], text: str, verified_ns: int):
+        self.stamp = stamp
+        self.text = text
+        # When the content was known to match the stamp (wall clock, like mtimes)
+        self.verified_ns = verified_ns
+        # (offset, limit) of a read -> turn in which the model was shown it
+        self.seen: dict[tuple[int, Optional[int]], int] = {}
+
+
+class FileCache:
+    """Content cache keyed by resolved path and validated by file stamp.
+
+    Entries are evicted least-recently-used once the cached text exceeds
+    ``max_chars`` in total.
+    """
+
+    def __init__(self, max_chars: int = 20_000_000):
+        self.max_chars = max_chars
+        self._entries: OrderedDict[Path, CachedFile] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, path: Path) -> CachedFile:
+        """Get the current entry for a file, reading it only if it changed.
+
+        Raises the same errors as reading the file would.
+        """
+        # Stat before reading: a change in between then only costs a re-read
+        now = time.time_ns()
+        stamp = file_stamp(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.stamp == stamp:
+            if stamp[0] < entry.verified_ns - RACY_NS:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            # Racy: the file may have changed again within the same mtime tick
+            text = path.read_text(encoding="utf-8")
+            if text == entry.text:
+                entry.verified_ns = now
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return self._put(path, CachedFile(stamp, text, now))
+        self.misses += 1
+        return self._put(path, CachedFile(stamp, path.read_text(encoding="utf-8"), now))
+
+    def store(self, path: Path, text: str) -> CachedFile:
+        """Record content just written to a file by a tool."""
+        now = time.time_ns()
+        return self._put(path, CachedFile(file_stamp(path), text, now))
+
+    def invalidate(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= len(entry.text)
+
+    def forget_seen(self) -> None:
+        """Forget what the model was shown, e.g. when a new run starts."""
+        for entry in self._entries.values():
+            entry.seen.clear()
+
+    def _put(self, path: Path, entry: CachedFile) -> CachedFile:
+        self.invalidate(path)
+        self._entries[path] = entry
+        self._size += len(entry.text)
+        while self._size > self.max_chars and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.text)
+        return entry
+
+
+class SnapshotStore:
+    """Content of each file as the model last saw it, for delta reads.
+
+    Unlike cache entries, snapshots are not tied to the file on disk: they
+    are what the conversation knows, so they only change when a tool shows
+    the model a file's content or a diff against the snapshot. The oldest
+    snapshots are dropped once they exceed ``max_chars`` in total.
+    """
+
+    def __init__(self, max_chars: int = 20_000_000):
+        self.max_chars = max_chars
+        self._snapshots: OrderedDict[Path, str] = OrderedDict()
+        self._size = 0
+
+    def get(self, path: Path) -> Optional[str]:
+        return self._snapshots.get(path)
+
+    def put(self, path: Path, text: str) -> None:
+        self.discard(path)
+        self._snapshots[path] = text
+        self._size += len(text)
+        while self._size > self.max_chars and len(self._snapshots) > 1:
+            _, evicted = self._snapshots.popitem(last=False)
+            self._size -= len(evicted)
+
+    def discard(self, path: Path) -> None:
+        text = self._snapshots.pop(path, None)
+        if text is not None:
+            self._size -= len(text)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+        self._size = 0
@@ -1,9 +1,15 @@
 """LLM provider abstraction layer."""
 
 from abc import ABC, abstractmethod
-from typing import Optional, Any
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Any
 from pydantic import BaseModel
 
+from .registry import anthropic_tool_definitions, openai_tool_definitions, tool_key
+
+if TYPE_CHECKING:
+    from .retry import RetryPolicy
+
 
 class Message(BaseModel):
     """A chat message."""
@@ -17,11 +23,103 @@ class ToolCall(BaseModel):
     arguments: dict[str, Any]
 
 
+# Normalized stop reasons (Anthropic vocabulary). OpenAI finish reasons are
+# mapped onto these so the agent loop can decide completion without guessing.
+STOP_END_TURN = "end_turn"
+STOP_TOOL_USE = "tool_use"
+STOP_MAX_TOKENS = "max_tokens"
+STOP_SEQUENCE = "stop_sequence"
+
+DEFAULT_MAX_TOKENS = 4096
+
+# A history ending in an assistant message is an answer cut off by max_tokens.
+# Anthropic continues it as a prefill; OpenAI needs to be asked to.
+CONTINUE_PROMPT = "Your last message was cut off by the output limit. Continue exactly where it stopped, without repeating anything."
+
+_OPENAI_FINISH_REASONS = {
+    "stop": STOP_END_TURN,
+    "tool_calls": STOP_TOOL_USE,
+    "function_call": STOP_TOOL_USE,
+    "length": STOP_MAX_TOKENS,
+}
+
+
 class LLMResponse(BaseModel):
     """Response from an LLM."""
     content: Optional[str] = None
     tool_calls: list[ToolCall] = []
     usage: Optional[dict[str, int]] = None
+    stop_reason: Optional[str] = None  # Normalized, see STOP_* constants
+    raw_stop_reason: Optional[str] = None  # As reported by the provider
+
+
+def add_usage(total: dict[str, int], usage: Optional[dict[str, int]]) -> None:
+    """Accumulate one call's token usage (and other counters) into a running total."""
+    if not usage:
+        return
+    for key, value in usage.items():
+        if value is not None:
+            total[key] = total.get(key, 0) + value
+
+
+class _ConvertedHistory:
+    """Provider-format messages converted so far for one history list."""
+    
+    __slots__ = ("first", "last", "count", "messages", "system")
+    
+    def __init__(self):
+        self.first: Optional[Message] = None
+        self.last: Optional[Message] = None
+        self.count = 0
+        self.messages: list[dict[str, str]] = []
+        self.system: list[str] = []  # Contents of system-role messages
+
+
+class MessageCache:
+    """Append-only cache of messages converted to provider format.
+    
+    Agent histories only grow between turns, so each call converts just the
+    messages appended since the previous call instead of the whole history.
+    A history that was changed in place (reset, truncated, replaced) no
+    longer matches its cached first/last message and is converted again.
+    Messages themselves are treated as immutable once added to a history.
+    """
+    
+    def __init__(self, max_histories: int = 32):
+        self.max_histories = max_histories
+        self._histories: OrderedDict[int, _ConvertedHistory] = OrderedDict()
+    
+    def convert(self, messages: list[Message]) -> _ConvertedHistory:
+        """Return the converted form of a history, converting only new messages."""
+        key = id(messages)
+        entry = self._histories.get(key)
+        if entry is None or not self._is_prefix(entry, messages):
+            entry = _ConvertedHistory()
+            self._histories[key] = entry
+        self._histories.move_to_end(key)
+        while len(self._histories) > self.max_histories:
+            self._histories.popitem(last=False)
+        
+        for msg in messages[entry.count:]:
+            if msg.role == "system":
+                entry.system.append(msg.content)
+            elif msg.role in ("user", "assistant"):
+                entry.messages.append({"role": msg.role, "content": msg.content})
+        if len(messages) > entry.count:
+            entry.first = messages[0]
+            entry.last = messages[-1]
+            entry.count = len(messages)
+        return entry
+    
+    @staticmethod
+    def _is_prefix(entry: _ConvertedHistory, messages: list[Message]) -> bool:
+        if entry.count == 0:
+            return True
+        return (
+            len(messages) >= entry.count
+            and messages[0] is entry.first
+            and messages[entry.count - 1] is entry.last
+        )
 
 
 class BaseLLM(ABC):
@@ -30,6 +128,7 @@ class BaseLLM(ABC):
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
+        self._message_cache = MessageCache()
     
     @abstractmethod
     async def chat(
@@ -54,10 +153,27 @@ class BaseLLM(ABC):
 class AnthropicLLM(BaseLLM):
     """Anthropic Claude API implementation."""
     
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-5-20250929"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-5-20250929",
+        max_retries: Optional[int] = None,
+        base_url: Optional[str] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+    ):
         super().__init__(api_key, model)
-        from anthropic import AsyncAnthropic
-        self.client = AsyncAnthropic(api_key=api_key)
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries  # None: the SDK's default
+        self.base_url = base_url  # None: the public API
+        self._client = None
+    
+    @property
+    def client(self):
+        """The SDK client, imported and created on first use."""
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=self.api_key, **_client_options(self.max_retries, self.base_url))
+        return self._client
     
     async def chat(
         self,
@@ -68,35 +184,19 @@ class AnthropicLLM(BaseLLM):
         """Send chat request to Anthropic."""
         from anthropic import NOT_GIVEN
         
-        # Convert messages to Anthropic format
-        anthropic_messages = []
-        for msg in messages:
-            if msg.role == "system":
-                if not system_prompt:
-                    system_prompt = msg.content
-            elif msg.role == "user":
-                anthropic_messages.append({"role": "user", "content": msg.content})
-            elif msg.role == "assistant":
-                anthropic_messages.append({"role": "assistant", "content": msg.content})
+        # Convert new messages to Anthropic format (earlier ones are cached)
+        history = self._message_cache.convert(messages)
+        if not system_prompt and history.system:
+            system_prompt = history.system[0]
         
-        # Build tool definitions for Anthropic
-        if tools:
-            anthropic_tools = [
-                {
-                    "name": name,
-                    "description": self._get_tool_description(name),
-                    "input_schema": self._get_tool_schema(name),
-                }
-                for name in tools.keys()
-            ]
-        else:
-            anthropic_tools = NOT_GIVEN
+        # Tool definitions are generated once per tool set
+        anthropic_tools = anthropic_tool_definitions(tool_key(tools)) if tools else NOT_GIVEN
         
         response = await self.client.messages.create(
             model=self.model,
-            max_tokens=4096,
+            max_tokens=self.max_tokens,
             system=system_prompt or NOT_GIVEN,
-            messages=anthropic_messages,
+            messages=history.messages,
             tools=anthropic_tools,
         )
         
@@ -122,75 +222,35 @@ class AnthropicLLM(BaseLLM):
             content=content,
             tool_calls=tool_calls,
             usage=usage,
+            stop_reason=response.stop_reason,
+            raw_stop_reason=response.stop_reason,
         )
-    
-    def _get_tool_description(self, tool_name: str) -> str:
-        """Get description for a tool."""
-        descriptions = {
-            "bash": "Execute a shell command in the workspace directory",
-            "read": "Read the contents of a file",
-            "write": "Write content to a new file or overwrite an existing file",
-            "edit": "Edit a file by replacing old text with new text",
-            "glob": "Find files matching a glob pattern",
-        }
-        return descriptions.get(tool_name, "Execute a tool")
-    
-    def _get_tool_schema(self, tool_name: str) -> dict:
-        """Get JSON schema for a tool."""
-        schemas = {
-            "bash": {
-                "type": "object",
-                "properties": {
-                    "command": {"type": "string", "description": "The shell command to execute"}
-                },
-                "required": ["command"],
-            },
-            "read": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to read"}
-                },
-                "required": ["path"],
-            },
-            "write": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to write"},
-                    "content": {"type": "string", "description": "Content to write to the file"}
-                },
-                "required": ["path", "content"],
-            },
-            "edit": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to edit"},
-                    "old_text": {"type": "string", "description": "Text to find and replace"},
-                    "new_text": {"type": "string", "description": "Text to replace with"}
-                },
-                "required": ["path", "old_text", "new_text"],
-            },
-            "glob": {
-                "type": "object",
-                "properties": {
-                    "pattern": {"type": "string", "description": "Glob pattern to match files"}
-                },
-                "required": ["pattern"],
-            },
-        }
-        return schemas.get(tool_name, {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        })
 
 
 class OpenAILLM(BaseLLM):
     """OpenAI API implementation."""
     
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o",
+        max_retries: Optional[int] = None,
+        base_url: Optional[str] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+    ):
         super().__init__(api_key, model)
-        from openai import AsyncOpenAI
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries  # None: the SDK's default
+        self.base_url = base_url  # None: the public API
+        self._client = None
+    
+    @property
+    def client(self):
+        """The SDK client, imported and created on first use."""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key, **_client_options(self.max_retries, self.base_url))
+        return self._client
     
     async def chat(
         self,
@@ -201,37 +261,23 @@ class OpenAILLM(BaseLLM):
         """Send chat request to OpenAI."""
         from openai import NOT_GIVEN
         
-        # Convert messages to OpenAI format
-        openai_messages = []
+        # Convert new messages to OpenAI format (earlier ones are cached)
+        history = self._message_cache.convert(messages)
         if system_prompt:
-            openai_messages.append({"role": "system", "content": system_prompt})
-        
-        for msg in messages:
-            if msg.role == "system" and not system_prompt:
-                openai_messages.append({"role": "system", "content": msg.content})
-            elif msg.role in ("user", "assistant"):
-                openai_messages.append({"role": msg.role, "content": msg.content})
-        
-        # Build tool definitions for OpenAI
-        if tools:
-            openai_tools = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": name,
-                        "description": self._get_tool_description(name),
-                        "parameters": self._get_tool_schema(name),
-                    }
-                }
-                for name in tools.keys()
-            ]
+            system_messages = [{"role": "system", "content": system_prompt}]
         else:
-            openai_tools = NOT_GIVEN
+            system_messages = [{"role": "system", "content": content} for content in history.system]
+        openai_messages = system_messages + history.messages
+        if history.messages and history.messages[-1]["role"] == "assistant":
+            openai_messages.append({"role": "user", "content": CONTINUE_PROMPT})
+        
+        # Tool definitions are generated once per tool set
+        openai_tools = openai_tool_definitions(tool_key(tools)) if tools else NOT_GIVEN
         
         response = await self.client.chat.completions.create(
             model=self.model,
             messages=openai_messages,
-            max_tokens=4096,
+            max_tokens=self.max_tokens,
             tools=openai_tools,
         )
         
@@ -242,92 +288,62 @@ class OpenAILLM(BaseLLM):
         tool_calls = []
         
         if message.tool_calls:
+            import json
             for tc in message.tool_calls:
-                import json
+                try:
+                    arguments = json.loads(tc.function.arguments)
+                except json.JSONDecodeError:
+                    if choice.finish_reason != "length":
+                        raise
+                    arguments = {}  # Cut off mid-call; calls of a truncated response are not run
                 tool_calls.append(ToolCall(
                     name=tc.function.name,
-                    arguments=json.loads(tc.function.arguments),
+                    arguments=arguments,
                 ))
         
+        # Use the same usage keys as Anthropic so totals can be accumulated
         usage = {
-            "prompt_tokens": response.usage.prompt_tokens,
-            "completion_tokens": response.usage.completion_tokens,
-            "total_tokens": response.usage.total_tokens,
+            "input_tokens": response.usage.prompt_tokens,
+            "output_tokens": response.usage.completion_tokens,
         } if response.usage else None
         
         return LLMResponse(
             content=content,
             tool_calls=tool_calls,
             usage=usage,
+            stop_reason=_OPENAI_FINISH_REASONS.get(choice.finish_reason, choice.finish_reason),
+            raw_stop_reason=choice.finish_reason,
         )
-    
-    def _get_tool_description(self, tool_name: str) -> str:
-        """Get description for a tool."""
-        descriptions = {
-            "bash": "Execute a shell command in the workspace directory",
-            "read": "Read the contents of a file",
-            "write": "Write content to a new file or overwrite an existing file",
-            "edit": "Edit a file by replacing old text with new text",
-            "glob": "Find files matching a glob pattern",
-        }
-        return descriptions.get(tool_name, "Execute a tool")
-    
-    def _get_tool_schema(self, tool_name: str) -> dict:
-        """Get JSON schema for a tool."""
-        schemas = {
-            "bash": {
-                "type": "object",
-                "properties": {
-                    "command": {"type": "string", "description": "The shell command to execute"}
-                },
-                "required": ["command"],
-            },
-            "read": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to read"}
-                },
-                "required": ["path"],
-            },
-            "write": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to write"},
-                    "content": {"type": "string", "description": "Content to write to the file"}
-                },
-                "required": ["path", "content"],
-            },
-            "edit": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "Path to the file to edit"},
-                    "old_text": {"type": "string", "description": "Text to find and replace"},
-                    "new_text": {"type": "string", "description": "Text to replace with"}
-                },
-                "required": ["path", "old_text", "new_text"],
-            },
-            "glob": {
-                "type": "object",
-                "properties": {
-                    "pattern": {"type": "string", "description": "Glob pattern to match files"}
-                },
-                "required": ["pattern"],
-            },
-        }
-        return schemas.get(tool_name, {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        })
 
 
-def create_llm(provider: str, api_key: str, model: Optional[str] = None) -> BaseLLM:
+def _client_options(max_retries: Optional[int], base_url: Optional[str]) -> dict[str, Any]:
+    """SDK client options that differ from the SDK defaults."""
+    options: dict[str, Any] = {}
+    if max_retries is not None:
+        options["max_retries"] = max_retries
+    if base_url:
+        options["base_url"] = base_url
+    return options
+
+
+def create_llm(
+    provider: str,
+    api_key: str,
+    model: Optional[str] = None,
+    retry: Optional["RetryPolicy"] = None,
+    base_url: Optional[str] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> BaseLLM:
     """Factory function to create an LLM instance.
     
     Args:
         provider: Provider name ("anthropic" or "openai")
         api_key: API key for the provider
         model: Optional model name (uses default if not provided)
+        retry: Retry/hedging policy; the LLM is wrapped in a RetryingLLM and
+            the SDK's own retries are turned off
+        base_url: API endpoint to use instead of the provider's (proxies, local servers)
+        max_tokens: Output token limit per response
     
     Returns:
         BaseLLM instance
@@ -335,9 +351,20 @@ def create_llm(provider: str, api_key: str, model: Optional[str] = None) -> Base
     Raises:
         ValueError: If provider is not supported
     """
+    max_retries = 0 if retry else None
     if provider == "anthropic":
-        return AnthropicLLM(api_key, model or "claude-sonnet-4-5-20250929")
+        llm = AnthropicLLM(
+            api_key,
+            model or "claude-sonnet-4-5-20250929",
+            max_retries=max_retries,
+            base_url=base_url,
+            max_tokens=max_tokens,
+        )
     elif provider == "openai":
-        return OpenAILLM(api_key, model or "gpt-4o")
+        llm = OpenAILLM(api_key, model or "gpt-4o", max_retries=max_retries, base_url=base_url, max_tokens=max_tokens)
     else:
         raise ValueError(f"Unsupported provider: {provider}. Use 'anthropic' or 'openai'.")
+    if retry:
+        from .retry import RetryingLLM
+        return RetryingLLM(llm, retry)
+    return llm
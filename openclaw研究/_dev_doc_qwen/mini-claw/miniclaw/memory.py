@@ -0,0 +1,174 @@
+"""Project memory: facts verified in earlier runs, kept while their files are unchanged.
+
+Each run otherwise rediscovers the same things (how to build and test,
+where the code lives, the project's conventions) at the cost of several
+tool calls. With the ``remember`` tool the model records a fact it has
+verified, together with the files the fact depends on::
+
+    remember(fact="Tests: `uv run pytest -q`; the slow ones are marked `slow`",
+             files=["pyproject.toml"])
+
+Facts are saved to ``.mini-claw/memory.json`` in the workspace when the
+run completes (a run that was stopped, or ran out of turns or budget,
+saves nothing), with the SHA-256 of each file. Each new agent loads the
+facts whose files still hash the same and shows them in its system
+prompt; a fact whose file changed or disappeared has expired and is
+dropped. A file's stamp (mtime, size, inode) is kept next to its hash,
+so unchanged files are only stat'ed, not read.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .checkpoint import STATE_DIR, ensure_state_dir
+from .filecache import file_stamp
+
+
+MEMORY_FILE = "memory.json"
+MAX_FACTS = 40
+MAX_FACT_CHARS = 300
+MAX_PROMPT_CHARS = 3_000
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Fact:
+    """One remembered fact and the file versions it was verified against."""
+
+    def __init__(self, id: str, text: str, files: dict[str, list[Any]], verified: float):
+        self.id = id
+        self.text = text
+        self.files = files  # Workspace-relative path -> [sha256, stamp]
+        self.verified = verified
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"id": self.id, "fact": self.text, "files": self.files, "verified": self.verified}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Fact":
+        return cls(data["id"], data["fact"], data["files"], data.get("verified", 0.0))
+
+
+class ProjectMemory:
+    """The facts remembered for one workspace, and those proposed in the current run."""
+
+    def __init__(self, workspace: Path):
+        self.workspace = workspace
+        self.path = workspace / STATE_DIR / MEMORY_FILE
+        self.facts: list[Fact] = []  # Current facts, oldest first
+        self.pending: list[tuple[str, list[str], Optional[str]]] = []  # (fact, files, replaces)
+        self.expired = 0  # Facts dropped when loading because a file changed
+
+    @classmethod
+    def load(cls, workspace: Path) -> "ProjectMemory":
+        """Load a workspace's memory, dropping expired facts."""
+        memory = cls(workspace)
+        facts = memory._read()
+        memory.facts = [fact for fact in facts if memory._current(fact)]
+        memory.expired = len(facts) - len(memory.facts)
+        return memory
+
+    def _read(self) -> list[Fact]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return [Fact.from_dict(entry) for entry in data["facts"]]
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return []
+
+    def _current(self, fact: Fact) -> bool:
+        """Whether every file of a fact still has the content it was verified against."""
+        for name, (digest, stamp) in fact.files.items():
+            path = self.workspace / name
+            try:
+                now = list(file_stamp(path))
+                if now == stamp:
+                    continue
+                if _sha256(path) != digest:
+                    return False
+            except OSError:
+                return False
+            fact.files[name] = [digest, now]  # Touched but unchanged
+        return True
+
+    def propose(self, text: str, files: list[str], replaces: Optional[str] = None) -> Optional[str]:
+        """Queue a fact to be saved when the run completes.
+
+        Returns:
+            Why the fact cannot be remembered, or None if it was queued
+        """
+        text = " ".join(text.split())
+        if not text:
+            return "The fact is empty"
+        if len(text) > MAX_FACT_CHARS:
+            return f"Keep facts under {MAX_FACT_CHARS} characters; split longer ones"
+        if not files:
+            return "Name the files the fact depends on, so it expires when they change"
+        names = []
+        for name in files:
+            path = (self.workspace / name).resolve()
+            try:
+                names.append(path.relative_to(self.workspace).as_posix())
+            except ValueError:
+                return f"{name} is outside the workspace"
+            if not path.is_file():
+                return f"{name} is not a file"
+        if replaces is not None and not any(fact.id == replaces for fact in self.facts):
+            return f"No remembered fact {replaces!r}"
+        self.pending.append((text, names, replaces))
+        return None
+
+    def end_run(self, commit: bool) -> None:
+        """Save the facts proposed during a run (or drop them), and forget expired ones."""
+        pending, self.pending = self.pending, []
+        if not commit:
+            pending = []
+        if not pending and not self.expired:
+            return
+
+        # Merge with what other agents in this workspace may have saved meanwhile
+        facts = [fact for fact in self._read() if self._current(fact)]
+        replaced = {replaces for _, _, replaces in pending if replaces}
+        texts = {text for text, _, _ in pending}
+        facts = [fact for fact in facts if fact.id not in replaced and fact.text not in texts]
+        next_id = 1 + max((int(fact.id[1:]) for fact in facts if fact.id[1:].isdigit()), default=0)
+        for text, names, _ in pending:
+            try:
+                files = {name: [_sha256(self.workspace / name), list(file_stamp(self.workspace / name))] for name in names}
+            except OSError:
+                continue  # A file went away during the run
+            facts.append(Fact(f"m{next_id}", text, files, time.time()))
+            next_id += 1
+        self.facts = facts[-MAX_FACTS:]
+        self.expired = 0
+
+        ensure_state_dir(self.workspace)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps({"facts": [fact.to_dict() for fact in self.facts]}, indent=1), encoding="utf-8")
+        os.replace(temp, self.path)
+
+    def prompt_section(self) -> str:
+        """The facts for the system prompt, most recent first, within ``MAX_PROMPT_CHARS``."""
+        if not self.facts:
+            return ""
+        lines: list[str] = []
+        size = 0
+        for fact in reversed(self.facts):
+            line = f"- [{fact.id}] {fact.text} ({', '.join(fact.files)})"
+            size += len(line) + 1
+            if size > MAX_PROMPT_CHARS:
+                break
+            lines.append(line)
+        return (
+            "Project memory (facts verified in earlier runs; each holds while the files in "
+            "parentheses are unchanged, so rely on it instead of re-exploring):\n" + "\n".join(lines)
+        )
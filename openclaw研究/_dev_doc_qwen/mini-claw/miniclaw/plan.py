@@ -0,0 +1,246 @@
+"""Declarative tool pipelines, run locally in one tool call.
+
+Many tasks are mechanical chains such as "glob, then read every match,
+then keep the lines mentioning X", which cost one LLM round trip per
+step. The ``run_plan`` tool takes the whole chain as a list of steps::
+
+    [
+      {"name": "files", "tool": "glob", "args": {"pattern": "src/**/*.py"}, "show": false},
+      {"tool": "read", "for_each": "files", "args": {"path": "{item}"}, "filter": "TODO|FIXME"}
+    ]
+
+- A step calls one tool with ``args``. Its output lines are its *items*.
+- ``for_each`` maps the step over the items of an earlier step: the tool
+  is called once per item, concurrently, with ``{item}`` in string
+  arguments replaced by the item.
+- ``filter`` keeps only the output lines matching a regular expression;
+  if the expression has a group, the items become what the first group
+  captured (deduplicated), e.g. ``"^([^:]+):"`` for the paths of search
+  hits. ``limit`` keeps the first N items.
+- Consecutive steps with ``"parallel": true`` run at the same time.
+- ``show: false`` leaves a step out of the result (it still feeds later
+  steps).
+
+The shown outputs are aggregated into one result whose size is budgeted
+fairly: short outputs are kept whole and the long ones share the rest.
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Optional, Required, TypedDict
+
+
+MAX_STEPS = 20
+MAX_CALLS = 200
+MAX_CONCURRENCY = 8
+
+_NOTICE_CHARS = 40
+
+
+class PlanStep(TypedDict, total=False):
+    """One step of a tool pipeline."""
+    tool: Required[str]
+    args: dict[str, Any]
+    name: str
+    for_each: str
+    filter: str
+    limit: int
+    parallel: bool
+    show: bool
+
+
+class PlanError(Exception):
+    """A plan is malformed or exceeds the plan limits."""
+
+
+# (tool name, arguments) -> (success, output, error)
+ToolCaller = Callable[[str, dict[str, Any]], Awaitable[tuple[bool, str, Optional[str]]]]
+
+
+class _Call:
+    """One tool call of a step and its (filtered) outcome."""
+
+    def __init__(self, item: Optional[str]):
+        self.item = item
+        self.success = True
+        self.output = ""
+        self.error: Optional[str] = None
+        self.items: list[str] = []
+
+
+class StepResult:
+    """The calls a step made and the items it passes on."""
+
+    def __init__(self, name: str, step: PlanStep, calls: list[_Call], items: list[str]):
+        self.name = name
+        self.step = step
+        self.calls = calls
+        self.items = items
+
+
+def _substitute(value: Any, item: Optional[str]) -> Any:
+    if item is None:
+        return value
+    if isinstance(value, str):
+        return value.replace("{item}", item)
+    if isinstance(value, list):
+        return [_substitute(v, item) for v in value]
+    if isinstance(value, dict):
+        return {k: _substitute(v, item) for k, v in value.items()}
+    return value
+
+
+def validate(steps: list[PlanStep], tools: set[str]) -> list[str]:
+    """Check a plan's structure before anything runs; returns the step names.
+
+    Raises:
+        PlanError: If a step is malformed or refers to a later or unknown step
+    """
+    if not steps:
+        raise PlanError("The plan has no steps")
+    if len(steps) > MAX_STEPS:
+        raise PlanError(f"The plan has {len(steps)} steps; at most {MAX_STEPS} are allowed")
+    names: list[str] = []
+    for number, step in enumerate(steps, 1):
+        if not isinstance(step, dict) or not isinstance(step.get("tool"), str):
+            raise PlanError(f"Step {number} needs a \"tool\"")
+        if step["tool"] not in tools:
+            raise PlanError(f"Step {number}: unknown or disallowed tool {step['tool']!r}")
+        if not isinstance(step.get("args", {}), dict):
+            raise PlanError(f"Step {number}: \"args\" must be an object")
+        source = step.get("for_each")
+        if source is not None and source not in names:
+            raise PlanError(f"Step {number}: for_each refers to {source!r}, which is not an earlier step")
+        if step.get("filter") is not None:
+            try:
+                re.compile(step["filter"])
+            except re.error as e:
+                raise PlanError(f"Step {number}: invalid filter: {e}") from None
+        name = str(step.get("name") or number)
+        if name in names:
+            raise PlanError(f"Step {number}: duplicate step name {name!r}")
+        names.append(name)
+    return names
+
+
+async def execute(steps: list[PlanStep], call_tool: ToolCaller, tools: set[str]) -> list[StepResult]:
+    """Run a plan's steps, in order of the plan.
+
+    Raises:
+        PlanError: If the plan is malformed or would make too many calls
+    """
+    names = validate(steps, tools)
+    items: dict[str, list[str]] = {}
+    results: list[StepResult] = []
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    calls_made = 0
+
+    async def run_call(step: PlanStep, call: _Call, pattern: Optional[re.Pattern]) -> None:
+        async with semaphore:
+            success, output, error = await call_tool(step["tool"], _substitute(step.get("args", {}), call.item))
+        call.success, call.error = success, error
+        lines = output.splitlines()
+        if pattern is not None:
+            matches = [(line, pattern.search(line)) for line in lines]
+            lines = [line for line, match in matches if match]
+            call.output = "\n".join(lines)
+            if pattern.groups:
+                call.items = [match.group(1) for _, match in matches if match and match.group(1) is not None]
+            else:
+                call.items = lines
+        else:
+            call.output = output
+            call.items = lines if success else []
+
+    async def run_step(name: str, step: PlanStep) -> StepResult:
+        nonlocal calls_made
+        source = step.get("for_each")
+        inputs: list[Optional[str]] = list(items[source]) if source else [None]
+        if calls_made + len(inputs) > MAX_CALLS:
+            raise PlanError(f"Step {name!r} would bring the plan over {MAX_CALLS} tool calls; it and later steps did not run")
+        calls_made += len(inputs)
+        calls = [_Call(item) for item in inputs]
+        pattern = re.compile(step["filter"]) if step.get("filter") is not None else None
+        await asyncio.gather(*(run_call(step, call, pattern) for call in calls))
+        # Items feed later steps: deduplicated, in order, capped by limit
+        step_items = list(dict.fromkeys(item for call in calls for item in call.items if item.strip()))
+        if step.get("limit"):
+            step_items = step_items[: step["limit"]]
+        items[name] = step_items
+        return StepResult(name, step, calls, step_items)
+
+    # Group consecutive parallel steps into stages
+    stages: list[list[int]] = []
+    for index, step in enumerate(steps):
+        if step.get("parallel") and stages and steps[stages[-1][-1]].get("parallel"):
+            stages[-1].append(index)
+        else:
+            stages.append([index])
+    for stage in stages:
+        for index in stage:
+            source = steps[index].get("for_each")
+            if source is not None and names.index(source) >= stage[0]:
+                raise PlanError(f"Step {names[index]!r} maps over {source!r}, which runs in parallel with it")
+        results.extend(await asyncio.gather(*(run_step(names[index], steps[index]) for index in stage)))
+    return results
+
+
+def render(results: list[StepResult], max_chars: int) -> tuple[str, bool]:
+    """Aggregate the shown steps' outputs within a character budget.
+
+    Returns:
+        The text, and whether any output was shortened to fit
+    """
+    blocks: list[tuple[str, str]] = []  # (header, body)
+    for result in results:
+        step, calls = result.step, result.calls
+        failed = sum(1 for call in calls if not call.success)
+        summary = f"[{result.name}] {step['tool']}"
+        if step.get("for_each"):
+            summary += f" x{len(calls)} over {step['for_each']}"
+        if step.get("filter") is not None:
+            summary += f" filter {step['filter']!r}"
+        summary += f": {len(result.items)} item(s)"
+        if failed:
+            summary += f", {failed} failed"
+        if step.get("show") is False:
+            blocks.append((summary + " (hidden)", ""))
+            continue
+        blocks.append((summary, ""))
+        for call in calls:
+            body = call.output
+            if not call.success:
+                body = f"{body}\nError: {call.error or 'Unknown error'}".lstrip("\n")
+            if step.get("filter") is not None and not body:
+                continue  # Nothing matched: leave the call out
+            header = f"--- {call.item}" if call.item is not None else ""
+            blocks.append((header, body or "(no output)"))
+
+    # Headers are always kept, and shortened outputs get a notice line
+    fixed = sum(len(header) + 1 + (_NOTICE_CHARS if body else 0) for header, body in blocks)
+    budget = max(max_chars - fixed, 0)
+    # Fair share: outputs shorter than an equal split keep everything, the rest share what is left
+    sizes = sorted(len(body) for _, body in blocks if body)
+    share, remaining = budget, budget
+    for count, size in enumerate(sizes):
+        share = remaining // (len(sizes) - count)
+        if size > share:
+            break
+        remaining -= size
+    else:
+        share = budget
+
+    lines: list[str] = []
+    cut = False
+    for header, body in blocks:
+        if header:
+            lines.append(header)
+        if not body:
+            continue
+        if len(body) > share:
+            keep = body[:share].rsplit("\n", 1)[0] if "\n" in body[:share] else body[:share]
+            omitted = body.count("\n") - keep.count("\n")
+            body = f"{keep}\n[... {omitted} more line(s) not shown]"
+            cut = True
+        lines.append(body)
+    return "\n".join(lines), cut
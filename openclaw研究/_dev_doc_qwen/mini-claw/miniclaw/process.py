@@ -0,0 +1,201 @@
+"""Streaming subprocess runner with bounded output capture."""
+
+import asyncio
+import codecs
+import os
+import signal
+from collections import deque
+from typing import Callable, Optional
+
+
+DEFAULT_TIMEOUT = 300  # 5 minutes
+DEFAULT_CAPTURE_BYTES = 1_000_000
+READ_CHUNK_BYTES = 64 * 1024
+MAX_STREAM_LINE_CHARS = 4096
+KILL_GRACE_SECONDS = 2.0
+
+
+class OutputCapture:
+    """Keeps the first and last bytes of a stream, dropping the middle.
+
+    Memory stays bounded by ``max_bytes`` however much the process prints.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CAPTURE_BYTES):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail: deque[bytes] = deque()
+        self.tail_size = 0
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data: bytes) -> None:
+        """Append a chunk of output."""
+        self.total_bytes += len(data)
+        if len(self.head) < self.head_limit:
+            room = self.head_limit - len(self.head)
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        # Ring buffer: drop whole chunks, then trim the oldest one
+        while self.tail and self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail[0])
+            self.dropped_bytes += len(self.tail.popleft())
+        excess = self.tail_size - self.tail_limit
+        if self.tail and excess > 0:
+            self.tail[0] = self.tail[0][excess:]
+            self.tail_size -= excess
+            self.dropped_bytes += excess
+
+    def text(self) -> str:
+        """Decode the captured output, marking any dropped middle."""
+        head = bytes(self.head).decode("utf-8", "replace")
+        tail = b"".join(self.tail).decode("utf-8", "replace")
+        if not self.dropped_bytes:
+            return head + tail
+        return (
+            f"{head}\n[... {self.dropped_bytes:,} of {self.total_bytes:,} bytes of output "
+            f"were not kept ...]\n{tail}"
+        )
+
+
+class LineEmitter:
+    """Decodes output incrementally and forwards complete lines."""
+
+    def __init__(self, callback: Callable[[str], None]):
+        self.callback = callback
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.pending = ""
+
+    def feed(self, data: bytes) -> None:
+        self.pending += self.decoder.decode(data)
+        *lines, self.pending = self.pending.split("\n")
+        for line in lines:
+            self.callback(line)
+        while len(self.pending) > MAX_STREAM_LINE_CHARS:
+            self.callback(self.pending[:MAX_STREAM_LINE_CHARS])
+            self.pending = self.pending[MAX_STREAM_LINE_CHARS:]
+
+    def close(self) -> None:
+        self.pending += self.decoder.decode(b"", final=True)
+        if self.pending:
+            self.callback(self.pending)
+            self.pending = ""
+
+
+class CommandResult:
+    """Result of a finished (or killed) command."""
+
+    def __init__(self, returncode: Optional[int], output: str, timed_out: bool, total_bytes: int):
+        self.returncode = returncode
+        self.output = output
+        self.timed_out = timed_out
+        self.total_bytes = total_bytes
+
+
+async def run_command(
+    command: str,
+    cwd: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_output_bytes: int = DEFAULT_CAPTURE_BYTES,
+    on_output: Optional[Callable[[str], None]] = None,
+    env: Optional[dict[str, str]] = None,
+    umask: Optional[int] = None,
+) -> CommandResult:
+    """Run a shell command, streaming its output as it arrives.
+
+    stdout and stderr are merged in arrival order. Each complete line is
+    passed to ``on_output``; only a bounded head/tail capture is kept for
+    the result. The command runs in its own process group, which is killed
+    on timeout or when the calling task is cancelled (e.g. on Ctrl-C).
+
+    Args:
+        command: Shell command to run
+        cwd: Working directory
+        timeout: Seconds before the process group is killed
+        max_output_bytes: Bytes of output kept for the result
+        on_output: Optional callback receiving output lines as they arrive
+        env: Environment of the command (default: this process's)
+        umask: File mode creation mask of the command (default: this process's)
+
+    Returns:
+        CommandResult with exit code and captured output
+    """
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+        env=env,
+        umask=-1 if umask is None else umask,
+    )
+    capture = OutputCapture(max_output_bytes)
+    emitter = LineEmitter(on_output) if on_output else None
+
+    async def pump() -> None:
+        while chunk := await proc.stdout.read(READ_CHUNK_BYTES):
+            capture.feed(chunk)
+            if emitter:
+                emitter.feed(chunk)
+
+    reader = asyncio.ensure_future(pump())
+    timed_out = False
+    try:
+        # One deadline for both: a command may close its output and keep running
+        await asyncio.wait_for(asyncio.gather(asyncio.shield(reader), proc.wait()), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        await _kill_process_group(proc)
+    except asyncio.CancelledError:
+        await _kill_process_group(proc)
+        reader.cancel()
+        raise
+    finally:
+        if not reader.done():
+            # Descendants that left the process group can hold the pipe open
+            try:
+                await asyncio.wait_for(reader, KILL_GRACE_SECONDS)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        if emitter:
+            emitter.close()
+
+    return CommandResult(
+        returncode=proc.returncode,
+        output=capture.text(),
+        timed_out=timed_out,
+        total_bytes=capture.total_bytes,
+    )
+
+
+async def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    """Terminate the process group, escalating to SIGKILL after a grace period.
+
+    Where there are no process groups (Windows), only the shell itself is
+    terminated and then killed.
+    """
+    if proc.returncode is not None:
+        return
+    for kill in _group_killers(proc):
+        try:
+            kill()
+        except (ProcessLookupError, PermissionError):
+            return
+        try:
+            await asyncio.wait_for(proc.wait(), KILL_GRACE_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+def _group_killers(proc: asyncio.subprocess.Process) -> tuple[Callable[[], None], ...]:
+    """Terminate, then kill, the process's group (or the process alone)."""
+    if hasattr(os, "killpg"):
+        return (lambda: os.killpg(proc.pid, signal.SIGTERM), lambda: os.killpg(proc.pid, signal.SIGKILL))
+    return (proc.terminate, proc.kill)
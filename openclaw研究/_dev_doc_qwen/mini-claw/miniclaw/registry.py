@@ -0,0 +1,178 @@
+"""Tool schemas generated from tool function signatures.
+
+Schemas are derived once per tool function from its signature and the
+``Args:`` section of its docstring, then cached together with the
+provider-specific tool definitions built from them. LLM calls reuse the
+cached definitions instead of rebuilding them on every turn.
+"""
+
+import inspect
+import re
+import types
+import typing
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
+
+from .tools import TOOL_DESCRIPTIONS
+
+
+# Parameters supplied by the agent, never by the model
+INJECTED_PARAMETERS = frozenset({"cwd", "context"})
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+
+class ToolSpec:
+    """Name, description and JSON schema of one tool."""
+    
+    __slots__ = ("name", "description", "parameters")
+    
+    def __init__(self, name: str, description: str, parameters: dict[str, Any]):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+    
+    def __repr__(self) -> str:
+        return f"ToolSpec({self.name!r})"
+
+
+def _json_schema(annotation: Any) -> dict[str, Any]:
+    """Map a Python type annotation to a JSON schema fragment."""
+    if typing.is_typeddict(annotation):
+        hints = typing.get_type_hints(annotation)
+        return {
+            "type": "object",
+            "properties": {name: _json_schema(hint) for name, hint in hints.items()},
+            "required": sorted(annotation.__required_keys__),
+        }
+    origin = typing.get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _json_schema(args[0]) if args else {}
+    if origin is not None:
+        schema = {"type": _JSON_TYPES.get(origin, "string")}
+        args = typing.get_args(annotation)
+        if origin is list and args:
+            schema["items"] = _json_schema(args[0])
+        return schema
+    return {"type": _JSON_TYPES.get(annotation, "string")}
+
+
+def _docstring_args(func: Callable[..., Any]) -> dict[str, str]:
+    """Parse ``name: description`` lines from a Google-style Args section."""
+    doc = inspect.getdoc(func) or ""
+    match = re.search(r"^Args:\n((?:[ \t]+.*\n?)+)", doc, re.MULTILINE)
+    if not match:
+        return {}
+    descriptions = {}
+    for line in match.group(1).splitlines():
+        name, sep, description = line.strip().partition(":")
+        if sep and name.isidentifier():
+            descriptions[name] = description.strip()
+    return descriptions
+
+
+@lru_cache(maxsize=None)
+def tool_spec(name: str, func: Callable[..., Any]) -> ToolSpec:
+    """Build the spec for a tool function (cached per function)."""
+    hints = typing.get_type_hints(func)
+    arg_docs = _docstring_args(func)
+    properties: dict[str, Any] = {}
+    required: list[str] = []
+    
+    for param in inspect.signature(func).parameters.values():
+        if param.name in INJECTED_PARAMETERS:
+            continue
+        prop = _json_schema(hints.get(param.name, str))
+        if param.name in arg_docs:
+            prop["description"] = arg_docs[param.name]
+        properties[param.name] = prop
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+    
+    summary = (inspect.getdoc(func) or "").split("\n", 1)[0].rstrip(".")
+    return ToolSpec(
+        name=name,
+        description=TOOL_DESCRIPTIONS.get(name) or summary or "Execute a tool",
+        parameters={"type": "object", "properties": properties, "required": required},
+    )
+
+
+@lru_cache(maxsize=64)
+def anthropic_tool_definitions(tools: tuple[tuple[str, Callable[..., Any]], ...]) -> tuple[dict[str, Any], ...]:
+    """Anthropic ``tools`` parameter for a set of (name, function) pairs."""
+    return tuple(
+        {
+            "name": spec.name,
+            "description": spec.description,
+            "input_schema": spec.parameters,
+        }
+        for spec in (tool_spec(name, func) for name, func in tools)
+    )
+
+
+@lru_cache(maxsize=64)
+def openai_tool_definitions(tools: tuple[tuple[str, Callable[..., Any]], ...]) -> tuple[dict[str, Any], ...]:
+    """OpenAI ``tools`` parameter for a set of (name, function) pairs."""
+    return tuple(
+        {
+            "type": "function",
+            "function": {
+                "name": spec.name,
+                "description": spec.description,
+                "parameters": spec.parameters,
+            },
+        }
+        for spec in (tool_spec(name, func) for name, func in tools)
+    )
+
+
+def tool_key(tools: Optional[dict[str, Any]]) -> tuple[tuple[str, Callable[..., Any]], ...]:
+    """Hashable cache key for a tools dict."""
+    return tuple(tools.items()) if tools else ()
+
+
+_PYTHON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def check_arguments(name: str, func: Callable[..., Any], arguments: dict[str, Any]) -> Optional[str]:
+    """Check a tool call's arguments against the tool's schema.
+    
+    Args:
+        name: Tool name
+        func: Tool function
+        arguments: Arguments the model supplied
+    
+    Returns:
+        The first problem found, or None if the arguments are valid
+    """
+    parameters = tool_spec(name, func).parameters
+    properties = parameters["properties"]
+    for param in parameters["required"]:
+        if param not in arguments:
+            return f"{name}: missing required argument {param!r}"
+    for param, value in arguments.items():
+        if param not in properties:
+            return f"{name}: unknown argument {param!r}"
+        schema_type = properties[param].get("type")
+        expected = _PYTHON_TYPES.get(schema_type)
+        if expected is None or value is None:
+            continue
+        # bool is an int subclass, but not a valid JSON integer/number
+        if not isinstance(value, expected) or (isinstance(value, bool) and schema_type != "boolean"):
+            return f"{name}: argument {param!r} should be {schema_type}"
+    return None
@@ -0,0 +1,223 @@
+"""Retries, backoff and hedged requests for LLM calls.
+
+``RetryingLLM`` wraps a provider LLM so that a transient failure (rate
+limit, overload, 5xx, connection error, attempt timeout) does not end the
+agent run:
+
+- every attempt is bounded by ``attempt_timeout``;
+- failed attempts are retried with full-jitter exponential backoff, or
+  after the server's ``retry-after`` when it sends one;
+- optionally, when an attempt is slower than the p95 of recent calls, a
+  second identical request is fired and whichever answers first wins.
+  Hedging trades a few extra requests for a shorter latency tail.
+
+The provider SDKs' own retries are switched off (``max_retries=0``) so
+attempts are not multiplied. Each response's usage gains ``attempts``
+and, with hedging on, ``hedges`` and ``hedge_wins``; the agent sums them
+per run like token counts.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+from .llm import BaseLLM, LLMResponse, Message
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server
+# errors and Anthropic's 529 "overloaded"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class RetryPolicy:
+    """How LLM calls are retried and hedged."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 60.0,
+        attempt_timeout: Optional[float] = 300.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+    ):
+        """Initialize the policy.
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff before the first retry (doubles per retry, jittered)
+            max_delay: Upper bound of any wait between attempts, retry-after included
+            attempt_timeout: Seconds before an attempt is abandoned (None: no limit)
+            hedge: Fire a second request when an attempt is slower than usual
+            hedge_quantile: Latency quantile of recent calls after which to hedge
+            hedge_min_samples: Calls to observe before hedging starts
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before the given retry (1 for the first)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+def retry_info(error: BaseException) -> tuple[bool, Optional[float]]:
+    """Whether an error is transient, and the delay the server asked for.
+
+    Works with both provider SDKs: status errors carry ``status_code`` and
+    the HTTP response, and connection errors (timeouts included) derive
+    from a class named ``APIConnectionError`` in each of them.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True, None
+    if any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__):
+        return True, None
+    status = getattr(error, "status_code", None)
+    if status not in RETRYABLE_STATUS:
+        return False, None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return True, parse_retry_after(headers)
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``retry-after`` headers."""
+    try:
+        if value := headers.get("retry-after-ms"):
+            return max(float(value) / 1000, 0.0)
+        if value := headers.get("retry-after"):
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                # HTTP date form
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class RetryingLLM(BaseLLM):
+    """An LLM whose calls are retried, time-limited and optionally hedged."""
+
+    def __init__(self, llm: BaseLLM, policy: Optional[RetryPolicy] = None):
+        """Initialize the wrapper.
+
+        Args:
+            llm: The provider LLM to call
+            policy: Retry and hedging policy (default: RetryPolicy())
+        """
+        super().__init__(llm.api_key, llm.model)
+        self.llm = llm
+        self.policy = policy or RetryPolicy()
+        self.latencies: deque[float] = deque(maxlen=200)  # Recent successful calls
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to hedge an attempt, once enough calls were seen."""
+        if not self.policy.hedge or len(self.latencies) < self.policy.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * self.policy.hedge_quantile), len(ordered) - 1)]
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        """Send a chat request, retrying transient failures."""
+        self.stats["calls"] += 1
+        counts = {"attempts": 0, "hedges": 0, "hedge_wins": 0}
+        retry = 0
+        while True:
+            try:
+                response = await self._attempt(messages, system_prompt, tools, counts)
+                break
+            except Exception as e:
+                retryable, retry_after = retry_info(e)
+                retry += 1
+                if not retryable or retry >= self.policy.max_attempts:
+                    raise
+                self.stats["retries"] += 1
+                delay = retry_after if retry_after is not None else self.policy.backoff(retry)
+                await asyncio.sleep(min(delay, self.policy.max_delay))
+
+        usage = dict(response.usage or {})
+        usage["attempts"] = counts["attempts"]
+        if self.policy.hedge:
+            usage["hedges"] = counts["hedges"]
+            usage["hedge_wins"] = counts["hedge_wins"]
+        return response.model_copy(update={"usage": usage})
+
+    async def _attempt(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str],
+        tools: Optional[dict[str, Any]],
+        counts: dict[str, int],
+    ) -> LLMResponse:
+        """One attempt: a request, plus a hedge request if it runs long."""
+        def request() -> asyncio.Task:
+            counts["attempts"] += 1
+            self.stats["attempts"] += 1
+            return asyncio.ensure_future(self._timed(messages, system_prompt, tools))
+
+        primary = request()
+        delay = self.hedge_delay()
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            hedge = request()
+            tasks.add(hedge)
+            counts["hedges"] += 1
+            self.stats["hedges"] += 1
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            counts["hedge_wins"] += 1
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # Retrieved, so a losing failure is not logged
+                else:
+                    task.cancel()
+
+    async def _timed(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str],
+        tools: Optional[dict[str, Any]],
+    ) -> LLMResponse:
+        """A single request under the attempt timeout, recording its latency."""
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.llm.chat(messages, system_prompt=system_prompt, tools=tools),
+                self.policy.attempt_timeout,
+            )
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        self.latencies.append(time.perf_counter() - start)
+        return response
@@ -0,0 +1,240 @@
+"""Latency-aware routing across LLM backends, with circuit breakers.
+
+``RouterLLM`` holds several configured backends (provider + model), in
+order of preference, and sends each call to the healthiest one:
+
+- every backend keeps a rolling window of call latencies and outcomes;
+- its circuit breaker opens after consecutive failures (or a high error
+  rate), so no traffic goes there during a cooldown that doubles each
+  time a half-open probe fails;
+- among backends whose breaker lets a request through, the first in
+  preference order is used unless another one's health score (median
+  latency, inflated by its error rate) is clearly better;
+- a call that fails on one backend with a backend-specific error (rate
+  limit, overload, outage, auth) is retried on the next healthiest one.
+
+Agent history is provider-neutral (``Message`` lists) and each backend
+converts it to its own wire format, so a conversation can move between
+Anthropic and OpenAI backends from one turn to the next.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from .llm import BaseLLM, LLMResponse, Message
+from .retry import RetryPolicy, retry_info
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops traffic to a failing backend for a cooldown, then probes it."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        cooldown: float = 15.0,
+        max_cooldown: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            error_rate_threshold: Error rate over the backend's window that opens it
+            cooldown: Seconds the breaker stays open the first time
+            max_cooldown: Cap of the cooldown, which doubles after each failed probe
+            clock: Time source (monotonic seconds)
+        """
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def allows(self) -> bool:
+        """Whether a request may be sent now (open breakers admit one probe after the cooldown)."""
+        if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            return not self._probing
+        return self.state == CLOSED
+
+    def before_request(self) -> None:
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def after_request(self) -> None:
+        """End a request; a probe that told nothing (e.g. it was cancelled) lets the next one through."""
+        self._probing = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker admits a probe."""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.cooldown - self.clock(), 0.0)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, error_rate: float, samples: int) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # The probe failed: back off for longer
+            self._open(min(self.cooldown * 2, self.max_cooldown))
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= self.failure_threshold
+            or (samples >= 10 and error_rate >= self.error_rate_threshold)
+        ):
+            self._open(self.base_cooldown)
+
+    def _open(self, cooldown: float) -> None:
+        self.state = OPEN
+        self.cooldown = cooldown
+        self.opened_at = self.clock()
+        self._probing = False
+
+
+class Backend:
+    """One routable LLM with its rolling statistics and breaker."""
+
+    def __init__(self, name: str, llm: BaseLLM, window: int = 20, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.llm = llm
+        self.latencies: deque[float] = deque(maxlen=window)  # Successful calls
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def score(self) -> Optional[float]:
+        """Health score, lower is better; None before any successful call."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2] * (1 + 4 * self.error_rate)
+
+    def record(self, success: bool, latency: float) -> None:
+        self.calls += 1
+        self.outcomes.append(success)
+        if success:
+            self.latencies.append(latency)
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.breaker.record_failure(self.error_rate, len(self.outcomes))
+
+    def stats(self) -> dict[str, Any]:
+        score = self.score()
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "p50_seconds": round(sorted(self.latencies)[len(self.latencies) // 2], 3) if self.latencies else None,
+            "score": round(score, 3) if score is not None else None,
+            "breaker": self.breaker.state,
+        }
+
+
+def backend_specific(error: BaseException) -> bool:
+    """Whether another backend might succeed where this one failed."""
+    retryable, _ = retry_info(error)
+    return retryable or getattr(error, "status_code", None) in (401, 403, 404)
+
+
+class RouterLLM(BaseLLM):
+    """Sends each call to the healthiest of several LLM backends."""
+
+    def __init__(self, backends: list[Backend], switch_ratio: float = 1.5, max_attempts: Optional[int] = None):
+        """Initialize the router.
+
+        Args:
+            backends: Backends in order of preference
+            switch_ratio: How much better (lower) another backend's score must
+                be to take traffic from a more preferred one
+            max_attempts: Tries per call across backends (default: one per backend)
+        """
+        if not backends:
+            raise ValueError("RouterLLM needs at least one backend")
+        super().__init__(backends[0].llm.api_key, backends[0].llm.model)
+        self.backends = backends
+        self.switch_ratio = switch_ratio
+        self.max_attempts = max_attempts or len(backends)
+
+    def choose(self, exclude: tuple[Backend, ...] = ()) -> Optional[Backend]:
+        """The backend the next request should go to, if any admits one."""
+        candidates = [b for b in self.backends if b not in exclude and b.breaker.allows()]
+        if not candidates:
+            return None
+        best = candidates[0]
+        for backend in candidates[1:]:
+            score, best_score = backend.score(), best.score()
+            if score is not None and best_score is not None and score * self.switch_ratio < best_score:
+                best = backend
+        return best
+
+    async def chat(
+        self,
+        messages: list[Message],
+        system_prompt: Optional[str] = None,
+        tools: Optional[dict[str, Any]] = None,
+    ) -> LLMResponse:
+        """Send a chat request to the healthiest backend, failing over on backend errors."""
+        tried: list[Backend] = []
+        error: Optional[BaseException] = None
+        for _ in range(self.max_attempts):
+            backend = self.choose(exclude=tuple(tried)) or self.choose()
+            if backend is None:
+                # Every breaker is open: wait for the first to admit a probe
+                backend = min(self.backends, key=lambda b: b.breaker.retry_in())
+                await asyncio.sleep(backend.breaker.retry_in())
+                if not backend.breaker.allows():
+                    continue
+            if backend in tried:
+                # Nothing else to fail over to: back off before trying it again
+                await asyncio.sleep(RetryPolicy().backoff(tried.count(backend)))
+            backend.breaker.before_request()
+            tried.append(backend)
+            start = time.perf_counter()
+            try:
+                response = await backend.llm.chat(messages, system_prompt=system_prompt, tools=tools)
+            except Exception as e:
+                # A bad request would fail anywhere; it says nothing about the backend
+                if not backend_specific(e):
+                    raise
+                backend.record(False, time.perf_counter() - start)
+                error = e
+                continue
+            else:
+                backend.record(True, time.perf_counter() - start)
+            finally:
+                backend.breaker.after_request()
+            if len(tried) > 1:
+                usage = dict(response.usage or {})
+                usage["failovers"] = len(tried) - 1
+                response = response.model_copy(update={"usage": usage})
+            return response
+        raise error or RuntimeError("No LLM backend available")
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Rolling statistics per backend, by name."""
+        return {backend.name: backend.stats() for backend in self.backends}
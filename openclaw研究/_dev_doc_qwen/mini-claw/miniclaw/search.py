@@ -0,0 +1,249 @@
+"""Persisted full-text index of the workspace for the search tool.
+
+Files are split into chunks of a few lines and indexed with SQLite FTS5,
+which ranks chunks by BM25. The index lives in
+``<workspace>/.mini-claw/search.db`` and is brought up to date before each
+query: the file list comes from the shared workspace index (so ignored
+paths are never indexed), and only files whose mtime or size changed are
+read and re-indexed.
+
+Identifiers are indexed both whole and split into words, so a query like
+"workspace index" finds ``WorkspaceIndex`` and ``get_workspace_index``.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .checkpoint import ensure_state_dir
+from .workspace import get_workspace_index
+
+
+SCHEMA_VERSION = 1
+CHUNK_LINES = 10
+MAX_FILE_BYTES = 1_000_000
+MAX_LINE_CHARS = 200
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Words that would match nearly every chunk of a natural-language query
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "of", "on", "or", "the", "this", "to", "what",
+    "when", "where", "which", "who", "why", "with",
+})
+
+
+class SearchError(Exception):
+    """The search index could not be built or queried."""
+
+
+def _split_words(text: str) -> list[str]:
+    """Sub-words of camelCase identifiers (snake_case is split by FTS5)."""
+    words = []
+    for identifier in _IDENTIFIER.findall(text):
+        for part in identifier.split("_"):
+            pieces = _CAMEL_PART.findall(part)
+            if len(pieces) > 1:
+                words.extend(pieces)
+    return words
+
+
+def query_terms(query: str) -> list[str]:
+    """Lower-cased search terms of a free-text query, without stopwords."""
+    terms = []
+    for word in _WORD.findall(query) + _split_words(query):
+        word = word.lower()
+        if word not in _STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+class SearchHit:
+    """One ranked match: a file line and its chunk's BM25 score."""
+
+    def __init__(self, path: str, line: int, text: str, score: float):
+        self.path = path
+        self.line = line
+        self.text = text
+        self.score = score
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}: {self.text}"
+
+
+class SearchIndex:
+    """FTS5 index of the files of one workspace.
+
+    Use ``get_search_index(root)`` to share one index per workspace.
+    """
+
+    def __init__(self, root: str, db_path: Optional[Path] = None):
+        self.root = Path(root).resolve()
+        self.db_path = db_path or ensure_state_dir(self.root) / "search.db"
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.close()
+                self.db_path.unlink(missing_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._create_schema(conn)
+        except sqlite3.DatabaseError:
+            # Corrupt or unreadable: the index can always be rebuilt
+            self.db_path.unlink(missing_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._create_schema(conn)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        try:
+            with conn:
+                conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER)")
+                conn.execute(
+                    "CREATE VIRTUAL TABLE chunks USING fts5("
+                    "path UNINDEXED, start_line UNINDEXED, content UNINDEXED, terms)"
+                )
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except sqlite3.OperationalError as e:
+            raise SearchError(f"SQLite FTS5 is not available: {e}")
+
+    def update(self) -> int:
+        """Re-index files added or changed since the last update.
+
+        Returns:
+            Number of files (re)indexed or removed
+        """
+        with self._lock:
+            indexed = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in self._conn.execute("SELECT path, mtime_ns, size FROM files")
+            }
+            changed = 0
+            with self._conn:
+                current = set()
+                for rel in get_workspace_index(str(self.root)).files():
+                    try:
+                        st = os.stat(self.root / rel)
+                    except OSError:
+                        continue
+                    current.add(rel)
+                    if indexed.get(rel) == (st.st_mtime_ns, st.st_size):
+                        continue
+                    self._index_file(rel, st.st_mtime_ns, st.st_size)
+                    changed += 1
+                for rel in indexed.keys() - current:
+                    self._conn.execute("DELETE FROM chunks WHERE path = ?", (rel,))
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+                    changed += 1
+            return changed
+
+    def _index_file(self, rel: str, mtime_ns: int, size: int) -> None:
+        self._conn.execute("DELETE FROM chunks WHERE path = ?", (rel,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            (rel, mtime_ns, size),
+        )
+        text = _read_text(self.root / rel, size)
+        if text is None:
+            return  # Binary or too large: remembered, but not searchable
+        lines = text.split("\n")
+        rows = []
+        for start in range(0, len(lines), CHUNK_LINES):
+            content = "\n".join(lines[start:start + CHUNK_LINES])
+            if not content.strip():
+                continue
+            # The path is searchable too, so "search tool" finds search.py
+            terms = " ".join([rel, content, *_split_words(rel + "\n" + content)])
+            rows.append((rel, start + 1, content, terms))
+        self._conn.executemany(
+            "INSERT INTO chunks (path, start_line, content, terms) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+    def search(self, query: str, k: int = 10) -> list[SearchHit]:
+        """Find the k best matching lines for a free-text query.
+
+        Chunks are ranked by BM25 over all query terms (any may match);
+        each hit points at the chunk line matching the most terms.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        self.update()
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, start_line, content, bm25(chunks) FROM chunks "
+                "WHERE chunks MATCH ? ORDER BY bm25(chunks) LIMIT ?",
+                (match, max(k, 1) * 3),
+            ).fetchall()
+
+        hits: list[SearchHit] = []
+        per_file: dict[str, int] = {}
+        for path, start_line, content, rank in rows:
+            # Spread results over files rather than listing one file's chunks
+            if per_file.get(path, 0) >= 2:
+                continue
+            per_file[path] = per_file.get(path, 0) + 1
+            offset, line = _best_line(content, terms)
+            hits.append(SearchHit(path, start_line + offset, line, -rank))
+            if len(hits) >= k:
+                break
+        return hits
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _read_text(path: Path, size: int) -> Optional[str]:
+    """File content as text, or None for binary or oversized files."""
+    if size > MAX_FILE_BYTES:
+        return None
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", "replace")
+
+
+def _best_line(content: str, terms: list[str]) -> tuple[int, str]:
+    """(offset, text) of the chunk line containing the most query terms."""
+    best, best_score = 0, -1
+    lines = content.split("\n")
+    for i, line in enumerate(lines):
+        words = {w.lower() for w in _WORD.findall(line) + _split_words(line)}
+        score = sum(term in words for term in terms)
+        if score > best_score:
+            best, best_score = i, score
+    text = lines[best].strip()
+    if len(text) > MAX_LINE_CHARS:
+        text = text[:MAX_LINE_CHARS] + "..."
+    return best, text
+
+
+_INDEXES: dict[Path, SearchIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_search_index(root: str) -> SearchIndex:
+    """Get the shared search index for a workspace root, opening it on first use."""
+    key = Path(root).resolve()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = SearchIndex(str(key))
+        return index
@@ -0,0 +1,215 @@
+"""Append-only session journals with compact snapshots, for resuming.
+
+Each conversation is journaled to ``.mini-claw/sessions/<id>.jsonl`` in
+the workspace, one JSON entry per line::
+
+    {"op": "session", "id": "20261019-142233-5f3a", "created": ..., "workspace": ...}
+    {"op": "message", "role": "user", "content": "Fix the failing test"}
+    {"op": "message", "role": "assistant", "content": "..."}
+    {"op": "clear"}
+
+Entries are only ever appended (and flushed after every turn), so a crash
+loses at most the turn in progress; a torn last line is dropped on
+resume. Every ``snapshot_every`` entries, and when the journal is closed,
+the current history is written to ``<id>.snapshot.json`` together with
+the journal size it covers. Resuming loads the snapshot and replays only
+the entries appended after it, so its cost is proportional to the
+snapshot plus the tail, not to everything the session ever journaled.
+"""
+
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from .checkpoint import STATE_DIR, ensure_state_dir
+from .events import RunFinished, TurnFinished
+from .llm import Message
+
+if TYPE_CHECKING:
+    from .agent import Agent
+
+
+SESSIONS_DIR = "sessions"
+
+
+def sessions_dir(workspace: Path) -> Path:
+    return workspace / STATE_DIR / SESSIONS_DIR
+
+
+def new_session_id() -> str:
+    """A new session id, sortable by creation time."""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(2)
+
+
+class SessionJournal:
+    """The journal and latest snapshot of one session."""
+
+    def __init__(self, path: Path, snapshot_every: int = 200):
+        """Initialize the journal (use ``create`` or ``open``).
+
+        Args:
+            path: Journal file (``<id>.jsonl``)
+            snapshot_every: Entries appended between snapshots
+        """
+        self.path = path
+        self.id = path.stem
+        self.snapshot_path = path.with_suffix(".snapshot.json")
+        self.snapshot_every = snapshot_every
+        self.messages: list[Message] = []  # History as journaled so far
+        self.meta: dict[str, Any] = {}
+        self._file = None
+        self._since_snapshot = 0
+
+    @classmethod
+    def create(cls, workspace: Path, **meta: Any) -> "SessionJournal":
+        """Start a new session journal in a workspace."""
+        directory = ensure_state_dir(workspace) / SESSIONS_DIR
+        directory.mkdir(exist_ok=True)
+        journal = cls(directory / f"{new_session_id()}.jsonl")
+        journal.meta = {"op": "session", "id": journal.id, "created": time.time(), "workspace": str(workspace), **meta}
+        journal._file = open(journal.path, "xb")
+        journal._write(journal.meta)
+        journal._file.flush()
+        return journal
+
+    @classmethod
+    def open(cls, workspace: Path, session_id: Optional[str] = None) -> "SessionJournal":
+        """Reopen a session of a workspace to continue it.
+
+        Args:
+            workspace: Workspace the session belongs to
+            session_id: Session to resume (default: the most recent one)
+
+        Raises:
+            FileNotFoundError: If there is no such session
+        """
+        directory = sessions_dir(workspace)
+        if session_id is None:
+            ids = list_sessions(workspace)
+            if not ids:
+                raise FileNotFoundError(f"No sessions in {directory}")
+            session_id = ids[0]["id"]
+        path = directory / f"{session_id}.jsonl"
+        if not path.exists():
+            raise FileNotFoundError(f"No session {session_id!r} in {directory}")
+        journal = cls(path)
+        journal._load()
+        journal._file = open(journal.path, "ab")
+        return journal
+
+    def _load(self) -> None:
+        """Rebuild the history from the snapshot plus the journal tail."""
+        offset = 0
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            self.meta = snapshot["meta"]
+            self.messages = [Message(role=role, content=content) for role, content in snapshot["messages"]]
+            offset = snapshot["offset"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.messages = []
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        end = offset
+        for line in tail.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # Torn write from a crash
+            self._apply(json.loads(line))
+            end += len(line)
+            self._since_snapshot += 1
+        if end < offset + len(tail):
+            os.truncate(self.path, end)
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        op = entry.get("op")
+        if op == "message":
+            self.messages.append(Message(role=entry["role"], content=entry["content"]))
+        elif op == "clear":
+            self.messages = []
+        elif op == "session":
+            self.meta = entry
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def attach(self, agent: "Agent") -> None:
+        """Journal an agent's history after each of its turns and runs."""
+        agent.events.subscribe(lambda event: self.sync(agent.history), (TurnFinished, RunFinished))
+
+    def sync(self, history: list[Message]) -> None:
+        """Journal the messages added to a history since the last sync.
+
+        A history that was cleared or replaced is journaled as a clear
+        followed by its current messages.
+        """
+        count = len(self.messages)
+        if len(history) < count or (count and history[count - 1] is not self.messages[-1]):
+            self._write({"op": "clear"})
+            self._since_snapshot += 1
+            self.messages = []
+            count = 0
+        for message in history[count:]:
+            self._write({"op": "message", "role": message.role, "content": message.content})
+            self.messages.append(message)
+            self._since_snapshot += 1
+        self._file.flush()
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Write the current history as a snapshot of the journal so far."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        data = {
+            "meta": self.meta,
+            "offset": self._file.tell(),
+            "messages": [[message.role, message.content] for message in self.messages],
+        }
+        temp = self.snapshot_path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        """Snapshot anything not yet covered and close the journal."""
+        if self._file is None:
+            return
+        if self._since_snapshot:
+            self.snapshot()
+        self._file.close()
+        self._file = None
+
+
+def list_sessions(workspace: Path) -> list[dict[str, Any]]:
+    """Sessions of a workspace, most recently updated first.
+
+    Snapshots are not loaded: the id, creation and update times and the
+    first user message (as a title) come from a journal's first lines, and
+    the number of entries from counting its lines.
+    """
+    sessions = []
+    for path in sessions_dir(workspace).glob("*.jsonl"):
+        title = ""
+        with open(path, "rb") as f:
+            head = [f.readline() for _ in range(2)]
+            f.seek(0)
+            entries = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+        try:
+            meta = json.loads(head[0])
+            if head[1]:
+                title = json.loads(head[1]).get("content", "").strip().split("\n", 1)[0][:60]
+        except ValueError:
+            continue
+        sessions.append({
+            "id": path.stem,
+            "created": meta.get("created", 0.0),
+            "updated": path.stat().st_mtime,
+            "title": title,
+            "entries": max(entries - 1, 0),
+        })
+    sessions.sort(key=lambda s: s["updated"], reverse=True)
+    return sessions
@@ -0,0 +1,220 @@
+"""Persistent shell session for the bash tool.
+
+A single long-lived bash process runs every command of an agent, so
+``cd``, exported variables and activated virtualenvs carry over between
+calls instead of being re-established each time. Commands are written to
+the shell's stdin; their output goes through a PTY, so programs see a
+terminal. Each command is followed by a unique sentinel line carrying its
+exit status and the shell's working directory, which marks where its
+output ends.
+
+A command that exceeds its timeout (or is cancelled) takes the whole
+session down with it: the process group is killed and the next command
+starts a fresh shell in the last known working directory.
+"""
+
+import asyncio
+import os
+import pty
+import signal
+import termios
+import uuid
+from typing import Callable, Optional
+
+from .process import DEFAULT_CAPTURE_BYTES, DEFAULT_TIMEOUT, CommandResult, OutputCapture, LineEmitter
+
+
+# Keep interactive helpers (pagers, colors) from waiting on or cluttering the PTY
+SESSION_ENV = {
+    "TERM": "dumb",
+    "NO_COLOR": "1",
+    "PAGER": "cat",
+    "GIT_PAGER": "cat",
+}
+
+KILL_GRACE_SECONDS = 2.0
+
+
+class ShellSession:
+    """A bash process kept alive across commands."""
+
+    def __init__(
+        self,
+        cwd: str,
+        shell: str = "/bin/bash",
+        env: Optional[dict[str, str]] = None,
+        umask: Optional[int] = None,
+    ):
+        self.cwd = cwd  # Last known working directory
+        self.shell = shell
+        # Environment and umask the shell starts with (default: this process's)
+        self.env = env
+        self.umask = umask
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._master: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._pending = bytearray()
+        self._marker = b""
+        self._done: Optional[asyncio.Future] = None
+        self._capture: Optional[OutputCapture] = None
+        self._emitter: Optional[LineEmitter] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    async def _start(self) -> None:
+        master, slave = pty.openpty()
+        # No \n -> \r\n translation on output
+        attrs = termios.tcgetattr(slave)
+        attrs[1] &= ~termios.OPOST
+        termios.tcsetattr(slave, termios.TCSANOW, attrs)
+        try:
+            self._proc = await asyncio.create_subprocess_exec(
+                self.shell, "--noprofile", "--norc",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=slave,
+                stderr=slave,
+                cwd=self.cwd if os.path.isdir(self.cwd) else None,
+                env={**(os.environ if self.env is None else self.env), **SESSION_ENV},
+                umask=-1 if self.umask is None else self.umask,
+                start_new_session=True,
+            )
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        os.set_blocking(master, False)
+        self._master = master
+        asyncio.get_running_loop().add_reader(master, self._on_readable)
+
+    async def run(
+        self,
+        command: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_output_bytes: int = DEFAULT_CAPTURE_BYTES,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """Run a command in the session and wait for its sentinel.
+
+        Args:
+            command: Shell command (may span several lines)
+            timeout: Seconds before the session is killed and restarted
+            max_output_bytes: Bytes of output kept for the result
+            on_output: Optional callback receiving output lines as they arrive
+
+        Returns:
+            CommandResult with exit code and captured output
+        """
+        async with self._lock:
+            if not self.alive:
+                await self.close()
+                await self._start()
+
+            token = f"__MINICLAW_{uuid.uuid4().hex}__"
+            self._marker = f"\n{token}:".encode()
+            self._pending.clear()
+            self._capture = OutputCapture(max_output_bytes)
+            self._emitter = LineEmitter(on_output) if on_output else None
+            self._done = asyncio.get_running_loop().create_future()
+
+            # The braces make bash parse the whole command before running it;
+            # stdin is /dev/null so commands cannot swallow the sentinel
+            script = f"{{ {command}\n}} </dev/null; printf '\\n%s:%s:%s\\n' '{token}' \"$?\" \"$PWD\"\n"
+            self._proc.stdin.write(script.encode())
+
+            timed_out = False
+            returncode: Optional[int] = None
+            try:
+                await self._proc.stdin.drain()
+                returncode = await asyncio.wait_for(asyncio.shield(self._done), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                await self.close()
+            except asyncio.CancelledError:
+                await self.close()
+                raise
+            except (EOFError, ConnectionError):
+                # The command ended the shell (e.g. `exit`)
+                await self.close()
+            finally:
+                if self._emitter:
+                    self._emitter.close()
+
+            output = self._capture.text()
+            if timed_out or returncode is None:
+                output += "\n[Shell session was restarted; environment changes were lost]"
+            return CommandResult(
+                returncode=returncode,
+                output=output,
+                timed_out=timed_out,
+                total_bytes=self._capture.total_bytes,
+            )
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._master, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""  # EIO: every writer to the PTY has exited
+        if not data:
+            asyncio.get_running_loop().remove_reader(self._master)
+            if self._done is not None and not self._done.done():
+                self._flush(len(self._pending))
+                self._done.set_exception(EOFError())
+            return
+        if self._done is None or self._done.done():
+            return  # Output after the sentinel (background jobs) is dropped
+
+        self._pending += data
+        idx = self._pending.find(self._marker)
+        if idx < 0:
+            # Hold back a possible partial marker at the end
+            self._flush(max(len(self._pending) - len(self._marker) + 1, 0))
+            return
+        end = self._pending.find(b"\n", idx + len(self._marker))
+        if end < 0:
+            self._flush(idx)
+            return
+        status = self._pending[idx + len(self._marker):end].decode("utf-8", "replace")
+        self._flush(idx)
+        self._pending.clear()
+        code, _, cwd = status.partition(":")
+        if cwd:
+            self.cwd = cwd
+        self._done.set_result(int(code) if code.isdigit() else None)
+
+    def _flush(self, count: int) -> None:
+        """Hand the first count pending bytes to the output consumers."""
+        if count <= 0:
+            return
+        chunk = bytes(self._pending[:count])
+        del self._pending[:count]
+        self._capture.feed(chunk)
+        if self._emitter:
+            self._emitter.feed(chunk)
+
+    async def close(self) -> None:
+        """Kill the shell and everything it started."""
+        if self._master is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._master)
+            except (RuntimeError, ValueError):
+                pass
+            os.close(self._master)
+            self._master = None
+        proc, self._proc = self._proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                return
+            try:
+                await asyncio.wait_for(proc.wait(), KILL_GRACE_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                continue
@@ -0,0 +1,307 @@
+"""Parallel sub-agents, each in its own git worktree.
+
+The ``delegate`` tool hands independent sub-tasks to child agents that
+run at the same time, each with its own turn limit and run budget. A
+child works in a detached ``git worktree`` of a snapshot of the parent's
+working tree (uncommitted and untracked files included; ignored ones,
+such as build outputs, are not), so children neither see nor clobber
+each other's edits. A worktree shares the repository's objects, so
+creating one costs a checkout, not a clone or a copy.
+
+When the children are done, each one's changes are taken as a binary
+diff against the snapshot and applied to the parent's working tree in
+task order, recorded in the parent's checkpoint so that undo reverts
+them. A diff that does not apply (two children changed the same lines),
+or that comes from a child stopped by its budget, is not merged but
+saved under ``.mini-claw/subagents/`` for the model to inspect and apply
+with multi_edit. The worktrees are removed afterwards.
+"""
+
+import asyncio
+import os
+import secrets
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional, Required, TypedDict
+
+from .budget import INTERRUPTED, Budget
+from .checkpoint import CheckpointStore, ensure_state_dir
+
+if TYPE_CHECKING:
+    from .agent import Agent, AgentResult
+
+
+WORKTREES_DIR = "worktrees"
+PATCHES_DIR = "subagents"
+MAX_TASKS = 16
+
+_RESPONSE_CHARS = 2_000
+
+# The snapshot commit needs an identity even where git has none configured
+_GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "mini-claw",
+    "GIT_AUTHOR_EMAIL": "mini-claw@localhost",
+    "GIT_COMMITTER_NAME": "mini-claw",
+    "GIT_COMMITTER_EMAIL": "mini-claw@localhost",
+}
+
+
+class SubTask(TypedDict, total=False):
+    """One sub-task for a child agent."""
+    task: Required[str]
+    max_turns: int
+    deadline: float
+
+
+class GitError(Exception):
+    """A git command failed (or the workspace is not in a git repository)."""
+
+
+async def git(*args: str, cwd: Path, env: Optional[dict[str, str]] = None, input: Optional[bytes] = None) -> bytes:
+    """Run a git command and return its standard output.
+
+    Raises:
+        GitError: If git exits with a non-zero status
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        env={**os.environ, **env} if env else None,
+        stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate(input)
+    if proc.returncode:
+        message = stderr.decode("utf-8", "replace").strip() or f"exit status {proc.returncode}"
+        raise GitError(f"git {args[0]}: {message}")
+    return stdout
+
+
+def in_git_repository(path: Path) -> bool:
+    """Whether a directory is inside a git work tree (and git is installed)."""
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--is-inside-work-tree"],
+            cwd=path,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+        )
+    except OSError:
+        return False
+    return proc.returncode == 0 and proc.stdout.strip() == b"true"
+
+
+async def snapshot(root: Path) -> str:
+    """Commit the working tree as it is, without touching HEAD, the index or any branch.
+
+    Returns:
+        The id of a commit (parented on HEAD, if there is one) of every
+        tracked and untracked, non-ignored file
+    """
+    index = Path((await git("rev-parse", "--git-path", "index", cwd=root)).decode().strip())
+    with tempfile.TemporaryDirectory() as directory:
+        temp_index = Path(directory) / "index"
+        if (root / index).exists():
+            # Starting from the real index keeps its stat data, so unchanged files are not rehashed
+            shutil.copyfile(root / index, temp_index)
+        env = {"GIT_INDEX_FILE": str(temp_index)}
+        await git("add", "-A", cwd=root, env=env)
+        tree = (await git("write-tree", cwd=root, env=env)).decode().strip()
+    try:
+        parents = ["-p", (await git("rev-parse", "--verify", "--quiet", "HEAD", cwd=root)).decode().strip()]
+    except GitError:
+        parents = []  # No commits yet
+    commit = await git("commit-tree", tree, *parents, "-m", "mini-claw sub-agent base", cwd=root, env=_GIT_IDENTITY)
+    return commit.decode().strip()
+
+
+class ChildResult:
+    """What one child agent did, and what became of its changes."""
+
+    def __init__(self, index: int, task: SubTask):
+        self.index = index
+        self.task = task
+        self.result: Optional["AgentResult"] = None
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+        self.patch = b""  # Binary diff against the snapshot
+        self.files: list[str] = []  # Changed paths, relative to the repository root
+        self.stat = ""
+        self.merged = False
+        self.conflict: Optional[str] = None
+        self.saved: Optional[Path] = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return f"failed ({self.error})"
+        if self.result is None:
+            return "did not run"
+        if self.result.exhausted == INTERRUPTED:
+            return "interrupted"
+        if self.result.exhausted:
+            return f"stopped: {self.result.exhausted} budget exhausted"
+        return self.result.stop_reason or "done"
+
+    def summary(self) -> str:
+        """A report of the child for the parent model."""
+        turns = self.result.turns if self.result else 0
+        lines = [f"[{self.index}] {self.task['task'].strip().splitlines()[0][:80]}"]
+        lines.append(f"Status: {self.status}, {turns} turn(s), {self.seconds:.1f}s")
+        if not self.files:
+            lines.append("Changes: none")
+        elif self.merged:
+            lines.append(f"Changes: merged ({len(self.files)} file(s))")
+        else:
+            why = f"did not apply: {self.conflict}" if self.conflict else "not merged because the child did not finish"
+            lines.append(f"Changes: {why}; the diff is saved in {self.saved}")
+        if self.stat:
+            lines.append(self.stat.rstrip())
+        if self.result and self.result.response:
+            response = self.result.response.strip()
+            if len(response) > _RESPONSE_CHARS:
+                response = response[:_RESPONSE_CHARS] + " [...]"
+            lines.append(f"Response: {response}")
+        return "\n".join(lines)
+
+
+class SubAgentPool:
+    """Runs sub-tasks in child agents, in worktrees of the parent's repository."""
+
+    def __init__(
+        self,
+        spawn: Callable[[str], "Agent"],
+        jobs: int = 4,
+        budget: Optional[Budget] = None,
+        max_turns: int = 10,
+    ):
+        """Initialize the pool.
+
+        Args:
+            spawn: Creates a child agent working in the given directory
+            jobs: Maximum number of children running at once
+            budget: Each child's run budget (a sub-task's deadline overrides its deadline)
+            max_turns: Each child's turn limit, unless a sub-task sets its own
+        """
+        self.spawn = spawn
+        self.jobs = max(1, jobs)
+        self.budget = budget or Budget()
+        self.max_turns = max_turns
+        # Worktree bookkeeping in .git is not safe to update concurrently
+        self._git_lock = asyncio.Lock()
+
+    async def run(
+        self,
+        tasks: list[SubTask],
+        workspace: Path,
+        checkpoints: Optional[CheckpointStore] = None,
+    ) -> list[ChildResult]:
+        """Run sub-tasks concurrently and merge their changes into the workspace.
+
+        Args:
+            tasks: The sub-tasks, merged in this order
+            workspace: The parent's workspace (inside a git repository)
+            checkpoints: The parent's checkpoints, to make merged changes undoable
+
+        Raises:
+            GitError: If the workspace is not in a git repository or its snapshot fails
+        """
+        workspace = workspace.resolve()
+        try:
+            root = Path((await git("rev-parse", "--show-toplevel", cwd=workspace)).decode().strip()).resolve()
+        except GitError:
+            raise GitError(f"{workspace} is not in a git repository; sub-agents need one for their worktrees") from None
+        base = await snapshot(root)
+        run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(2)
+        trees = ensure_state_dir(workspace) / WORKTREES_DIR
+        subdir = workspace.relative_to(root)
+        semaphore = asyncio.Semaphore(self.jobs)
+        children = [ChildResult(index, task) for index, task in enumerate(tasks, 1)]
+
+        async def run_bounded(child: ChildResult) -> None:
+            async with semaphore:
+                await self._run_child(child, root, trees / f"{run_id}-{child.index}", subdir, base)
+
+        # A child that fails (e.g. its worktree cannot be added) must not abandon the others
+        outcomes = await asyncio.gather(*(run_bounded(child) for child in children), return_exceptions=True)
+        for child, outcome in zip(children, outcomes):
+            if isinstance(outcome, Exception):
+                child.error = child.error or f"{type(outcome).__name__}: {outcome}"
+            elif isinstance(outcome, BaseException):
+                raise outcome
+        for child in children:
+            await self._merge(child, root, workspace, run_id, checkpoints)
+        return children
+
+    async def _run_child(self, child: ChildResult, root: Path, tree: Path, subdir: Path, base: str) -> None:
+        """Run one child in a fresh worktree and collect its diff; the worktree is removed."""
+        start = time.perf_counter()
+        async with self._git_lock:
+            await git("worktree", "add", "--detach", "--quiet", str(tree), base, cwd=root)
+        try:
+            workdir = tree / subdir
+            workdir.mkdir(parents=True, exist_ok=True)
+            agent = self.spawn(str(workdir))
+            agent.max_turns = child.task.get("max_turns") or self.max_turns
+            budget = self.budget
+            if child.task.get("deadline"):
+                budget = Budget(
+                    deadline=child.task["deadline"],
+                    max_input_tokens=budget.max_input_tokens,
+                    max_output_tokens=budget.max_output_tokens,
+                    max_tool_seconds=budget.max_tool_seconds,
+                )
+            try:
+                child.result = await agent.run(child.task["task"], budget=budget)
+            except Exception as e:
+                child.error = f"{type(e).__name__}: {e}"
+            finally:
+                await agent.close()
+            # The child's own state directory ignores itself, so only its work is staged
+            await git("add", "-A", cwd=tree)
+            diff = ("diff", "--cached", "--no-renames", base)
+            child.patch = await git(*diff, "--binary", cwd=tree)
+            child.files = (await git(*diff, "--name-only", cwd=tree)).decode().splitlines()
+            child.stat = (await git(*diff, "--stat", cwd=tree)).decode()
+        finally:
+            child.seconds = time.perf_counter() - start
+            async with self._git_lock:
+                await self._remove(root, tree)
+
+    async def _remove(self, root: Path, tree: Path) -> None:
+        try:
+            await git("worktree", "remove", "--force", str(tree), cwd=root)
+        except GitError:
+            shutil.rmtree(tree, ignore_errors=True)
+            await git("worktree", "prune", cwd=root)
+
+    async def _merge(
+        self,
+        child: ChildResult,
+        root: Path,
+        workspace: Path,
+        run_id: str,
+        checkpoints: Optional[CheckpointStore],
+    ) -> None:
+        """Apply a finished child's diff to the working tree, or save it."""
+        if not child.patch:
+            return
+        if child.result is not None and not child.error and not child.result.exhausted:
+            if checkpoints:
+                for name in child.files:
+                    checkpoints.record(root / name, atomic_writer=False)
+            try:
+                # All or nothing: a diff that does not apply cleanly leaves the tree untouched
+                await git("apply", "--whitespace=nowarn", "-", cwd=root, input=child.patch)
+                child.merged = True
+                return
+            except GitError as e:
+                child.conflict = str(e).splitlines()[0]
+        directory = ensure_state_dir(workspace) / PATCHES_DIR
+        directory.mkdir(exist_ok=True)
+        child.saved = directory / f"{run_id}-{child.index}.patch"
+        child.saved.write_bytes(child.patch)
@@ -1,9 +1,38 @@
 """Core tools for Mini-Claw agent."""
 
-import subprocess
+import asyncio
+import copy
+import inspect
+import itertools
 import glob as glob_module
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from .checkpoint import CheckpointStore
+from .edits import EditError, EditSpec, EditTransaction, atomic_write, unified_diff
+from .filecache import FileCache, SnapshotStore
+from .memory import ProjectMemory
+from .plan import PlanError, PlanStep, execute, render
+from .process import DEFAULT_TIMEOUT, run_command
+from .search import get_search_index
+from .subagents import MAX_TASKS, GitError, SubAgentPool, SubTask
+from .workspace import get_workspace_index
+
+if TYPE_CHECKING:
+    # POSIX-only (pty, termios); imported by the agent when the persistent shell is enabled
+    from .shell import ShellSession
+
+
+# Default output budgets (characters kept in history per tool call)
+DEFAULT_OUTPUT_LIMITS = {
+    "bash": 30_000,
+    "read": 50_000,
+    "glob": 20_000,
+    "run_plan": 50_000,
+}
+DEFAULT_OUTPUT_LIMIT = 20_000
+DEFAULT_OUTPUT_MAX_LINES = 2_000
 
 
 class ToolResult:
@@ -17,48 +46,239 @@ class ToolResult:
     def __str__(self) -> str:
         if self.success:
             return self.output if self.output else "(no output)"
+        if self.output:
+            return f"{self.output}\nError: {self.error or 'Unknown error'}"
         return f"Error: {self.error or 'Unknown error'}"
 
 
-def bash(command: str, cwd: Optional[str] = None) -> ToolResult:
+class OutputStore:
+    """Keeps full tool outputs that were truncated, so the model can page them.
+    
+    Entries are evicted least-recently-used once the total size exceeds
+    ``max_chars``, which keeps memory bounded over long sessions.
+    """
+    
+    def __init__(self, max_chars: int = 20_000_000):
+        self.max_chars = max_chars
+        self._outputs: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._ids = itertools.count(1)
+    
+    def put(self, text: str) -> str:
+        """Store an output and return its handle."""
+        handle = f"out-{next(self._ids)}"
+        self._outputs[handle] = text
+        self._size += len(text)
+        while self._size > self.max_chars and len(self._outputs) > 1:
+            _, evicted = self._outputs.popitem(last=False)
+            self._size -= len(evicted)
+        return handle
+    
+    def get(self, handle: str) -> Optional[str]:
+        """Get a stored output by handle, or None if unknown or evicted."""
+        text = self._outputs.get(handle)
+        if text is not None:
+            self._outputs.move_to_end(handle)
+        return text
+
+
+class ToolContext:
+    """Per-agent state shared with tools.
+    
+    Tools that declare a ``context`` parameter receive the agent's context
+    in addition to ``cwd``; the parameter is never exposed to the model.
+    """
+    
+    def __init__(
+        self,
+        workspace: str,
+        output_limits: Optional[dict[str, int]] = None,
+        output_max_lines: int = DEFAULT_OUTPUT_MAX_LINES,
+    ):
+        self.workspace = workspace
+        self.output_limits = {**DEFAULT_OUTPUT_LIMITS, **(output_limits or {})}
+        self.output_max_lines = output_max_lines
+        self.outputs = OutputStore()
+        # File contents shared by read/edit/write, and what the model has seen
+        self.files = FileCache()
+        # Each file's content as the model last saw it, for delta reads
+        self.snapshots = SnapshotStore()
+        # Current agent turn, set by the agent loop
+        self.turn = 0
+        # Pre-images of files modified by tools, for undo
+        self.checkpoints = CheckpointStore(workspace)
+        # Receives command output lines as they are produced (e.g. by the CLI)
+        self.on_output: Optional[Callable[[str], None]] = None
+        # Environment and umask of commands (default: this process's); the
+        # daemon sets its client's, so commands run as they would without it
+        self.env: Optional[dict[str, str]] = None
+        self.umask: Optional[int] = None
+        # Persistent shell for bash, if enabled; otherwise one process per command
+        self.shell: Optional[ShellSession] = None
+        # Child agents for delegate, if enabled (never for a child itself)
+        self.subagents: Optional[SubAgentPool] = None
+        # Facts remembered across runs, if enabled
+        self.memory: Optional[ProjectMemory] = None
+    
+    def output_limit(self, tool_name: str) -> int:
+        """Character budget for one call of the given tool."""
+        return self.output_limits.get(tool_name, DEFAULT_OUTPUT_LIMIT)
+    
+    def fits_output(self, tool_name: str, text: str) -> bool:
+        """Whether text is kept whole in history by ``bound_output``."""
+        return _head_tail_cut(text, self.output_limit(tool_name), self.output_max_lines) is None
+    
+    def bound_output(self, tool_name: str, text: str) -> str:
+        """Apply the tool's output budget, keeping the head and the tail.
+        
+        The full output is kept in the output store and the omitted middle
+        is replaced by a notice naming the handle to page it with.
+        """
+        cut = _head_tail_cut(text, self.output_limit(tool_name), self.output_max_lines)
+        if cut is None:
+            return text
+        head_end, tail_start = cut
+        omitted = text[head_end:tail_start]
+        handle = self.outputs.put(text)
+        omitted_lines = omitted.count("\n")
+        total_lines = text.count("\n") + 1
+        omitted_bytes = len(omitted.encode("utf-8", "replace"))
+        total_bytes = len(text.encode("utf-8", "replace"))
+        notice = (
+            f"\n[... {omitted_lines} of {total_lines} lines ({omitted_bytes:,} of {total_bytes:,} bytes) omitted. "
+            f'Use read_output(handle="{handle}", offset=N, limit=M) to page the full output. ...]\n'
+        )
+        return text[:head_end] + notice + text[tail_start:]
+
+
+def _head_tail_cut(text: str, max_chars: int, max_lines: int) -> Optional[tuple[int, int]]:
+    """Find where to cut text to fit the budget.
+    
+    Returns (head_end, tail_start) offsets, or None if the text already fits.
+    Cuts fall on line boundaries unless a single line exceeds half the budget.
+    """
+    lines = text.splitlines(keepends=True)
+    if len(text) <= max_chars and len(lines) <= max_lines:
+        return None
+    
+    half_chars = max(max_chars // 2, 1)
+    half_lines = max(max_lines // 2, 1)
+    
+    head_end = 0
+    for line in lines[:half_lines]:
+        if head_end + len(line) > half_chars:
+            break
+        head_end += len(line)
+    if head_end == 0:
+        head_end = min(half_chars, len(text))
+    
+    tail_start = len(text)
+    for line in reversed(lines[-half_lines:]):
+        if len(text) - tail_start + len(line) > half_chars:
+            break
+        tail_start -= len(line)
+    if tail_start == len(text):
+        tail_start = len(text) - half_chars
+    
+    return head_end, max(tail_start, head_end)
+
+
+def accepts_context(func: Callable[..., Any]) -> bool:
+    """Whether a tool function takes the agent's ToolContext."""
+    return "context" in inspect.signature(func).parameters
+
+
+def _page_lines(text: str, offset: int, limit: Optional[int]) -> str:
+    """Return lines [offset, offset + limit) of text with a position notice."""
+    lines = text.split("\n")
+    total = len(lines)
+    start = max(offset, 0)
+    end = total if limit is None or limit <= 0 else min(start + limit, total)
+    if start == 0 and end == total:
+        return text
+    if start >= total:
+        return f"[Offset {start} is past the end ({total} lines)]"
+    page = "\n".join(lines[start:end])
+    if end < total:
+        page += f"\n[Showing lines {start + 1}-{end} of {total}. Use offset={end} to continue.]"
+    else:
+        page += f"\n[Showing lines {start + 1}-{end} of {total}.]"
+    return page
+
+
+async def bash(
+    command: str,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
     """Execute a bash/shell command.
     
+    Output is streamed to the context's ``on_output`` callback as it
+    arrives; only a bounded head/tail of it is kept for the result. When
+    the context has a persistent shell session, the command runs there and
+    shell state (cwd, environment) carries over between calls.
+    
     Args:
         command: The command to execute
         cwd: Working directory (defaults to current dir)
+        context: Agent tool context (output callback and budgets)
     
     Returns:
         ToolResult with output or error
     """
+    on_output = context.on_output if context else None
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-        )
-        output = result.stdout
-        if result.stderr:
-            output += result.stderr if not output else "\n" + result.stderr
-        return ToolResult(
-            success=result.returncode == 0,
-            output=output.strip() if output else "",
-            error=f"Command failed with exit code {result.returncode}" if result.returncode != 0 else None,
-        )
-    except subprocess.TimeoutExpired:
-        return ToolResult(success=False, output="", error="Command timed out (5 minutes)")
+        if context and context.shell:
+            result = await context.shell.run(command, timeout=DEFAULT_TIMEOUT, on_output=on_output)
+        else:
+            result = await run_command(
+                command,
+                cwd=cwd,
+                timeout=DEFAULT_TIMEOUT,
+                on_output=on_output,
+                env=context.env if context else None,
+                umask=context.umask if context else None,
+            )
     except Exception as e:
         return ToolResult(success=False, output="", error=str(e))
+    
+    output = result.output.strip()
+    if result.timed_out:
+        return ToolResult(
+            success=False,
+            output=output,
+            error=f"Command timed out ({DEFAULT_TIMEOUT // 60} minutes) and was killed",
+        )
+    return ToolResult(
+        success=result.returncode == 0,
+        output=output,
+        error=f"Command failed with exit code {result.returncode}" if result.returncode != 0 else None,
+    )
 
 
-def read_file(path: str, cwd: Optional[str] = None) -> ToolResult:
+def read_file(
+    path: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    since_last_read: bool = False,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
     """Read a file's contents.
     
+    With a context, the content comes from the agent's file cache, and
+    reading the same lines of an unchanged file again in the same run
+    returns a short reference to the turn that showed them. A read that
+    shows the whole file snapshots it, so ``since_last_read`` can later
+    return just a diff.
+    
     Args:
         path: Path to the file (relative or absolute)
+        offset: Number of lines to skip from the start of the file
+        limit: Maximum number of lines to return (default: all)
+        since_last_read: Return only a diff of what changed since this file was last read
         cwd: Base directory for relative paths
+        context: Agent tool context (file cache, snapshots)
     
     Returns:
         ToolResult with file contents or error
@@ -78,22 +298,56 @@ def read_file(path: str, cwd: Optional[str] = None) -> ToolResult:
         if not file_path.is_file():
             return ToolResult(success=False, output="", error=f"Not a file: {path}")
         
-        content = file_path.read_text(encoding="utf-8")
-        return ToolResult(success=True, output=content)
+        if not context:
+            content = file_path.read_text(encoding="utf-8")
+            return ToolResult(success=True, output=_page_lines(content, offset, limit))
+        
+        entry = context.files.lookup(file_path)
+        snapshot = context.snapshots.get(file_path)
+        if since_last_read and snapshot is not None:
+            if snapshot == entry.text:
+                return ToolResult(success=True, output=f"[{path} has not changed since you last read it]")
+            output = f"[Changes to {path} since you last read it]\n{unified_diff(path, snapshot, entry.text)}"
+            # A diff cut short in history did not show the model every change
+            if context.fits_output("read", output):
+                context.snapshots.put(file_path, entry.text)
+            return ToolResult(success=True, output=output)
+        
+        output = _page_lines(entry.text, offset, limit)
+        # Only a read kept whole in history can be referred back to, and only
+        # one that also showed the whole file is a snapshot of what the model saw
+        fits = context.fits_output("read", output)
+        if fits and output == entry.text:
+            context.snapshots.put(file_path, entry.text)
+        key = (offset, limit)
+        if key in entry.seen:
+            return ToolResult(
+                success=True,
+                output=f"[{path} is unchanged since turn {entry.seen[key]}; its content is as shown then]",
+            )
+        if fits:
+            entry.seen[key] = context.turn
+        return ToolResult(success=True, output=output)
     except Exception as e:
         return ToolResult(success=False, output="", error=str(e))
 
 
-def write_file(path: str, content: str, cwd: Optional[str] = None) -> ToolResult:
+def write_file(
+    path: str,
+    content: str,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
     """Write content to a file.
     
     Args:
         path: Path to the file (relative or absolute)
         content: Content to write
         cwd: Base directory for relative paths
+        context: Agent tool context (checkpoints, file cache, snapshots)
     
     Returns:
-        ToolResult with status or error
+        ToolResult with status (and a diff of the change) or error
     """
     try:
         file_path = Path(cwd) / path if cwd else Path(path)
@@ -105,16 +359,41 @@ def write_file(path: str, content: str, cwd: Optional[str] = None) -> ToolResult
             if not str(file_path).startswith(str(cwd_resolved)):
                 return ToolResult(success=False, output="", error="Access denied: file outside workspace")
         
-        # Create parent directories if needed
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        old_content = None
+        if file_path.is_file():
+            if context:
+                old_content = context.files.lookup(file_path).text
+            else:
+                old_content = file_path.read_text(encoding="utf-8")
+        if context:
+            context.checkpoints.record(file_path)
+        # Parent directories are created as needed
+        atomic_write(file_path, content, umask=context.umask if context else None)
+        if context:
+            # The model has the content: it just sent it
+            context.files.store(file_path, content).seen[(0, None)] = context.turn
+            context.snapshots.put(file_path, content)
         
-        file_path.write_text(content, encoding="utf-8")
-        return ToolResult(success=True, output=f"Successfully wrote {len(content)} characters to {path}")
+        output = f"Successfully wrote {len(content)} characters to {path}"
+        if old_content is not None:
+            diff = unified_diff(path, old_content, content)
+            # A rewrite's diff would only repeat the content just sent
+            if not diff:
+                output += " (content unchanged)"
+            elif len(diff) < len(content):
+                output += f"\n{diff}"
+        return ToolResult(success=True, output=output)
     except Exception as e:
         return ToolResult(success=False, output="", error=str(e))
 
 
-def edit_file(path: str, old_text: str, new_text: str, cwd: Optional[str] = None) -> ToolResult:
+def edit_file(
+    path: str,
+    old_text: str,
+    new_text: str,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
     """Edit a file by replacing old_text with new_text.
     
     Args:
@@ -122,9 +401,10 @@ def edit_file(path: str, old_text: str, new_text: str, cwd: Optional[str] = None
         old_text: Text to find and replace
         new_text: Text to replace with
         cwd: Base directory for relative paths
+        context: Agent tool context (checkpoints, file cache, snapshots)
     
     Returns:
-        ToolResult with status or error
+        ToolResult with status (and a diff of the change) or error
     """
     try:
         file_path = Path(cwd) / path if cwd else Path(path)
@@ -138,15 +418,77 @@ def edit_file(path: str, old_text: str, new_text: str, cwd: Optional[str] = None
         if not file_path.exists():
             return ToolResult(success=False, output="", error=f"File not found: {path}")
         
-        content = file_path.read_text(encoding="utf-8")
+        if context:
+            content = context.files.lookup(file_path).text
+        else:
+            content = file_path.read_text(encoding="utf-8")
         
         if old_text not in content:
             return ToolResult(success=False, output="", error="Text to replace not found in file")
         
         new_content = content.replace(old_text, new_text, 1)
-        file_path.write_text(new_content, encoding="utf-8")
+        if context:
+            context.checkpoints.record(file_path)
+        atomic_write(file_path, new_content)
+        if context:
+            context.files.store(file_path, new_content)
+            # The diff brings an up-to-date snapshot up to date again
+            if context.snapshots.get(file_path) == content:
+                context.snapshots.put(file_path, new_content)
         
-        return ToolResult(success=True, output=f"Successfully replaced text in {path}")
+        diff = unified_diff(path, content, new_content)
+        return ToolResult(success=True, output=f"Successfully replaced text in {path}\n{diff}")
+    except Exception as e:
+        return ToolResult(success=False, output="", error=str(e))
+
+
+def multi_edit(
+    edits: Optional[list[EditSpec]] = None,
+    patch: Optional[str] = None,
+    fsync: bool = False,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
+    """Apply many edits across files as one all-or-nothing change.
+    
+    Every edit is validated before any file is written; if one does not
+    match, nothing changes. Files are then replaced atomically.
+    
+    Args:
+        edits: Replacements to make, in order; each old_text must occur exactly once
+        patch: Unified diff to apply (alternative or in addition to edits)
+        fsync: Flush written files to disk before returning
+        cwd: Base directory for relative paths
+        context: Agent tool context (checkpoints, file cache)
+    
+    Returns:
+        ToolResult with a summary of changed files or error
+    """
+    if not edits and not patch:
+        return ToolResult(success=False, output="", error="Provide edits or a patch")
+    try:
+        transaction = EditTransaction(cwd)
+        for i, edit in enumerate(edits or [], 1):
+            try:
+                transaction.replace(edit["path"], edit["old_text"], edit["new_text"])
+            except KeyError as e:
+                raise EditError(f"Edit {i} is missing {e}")
+        if patch:
+            transaction.apply_patch(patch)
+        if context:
+            for file_path in transaction.changed_paths():
+                context.checkpoints.record(file_path)
+        transaction.commit(fsync=fsync)
+        if context:
+            for file_path in transaction.changed_paths():
+                text = transaction.content(file_path)
+                if text is None:
+                    context.files.invalidate(file_path)
+                else:
+                    context.files.store(file_path, text)
+        return ToolResult(success=True, output=f"Applied changes: {transaction.summary()}")
+    except EditError as e:
+        return ToolResult(success=False, output="", error=f"{e}. No files were changed.")
     except Exception as e:
         return ToolResult(success=False, output="", error=str(e))
 
@@ -154,6 +496,9 @@ def edit_file(path: str, old_text: str, new_text: str, cwd: Optional[str] = None
 def glob_files(pattern: str, cwd: Optional[str] = None) -> ToolResult:
     """Find files matching a glob pattern.
     
+    Queries the shared workspace index, so .gitignore'd paths and
+    directories like .git and node_modules are never walked or returned.
+    
     Args:
         pattern: Glob pattern (e.g., "*.py", "**/*.txt")
         cwd: Base directory for search
@@ -163,37 +508,256 @@ def glob_files(pattern: str, cwd: Optional[str] = None) -> ToolResult:
     """
     try:
         search_dir = Path(cwd) if cwd else Path(".")
-        search_dir = search_dir.resolve()
-        
-        # Security: limit search to cwd
-        files = []
-        for match in search_dir.glob(pattern):
-            if str(match).startswith(str(search_dir)):
-                files.append(str(match.relative_to(search_dir)))
+        files = get_workspace_index(str(search_dir)).glob(pattern)
         
         if not files:
             return ToolResult(success=True, output="No files found matching pattern")
         
-        return ToolResult(success=True, output="\n".join(sorted(files)))
+        return ToolResult(success=True, output="\n".join(files))
     except Exception as e:
         return ToolResult(success=False, output="", error=str(e))
 
 
+def search(query: str, k: int = 10, cwd: Optional[str] = None) -> ToolResult:
+    """Search file contents by keywords or a natural-language description.
+    
+    Uses a persisted full-text index of the workspace, updated for changed
+    files before each query, and ranks matches by BM25.
+    
+    Args:
+        query: Identifiers or words to look for (e.g. "retry backoff timeout")
+        k: Maximum number of results
+        cwd: Workspace root to search
+    
+    Returns:
+        ToolResult with ranked file:line snippets or error
+    """
+    try:
+        hits = get_search_index(cwd or ".").search(query, k)
+    except Exception as e:
+        return ToolResult(success=False, output="", error=str(e))
+    if not hits:
+        return ToolResult(success=True, output="No matches found")
+    return ToolResult(success=True, output="\n".join(str(hit) for hit in hits))
+
+
+def read_output(
+    handle: str,
+    offset: int = 0,
+    limit: int = 200,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
+    """Page through a tool output that was truncated.
+    
+    Args:
+        handle: Handle from the truncation notice
+        offset: Number of lines to skip
+        limit: Maximum number of lines to return
+        cwd: Unused, accepted for a uniform tool signature
+        context: Agent tool context holding the output store
+    
+    Returns:
+        ToolResult with the requested lines or error
+    """
+    text = context.outputs.get(handle) if context else None
+    if text is None:
+        return ToolResult(success=False, output="", error=f"Unknown or expired output handle: {handle}")
+    return ToolResult(success=True, output=_page_lines(text, offset, limit))
+
+
+async def run_plan(
+    steps: list[PlanStep],
+    max_chars: int = 20_000,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
+    """Run a pipeline of tool calls locally and return their combined output.
+    
+    Steps run in order; ``for_each`` maps a step over an earlier step's
+    output lines (concurrently), ``filter`` keeps matching lines, and
+    consecutive ``parallel`` steps run together (see plan.py). Reads in a
+    plan do not count as the model having seen a file, since their output
+    may be filtered or shortened.
+    
+    Args:
+        steps: Steps like {"name": "files", "tool": "glob", "args": {"pattern": "**/*.py"}, "show": false} then {"tool": "read", "for_each": "files", "args": {"path": "{item}"}, "filter": "TODO"}
+        max_chars: Size budget of the combined result
+        cwd: Working directory passed to every tool
+        context: Agent tool context, shared with the tools
+    
+    Returns:
+        ToolResult with each step's item count and the shown outputs, or error
+    """
+    plan_context = None
+    if context:
+        plan_context = copy.copy(context)
+        plan_context.files = FileCache()
+        plan_context.snapshots = SnapshotStore()
+        max_chars = min(max_chars, context.output_limit("run_plan"))
+    
+    async def call_tool(name: str, arguments: dict[str, Any]) -> tuple[bool, str, Optional[str]]:
+        from .registry import check_arguments
+        
+        func = TOOLS[name]
+        if problem := check_arguments(name, func, arguments):
+            return False, "", problem
+        kwargs = dict(arguments, cwd=cwd)
+        if accepts_context(func):
+            kwargs["context"] = plan_context
+        try:
+            if inspect.iscoroutinefunction(func):
+                result = await func(**kwargs)
+            else:
+                result = await asyncio.to_thread(func, **kwargs)
+        except Exception as e:
+            return False, "", str(e)
+        return result.success, result.output, result.error
+    
+    try:
+        results = await execute(steps, call_tool, set(TOOLS) - {"run_plan", "delegate", "remember"})
+    except PlanError as e:
+        return ToolResult(success=False, output="", error=str(e))
+    text, cut = render(results, max_chars)
+    if cut and context:
+        full, _ = render(results, 1 << 62)
+        handle = context.outputs.put(full)
+        text += f'\n[Outputs were shortened to fit. Use read_output(handle="{handle}", offset=N, limit=M) for all of it.]'
+    return ToolResult(success=True, output=text)
+
+
+def remember(
+    fact: str,
+    files: list[str],
+    replaces: Optional[str] = None,
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
+    """Remember a verified fact about the project for future runs.
+    
+    The fact is saved when the run completes and shown in later runs'
+    system prompt until one of its files changes (see memory.py).
+    
+    Args:
+        fact: A short fact you have checked, e.g. "Tests: `uv run pytest -q` (about 40 s)"
+        files: Files the fact depends on, relative to the workspace, e.g. ["pyproject.toml"]
+        replaces: Id of a remembered fact this one corrects, e.g. "m3"
+        cwd: Workspace directory
+        context: Agent tool context, providing the project memory
+    
+    Returns:
+        ToolResult confirming the fact was queued, or error
+    """
+    if context is None or context.memory is None:
+        return ToolResult(success=False, output="", error="Project memory is turned off")
+    if problem := context.memory.propose(fact, files, replaces):
+        return ToolResult(success=False, output="", error=problem)
+    return ToolResult(success=True, output="Will be remembered once this run completes")
+
+
+async def delegate(
+    tasks: list[SubTask],
+    cwd: Optional[str] = None,
+    context: Optional[ToolContext] = None,
+) -> ToolResult:
+    """Run independent sub-tasks in parallel child agents and merge their changes.
+    
+    Each child works in its own git worktree of the current working tree,
+    with its own turn limit and budget; its diff is applied to the
+    workspace when it finishes (see subagents.py).
+    
+    Args:
+        tasks: Sub-tasks like {"task": "Add type hints to utils/dates.py", "max_turns": 8, "deadline": 120}; each must make sense on its own
+        cwd: Workspace directory, inside a git repository
+        context: Agent tool context, providing the sub-agent pool and checkpoints
+    
+    Returns:
+        ToolResult with each child's status, changed files and final response, or error
+    """
+    if context is None or context.subagents is None:
+        return ToolResult(success=False, output="", error="Sub-agents are not available here")
+    if not tasks:
+        return ToolResult(success=False, output="", error="No tasks given")
+    if len(tasks) > MAX_TASKS:
+        return ToolResult(success=False, output="", error=f"{len(tasks)} tasks given; at most {MAX_TASKS} are allowed")
+    if not all(isinstance(task, dict) and isinstance(task.get("task"), str) for task in tasks):
+        return ToolResult(success=False, output="", error='Each task needs a "task" string')
+    try:
+        children = await context.subagents.run(tasks, Path(cwd or context.workspace), context.checkpoints)
+    except GitError as e:
+        return ToolResult(success=False, output="", error=str(e))
+    return ToolResult(success=True, output="\n\n".join(child.summary() for child in children))
+
+
+# Descriptions shown to the model; parameter schemas are generated from
+# the function signatures (see registry.py)
+TOOL_DESCRIPTIONS = {
+    "bash": "Execute a shell command in the workspace directory",
+    "read": "Read the contents of a file",
+    "write": "Write content to a new file or overwrite an existing file",
+    "edit": "Edit a file by replacing old text with new text",
+    "multi_edit": "Apply several edits, or a unified diff, across one or more files in a single all-or-nothing step",
+    "glob": "Find files matching a glob pattern",
+    "search": "Full-text search of the workspace; returns ranked file:line matches for keywords or a description",
+    "read_output": "Page through a truncated tool output by its handle",
+    "run_plan": "Run a pipeline of tool calls (sequential or parallel steps, map over results, "
+    "regex filters) in one call and get one combined result",
+    "delegate": "Run independent sub-tasks in parallel child agents, each in its own git worktree, "
+    "and merge their changes into the workspace",
+    "remember": "Remember a verified fact about the project (build/test commands, layout, conventions) "
+    "for future runs, until the files it depends on change",
+}
+
 # Tool registry
 TOOLS = {
     "bash": bash,
     "read": read_file,
     "write": write_file,
     "edit": edit_file,
+    "multi_edit": multi_edit,
     "glob": glob_files,
+    "search": search,
+    "read_output": read_output,
+    "run_plan": run_plan,
+    "delegate": delegate,
+    "remember": remember,
+}
+
+
+# How each tool is introduced in the system prompt
+TOOL_USAGE = {
+    "bash": "bash(command): Execute shell commands",
+    "read": "read(path, offset, limit, since_last_read): Read file contents, optionally a range of lines or only what changed since your last read",
+    "write": "write(path, content): Write content to a file",
+    "edit": "edit(path, old_text, new_text): Edit a file by replacing text; returns a diff of the change, so there is no need to re-read the file",
+    "multi_edit": "multi_edit(edits, patch): Apply many edits or a unified diff atomically; prefer it over repeated edit calls",
+    "glob": "glob(pattern): Find files matching a pattern",
+    "search": "search(query, k): Ranked full-text search over file contents; prefer it over grep for finding code",
+    "read_output": "read_output(handle, offset, limit): Page through a truncated tool output",
+    "run_plan": 'run_plan(steps, max_chars): Run several tool calls in one step when you already know the chain, e.g. glob, then read each match, then keep matching lines. Each step is {"tool", "args", "name"?, "for_each": earlier step name?, "filter": regex?, "limit"?, "parallel"?, "show"?}; "{item}" in args is replaced by each output line of the for_each step',
+    "delegate": 'delegate(tasks): Split work that falls into independent parts (different files or modules) across child agents running in parallel; each task is {"task": full instructions, "max_turns"?, "deadline"?: seconds}. Their changes are merged for you; review the report',
+    "remember": "remember(fact, files, replaces): Save a fact you verified and that a future run would otherwise have to rediscover (how to build and test, where things live, conventions), with the files it depends on; correct a wrong remembered fact by id",
 }
 
 
-def get_tool_descriptions() -> str:
-    """Get descriptions of all available tools."""
-    return """Available tools:
-- bash(command): Execute shell commands
-- read(path): Read file contents
-- write(path, content): Write content to a file
-- edit(path, old_text, new_text): Edit a file by replacing text
-- glob(pattern): Find files matching a pattern"""
+def available_tools(context: ToolContext) -> dict[str, Callable[..., Any]]:
+    """The tools an agent with this context can use.
+    
+    ``delegate`` needs a sub-agent pool and ``remember`` project memory;
+    without them the tools are left out rather than offered and refused.
+    """
+    return {
+        name: func
+        for name, func in TOOLS.items()
+        if not (name == "delegate" and context.subagents is None or name == "remember" and context.memory is None)
+    }
+
+
+def get_tool_descriptions(names: Optional[Iterable[str]] = None) -> str:
+    """Get descriptions of the given tools (default: all)."""
+    lines = "\n".join(f"- {TOOL_USAGE[name]}" for name in (TOOLS if names is None else names))
+    return f"""Available tools:
+{lines}
+
+Long tool outputs are truncated to their head and tail; the notice names
+a handle for read_output to fetch the omitted lines."""
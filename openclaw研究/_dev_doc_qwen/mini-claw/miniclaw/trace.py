@@ -0,0 +1,118 @@
+"""Chrome trace (Perfetto) export of agent events.
+
+``TraceExporter`` subscribes to an agent's event bus and turns start/end
+pairs into nested duration events: run > turn > llm / tool. Open the
+written file in https://ui.perfetto.dev or chrome://tracing; the gaps
+inside a turn that are neither LLM nor tool time are the agent's own
+overhead.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from .events import (
+    Event,
+    EventBus,
+    LLMRequested,
+    LLMResponded,
+    RunFinished,
+    RunStarted,
+    ToolFinished,
+    ToolStarted,
+    TurnFinished,
+    TurnStarted,
+)
+
+
+class TraceExporter:
+    """Collects agent events as Chrome trace events."""
+
+    def __init__(self, pid: int = 1, tid: int = 1):
+        self.pid = pid
+        self.tid = tid
+        self.trace_events: list[dict[str, Any]] = []
+        self._origin: Optional[float] = None
+        self._open: dict[str, float] = {}  # Span kind -> start time
+        self.totals = {"run": 0.0, "llm": 0.0, "tool": 0.0}
+
+    def attach(self, bus: EventBus):
+        """Subscribe to a bus; returns the unsubscribe function."""
+        return bus.subscribe(self.handle)
+
+    def handle(self, event: Event) -> None:
+        if self._origin is None:
+            self._origin = event.monotonic
+        if isinstance(event, RunStarted):
+            self._begin("run", "run", event, {"message": event.message[:200]})
+        elif isinstance(event, RunFinished):
+            self._end("run", event, {"turns": event.turns, "stop_reason": event.stop_reason, "usage": event.usage, "error": event.error})
+        elif isinstance(event, TurnStarted):
+            self._begin("turn", f"turn {event.turn}", event)
+        elif isinstance(event, TurnFinished):
+            self._end("turn", event, {"stop_reason": event.stop_reason})
+        elif isinstance(event, LLMRequested):
+            self._begin("llm", "llm", event, {"messages": event.messages})
+        elif isinstance(event, LLMResponded):
+            self._end("llm", event, {"usage": event.usage, "tool_calls": event.tool_calls, "error": event.error})
+        elif isinstance(event, ToolStarted):
+            self._begin("tool", f"tool:{event.name}", event, {"arguments": _preview(event.arguments)})
+        elif isinstance(event, ToolFinished):
+            self._end("tool", event, {"success": event.success, "output_chars": event.output_chars})
+
+    def _ts(self, event: Event) -> float:
+        return (event.monotonic - self._origin) * 1_000_000  # Microseconds
+
+    def _begin(self, kind: str, name: str, event: Event, args: Optional[dict[str, Any]] = None) -> None:
+        self._open[kind] = event.monotonic
+        self.trace_events.append({
+            "name": name,
+            "cat": kind,
+            "ph": "B",
+            "ts": self._ts(event),
+            "pid": self.pid,
+            "tid": self.tid,
+            "args": args or {},
+        })
+
+    def _end(self, kind: str, event: Event, args: Optional[dict[str, Any]] = None) -> None:
+        start = self._open.pop(kind, None)
+        if start is None:
+            return
+        self.totals[kind] = self.totals.get(kind, 0.0) + event.monotonic - start
+        self.trace_events.append({
+            "ph": "E",
+            "ts": self._ts(event),
+            "pid": self.pid,
+            "tid": self.tid,
+            "args": {k: v for k, v in (args or {}).items() if v is not None},
+        })
+
+    def summary(self) -> dict[str, float]:
+        """Seconds spent in LLM calls, tools, and everything else."""
+        return {
+            "run": self.totals["run"],
+            "llm": self.totals["llm"],
+            "tool": self.totals["tool"],
+            "overhead": max(self.totals["run"] - self.totals["llm"] - self.totals["tool"], 0.0),
+        }
+
+    def write(self, path: str) -> None:
+        """Write the collected events as Chrome trace JSON."""
+        data = {
+            "traceEvents": [
+                {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "mini-claw"}},
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": self.tid, "args": {"name": "agent"}},
+                *self.trace_events,
+            ],
+            "displayTimeUnit": "ms",
+        }
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, default=str), encoding="utf-8")
+
+
+def _preview(arguments: dict[str, Any], limit: int = 200) -> dict[str, Any]:
+    """Shorten long argument values (file contents, patches) for the trace."""
+    return {
+        k: v[:limit] + "..." if isinstance(v, str) and len(v) > limit else v
+        for k, v in arguments.items()
+    }
@@ -0,0 +1,307 @@
+"""Shared, cached workspace file index.
+
+Walking a workspace with ``Path.glob("**/...")`` descends into ``.git``,
+``node_modules`` and virtualenvs on every call. ``WorkspaceIndex`` walks the
+tree once, honouring ``.gitignore`` files and pruning ignored directories
+before descending into them, and caches the listing per directory.
+
+Later queries revalidate the cache by comparing directory mtimes: adding,
+removing or renaming an entry changes its parent directory's mtime, so only
+directories that changed are scanned again. Directories are scanned in
+parallel with ``os.scandir`` on a thread pool.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+
+# Directories never worth indexing, even without a .gitignore
+DEFAULT_IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".mini-claw",
+})
+
+
+@lru_cache(maxsize=1024)
+def glob_to_regex(pattern: str) -> re.Pattern:
+    """Compile a glob pattern matched against '/'-separated relative paths.
+
+    ``*`` and ``?`` do not cross directory boundaries; a ``**`` segment
+    matches any number of directories, including none.
+    """
+    segments = pattern.strip("/").split("/")
+    parts = []
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            parts.append(".*" if last else "(?:.*/)?")
+            continue
+        parts.append(_translate_segment(segment))
+        if not last:
+            parts.append("/")
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+def _translate_segment(segment: str) -> str:
+    """Translate one path segment of a glob into a regex."""
+    out = []
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = segment.find("]", i + 2 if segment[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    """A single .gitignore pattern, relative to the directory defining it."""
+
+    def __init__(self, base: str, pattern: str):
+        self.base = base  # Relative dir of the .gitignore ("" for the root)
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns with a slash (other than a trailing one) are anchored to base
+        self.anchored = "/" in pattern
+        self.regex = glob_to_regex(pattern.lstrip("/"))
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """Check a path relative to the workspace root."""
+        if self.dir_only and not is_dir:
+            return False
+        if not self.anchored:
+            return self.regex.match(name) is not None
+        if self.base:
+            prefix = self.base + "/"
+            if not rel_path.startswith(prefix):
+                return False
+            rel_path = rel_path[len(prefix):]
+        return self.regex.match(rel_path) is not None
+
+
+def parse_gitignore(text: str, base: str) -> list[IgnoreRule]:
+    """Parse .gitignore content into rules."""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("\\"):
+            line = line[1:]
+        rules.append(IgnoreRule(base, line))
+    return rules
+
+
+def is_ignored(rules: list[IgnoreRule], rel_path: str, name: str, is_dir: bool) -> bool:
+    """Evaluate rules in order; the last matching rule wins."""
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel_path, name, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+class _DirListing:
+    """Cached, already-filtered listing of one directory."""
+
+    __slots__ = ("mtime_ns", "gitignore_mtime_ns", "rules", "files", "dirs")
+
+    def __init__(
+        self,
+        mtime_ns: int,
+        gitignore_mtime_ns: Optional[int],
+        rules: list[IgnoreRule],
+        files: list[str],
+        dirs: list[str],
+    ):
+        self.mtime_ns = mtime_ns
+        self.gitignore_mtime_ns = gitignore_mtime_ns
+        self.rules = rules  # Inherited rules plus this directory's own
+        self.files = files
+        self.dirs = dirs
+
+
+class WorkspaceIndex:
+    """Gitignore-aware, cached listing of the files under a workspace root.
+
+    Use ``get_workspace_index(root)`` to share one index per workspace.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_workers: int = 8,
+        ignored_dirs: frozenset[str] = DEFAULT_IGNORED_DIRS,
+    ):
+        self.root = Path(root).resolve()
+        self.max_workers = max_workers
+        self.ignored_dirs = ignored_dirs
+        self._listings: dict[str, _DirListing] = {}
+        self._files: list[str] = []
+        self._dirs: list[str] = []
+        self._lock = threading.Lock()
+
+    def files(self) -> list[str]:
+        """All non-ignored files, as sorted '/'-separated relative paths."""
+        self.refresh()
+        return self._files
+
+    def dirs(self) -> list[str]:
+        """All non-ignored directories, as sorted relative paths."""
+        self.refresh()
+        return self._dirs
+
+    def glob(self, pattern: str) -> list[str]:
+        """Files and directories matching a glob pattern, relative to the root."""
+        regex = glob_to_regex(pattern)
+        self.refresh()
+        return sorted(p for p in self._files + self._dirs if regex.match(p))
+
+    def refresh(self) -> None:
+        """Bring the cache up to date, rescanning only changed directories."""
+        with self._lock:
+            listings: dict[str, _DirListing] = {}
+            root_rules = self._global_rules()
+            level: list[tuple[str, list[IgnoreRule], bool]] = [("", root_rules, False)]
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while level:
+                    results = list(pool.map(lambda item: self._scan(*item), level))
+                    next_level = []
+                    for (rel_dir, _, _), (listing, rules_changed) in zip(level, results):
+                        if listing is None:
+                            continue
+                        listings[rel_dir] = listing
+                        for name in listing.dirs:
+                            child = f"{rel_dir}/{name}" if rel_dir else name
+                            # Children must be refiltered when inherited rules changed
+                            next_level.append((child, listing.rules, rules_changed))
+                    level = next_level
+
+            unchanged = listings.keys() == self._listings.keys() and all(
+                listing is self._listings[rel_dir] for rel_dir, listing in listings.items()
+            )
+            self._listings = listings
+            if unchanged:
+                return
+            files = []
+            dirs = []
+            for rel_dir, listing in listings.items():
+                prefix = rel_dir + "/" if rel_dir else ""
+                files.extend(prefix + name for name in listing.files)
+                if rel_dir:
+                    dirs.append(rel_dir)
+            self._files = sorted(files)
+            self._dirs = sorted(dirs)
+
+    def _global_rules(self) -> list[IgnoreRule]:
+        """Rules from .git/info/exclude, which apply to the whole repo."""
+        try:
+            text = (self.root / ".git" / "info" / "exclude").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return []
+        return parse_gitignore(text, "")
+
+    def _scan(
+        self,
+        rel_dir: str,
+        inherited: list[IgnoreRule],
+        force: bool,
+    ) -> tuple[Optional[_DirListing], bool]:
+        """Return the listing of one directory, reusing the cache if valid.
+
+        ``force`` means the inherited rules changed since the cached scan.
+        Returns (listing, rules_changed); listing is None if the directory
+        is gone.
+        """
+        path = self.root / rel_dir if rel_dir else self.root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, True
+
+        cached = self._listings.get(rel_dir)
+        if cached is not None and not force and cached.mtime_ns == mtime_ns:
+            gitignore_mtime_ns = None
+            if cached.gitignore_mtime_ns is not None:
+                try:
+                    gitignore_mtime_ns = os.stat(path / ".gitignore").st_mtime_ns
+                except OSError:
+                    pass
+            if gitignore_mtime_ns == cached.gitignore_mtime_ns:
+                return cached, False
+
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return None, True
+
+        gitignore = next((e for e in entries if e.name == ".gitignore" and e.is_file()), None)
+        try:
+            gitignore_mtime_ns = gitignore.stat().st_mtime_ns if gitignore else None
+        except OSError:
+            gitignore, gitignore_mtime_ns = None, None
+
+        if cached is not None and not force and cached.gitignore_mtime_ns == gitignore_mtime_ns:
+            # Only entries changed; keep the same rules so children stay cached
+            rules, rules_changed = cached.rules, False
+        else:
+            rules, rules_changed = inherited, True
+            if gitignore is not None:
+                try:
+                    text = Path(gitignore.path).read_text(encoding="utf-8", errors="replace")
+                    rules = inherited + parse_gitignore(text, rel_dir)
+                except OSError:
+                    pass
+
+        files = []
+        dirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir and entry.name in self.ignored_dirs:
+                continue
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if rules and is_ignored(rules, rel_path, entry.name, is_dir):
+                continue
+            (dirs if is_dir else files).append(entry.name)
+
+        return _DirListing(mtime_ns, gitignore_mtime_ns, rules, files, dirs), rules_changed
+
+
+_INDEXES: dict[Path, WorkspaceIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_workspace_index(root: str) -> WorkspaceIndex:
+    """Get the shared index for a workspace root, creating it on first use."""
+    key = Path(root).resolve()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = WorkspaceIndex(str(key))
+        return index